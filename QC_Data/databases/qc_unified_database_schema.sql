@@ -14,6 +14,7 @@ CREATE TABLE IF NOT EXISTS qc_entries (
     data_source TEXT NOT NULL CHECK(data_source IN ('excel_v1', 'excel_v2', 'direct_input')),
     source_file TEXT,  -- Excel filename or NULL for direct input
     source_entry_id INTEGER,  -- Original ID from source database
+    source_row INTEGER,  -- Sheet row number for Excel sources
     
     -- Common QC fields (union of all sources)
     work_order TEXT,
@@ -31,7 +32,9 @@ CREATE TABLE IF NOT EXISTS qc_entries (
     
     -- Time values (normalized to minutes)
     process_time_minutes REAL,
+    process_time_unit TEXT,  -- Unit the Excel value was read in (see qc_time_units.py)
     total_time_minutes REAL,
+    total_time_unit TEXT,  -- Unit the Excel value was read in (see qc_time_units.py)
     setup_minutes INTEGER DEFAULT 0,
     downtime_minutes INTEGER DEFAULT 0,
     
@@ -80,6 +83,59 @@ CREATE TABLE IF NOT EXISTS qc_source_metadata (
     import_notes TEXT
 );
 
+-- ============================================================================
+-- EXCEL FILES TABLE
+-- ============================================================================
+-- One row per QC sheet workbook ingested straight into this database
+-- (same layout as qc_files in qc_sheets.db), used for incremental ingest
+CREATE TABLE IF NOT EXISTS qc_files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    file_path TEXT NOT NULL,
+    file_size INTEGER,
+    last_modified TIMESTAMP,
+    total_entries INTEGER DEFAULT 0,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    import_status TEXT DEFAULT 'success',
+    error_message TEXT,
+    content_hash TEXT,
+    rows_hash TEXT,
+    duplicate_of TEXT,
+    template TEXT
+);
+
+-- ============================================================================
+-- QC SHEET TEMPLATES TABLE
+-- ============================================================================
+-- Maps each QC sheet header layout (see build_qc_database.header_fingerprint)
+-- to its Excel format version. Every workbook sharing a layout gets the same
+-- data_source. New layouts are classified from their header columns
+-- (detected_by = 'header': MATERIAL SIZE or a "DATE (MM/DD/YYYY)" column
+-- means v2); only layouts the headers do not decide fall back to the entry
+-- dates of the first workbook seen with them (detected_by = 'entry_date').
+-- Set detected_by to 'manual' when correcting a row by hand.
+CREATE TABLE IF NOT EXISTS qc_sheet_templates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL UNIQUE,
+    data_source TEXT NOT NULL CHECK(data_source IN ('excel_v1', 'excel_v2')),
+    first_seen_file TEXT,
+    detected_by TEXT DEFAULT 'header',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================================
+-- SYNC STATE TABLE
+-- ============================================================================
+-- High-water mark of each incrementally synced source (see
+-- migrate_direct_input.py): the largest source rowid and updated_at copied
+-- so far. A sync only reads source rows past these values.
+CREATE TABLE IF NOT EXISTS qc_sync_state (
+    source TEXT PRIMARY KEY,
+    last_rowid INTEGER NOT NULL DEFAULT 0,
+    last_updated_at TEXT,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================================
 -- INDEXES
 -- ============================================================================
@@ -92,6 +148,15 @@ CREATE INDEX IF NOT EXISTS idx_qc_department ON qc_entries(department);
 CREATE INDEX IF NOT EXISTS idx_qc_source_file ON qc_entries(source_file);
 CREATE INDEX IF NOT EXISTS idx_qc_asana_task ON qc_entries(asana_task_gid);
 
+-- Natural keys: ingest upserts on these (INSERT ... ON CONFLICT DO UPDATE).
+-- Excel rows are keyed by workbook and sheet row; data_source is left out
+-- because a template reclassification can move a sheet between excel_v1
+-- and excel_v2. Direct input rows are keyed by their source database ID.
+-- NULLs never conflict, so rows without a key (e.g. migrated from an old
+-- qc_sheets.db) are simply inserted.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_qc_excel_row ON qc_entries(source_file, source_row);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_qc_source_entry ON qc_entries(data_source, source_entry_id);
+
 CREATE INDEX IF NOT EXISTS idx_metadata_source ON qc_source_metadata(data_source);
 CREATE INDEX IF NOT EXISTS idx_metadata_file ON qc_source_metadata(source_file);
 CREATE INDEX IF NOT EXISTS idx_metadata_batch ON qc_source_metadata(import_batch_id);
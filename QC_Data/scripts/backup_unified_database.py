@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Unified QC Database Backup
+Takes consistent snapshots of qc_unified.db while it is in use and prunes
+old ones.
+
+Snapshots are made with SQLite's online backup API, a slice of pages per
+step with a short pause between steps, so the web app can keep writing.
+The slice size grows with the database so a backup always takes about
+BACKUP_TARGET_STEPS steps. A write between steps makes SQLite restart the
+copy; after BACKUP_MAX_RESTARTS restarts the rest is copied in one step,
+which keeps the run time bounded. Each snapshot is written to a .partial
+file, checked with PRAGMA integrity_check and only then renamed to
+qc_unified.db.backup_YYYYMMDD_HHMMSS. Retention keeps the newest snapshot
+of each of the last KEEP_DAILY days and KEEP_WEEKLY weeks; files with other
+names (e.g. .backup_pre_fix) are never pruned.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from urllib.request import pathname2url
+
+# Configuration
+UNIFIED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_unified.db"
+
+BACKUP_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+# The page slice per step is sized for roughly this many steps, but never
+# below BACKUP_MIN_PAGES_PER_STEP
+BACKUP_TARGET_STEPS = 100
+BACKUP_MIN_PAGES_PER_STEP = 256
+
+# Seconds the source database is left unlocked between steps
+BACKUP_STEP_SLEEP = 0.02
+
+# Restarts (caused by writes to the source) tolerated before the remaining
+# pages are copied in a single step
+BACKUP_MAX_RESTARTS = 3
+
+# Default retention
+KEEP_DAILY = 7
+KEEP_WEEKLY = 4
+
+
+class BackupRestarted(Exception):
+    """Raised from the progress callback to stop a backup that keeps restarting."""
+
+
+def backup_path_for(db_path, backup_dir=None, when=None):
+    """Return the snapshot path for db_path taken at when (default: now)."""
+    when = when or datetime.now()
+    directory = backup_dir or os.path.dirname(os.path.abspath(db_path))
+    return os.path.join(directory, f"{os.path.basename(db_path)}.backup_{when.strftime(BACKUP_TIMESTAMP_FORMAT)}")
+
+
+def open_read_only(db_path):
+    """Open an existing database read-only, without creating it if missing."""
+    return sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+
+
+def pages_per_step(page_count):
+    """Backup slice size for a database of page_count pages."""
+    return max(BACKUP_MIN_PAGES_PER_STEP, -(-page_count // BACKUP_TARGET_STEPS))
+
+
+def copy_database(source, target):
+    """
+    Copy source into target with the online backup API in page-stepped increments.
+
+    Returns a dict with the page count, pages per step, steps taken and how
+    many times the copy restarted because the source was written to.
+    """
+    page_count = source.execute("PRAGMA page_count").fetchone()[0]
+    stats = {'pages': page_count, 'pages_per_step': pages_per_step(page_count), 'steps': 0, 'restarts': 0}
+    last_remaining = [None]
+
+    def progress(status, remaining, total):
+        stats['steps'] += 1
+        stats['pages'] = total
+        # Remaining pages only go up when SQLite started over
+        if last_remaining[0] is not None and remaining > last_remaining[0]:
+            stats['restarts'] += 1
+            if stats['restarts'] > BACKUP_MAX_RESTARTS:
+                raise BackupRestarted()
+        last_remaining[0] = remaining
+
+    try:
+        source.backup(target, pages=stats['pages_per_step'], progress=progress, sleep=BACKUP_STEP_SLEEP)
+    except BackupRestarted:
+        # Busy database: finish with one step, holding a read lock for its duration
+        source.backup(target, pages=-1)
+        stats['steps'] += 1
+    return stats
+
+
+def verify_snapshot(backup_path):
+    """Run PRAGMA integrity_check on a snapshot; returns the problems found (empty if ok)."""
+    conn = open_read_only(backup_path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows if row[0] != 'ok']
+
+
+def snapshot_database(db_path, backup_path):
+    """
+    Write a verified snapshot of db_path to backup_path.
+
+    The copy goes to backup_path + '.partial' and is renamed into place only
+    after integrity_check passes. Returns the copy_database stats plus
+    'seconds'; raises RuntimeError (leaving no file behind) if the snapshot
+    fails verification.
+    """
+    start = time.perf_counter()
+    partial_path = backup_path + '.partial'
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+
+    source = open_read_only(db_path)
+    target = sqlite3.connect(partial_path)
+    try:
+        stats = copy_database(source, target)
+    finally:
+        target.close()
+        source.close()
+
+    problems = verify_snapshot(partial_path)
+    if problems:
+        os.remove(partial_path)
+        raise RuntimeError(f"snapshot failed integrity_check: {problems[0]}")
+    os.replace(partial_path, backup_path)
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def list_backups(db_path, backup_dir=None):
+    """Return (taken_at, path) for the timestamped snapshots of db_path, newest first."""
+    directory = backup_dir or os.path.dirname(os.path.abspath(db_path))
+    pattern = re.compile(re.escape(os.path.basename(db_path)) + r'\.backup_(\d{8}_\d{6})$')
+    backups = []
+    for filename in os.listdir(directory):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        try:
+            taken_at = datetime.strptime(match.group(1), BACKUP_TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        backups.append((taken_at, os.path.join(directory, filename)))
+    return sorted(backups, reverse=True)
+
+
+def select_backups_to_keep(backups, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY):
+    """
+    Pick the snapshots retention keeps from (taken_at, path) pairs, newest first.
+
+    The newest snapshot of each of the keep_daily most recent days that have
+    one is kept, likewise for the keep_weekly most recent ISO weeks.
+    """
+    keep = set()
+    for period_of, limit in ((lambda taken_at: taken_at.date(), keep_daily),
+                             (lambda taken_at: taken_at.isocalendar()[:2], keep_weekly)):
+        seen = set()
+        for taken_at, path in backups:
+            period = period_of(taken_at)
+            if period in seen:
+                continue
+            if len(seen) >= limit:
+                break
+            seen.add(period)
+            keep.add(path)
+    return keep
+
+
+def prune_backups(db_path, backup_dir=None, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY):
+    """Delete snapshots outside the retention policy; returns the removed paths."""
+    backups = list_backups(db_path, backup_dir)
+    keep = select_backups_to_keep(backups, keep_daily, keep_weekly)
+    removed = []
+    for _, path in backups:
+        if path not in keep:
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def backup_unified_database(db_path=None, backup_dir=None, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY,
+                            prune=True):
+    """Snapshot the unified database and apply retention; returns the snapshot path."""
+    db_path = db_path or UNIFIED_DB_PATH
+    backup_path = backup_path_for(db_path, backup_dir)
+    stats = snapshot_database(db_path, backup_path)
+    print(f"✅ Snapshot written to {backup_path}")
+    print(f"   {stats['pages']:,} pages in {stats['steps']} steps of {stats['pages_per_step']:,} "
+          f"({stats['restarts']} restarts), {stats['seconds']}s, integrity_check ok")
+
+    if prune:
+        removed = prune_backups(db_path, backup_dir, keep_daily, keep_weekly)
+        for path in removed:
+            print(f"   🗑️  Pruned {os.path.basename(path)}")
+        print(f"   Keeping {len(list_backups(db_path, backup_dir))} snapshots "
+              f"(newest per day for {keep_daily} days, per week for {keep_weekly} weeks)")
+    return backup_path
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Back up the unified QC database with the SQLite online backup API.")
+    parser.add_argument('--db', default=UNIFIED_DB_PATH, help="Database to back up (default: the unified database)")
+    parser.add_argument('--backup-dir', help="Directory for snapshots (default: next to the database)")
+    parser.add_argument('--keep-daily', type=int, default=KEEP_DAILY,
+                        help=f"Days to keep the newest snapshot of (default: {KEEP_DAILY})")
+    parser.add_argument('--keep-weekly', type=int, default=KEEP_WEEKLY,
+                        help=f"Weeks to keep the newest snapshot of (default: {KEEP_WEEKLY})")
+    parser.add_argument('--no-prune', action='store_true', help="Take a snapshot without applying retention")
+    parser.add_argument('--prune-only', action='store_true', help="Apply retention without taking a snapshot")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to back up the unified database."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("Unified QC Database Backup")
+    print("=" * 60)
+
+    if args.prune_only:
+        removed = prune_backups(args.db, args.backup_dir, args.keep_daily, args.keep_weekly)
+        print(f"✅ Pruned {len(removed)} snapshots")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return
+
+    try:
+        backup_unified_database(args.db, args.backup_dir, args.keep_daily, args.keep_weekly,
+                                prune=not args.no_prune)
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"❌ Backup failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
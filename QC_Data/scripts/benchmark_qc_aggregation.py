@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+SDP QC Aggregation Benchmark
+Times the operator x date minutes matrix the time comparison reports build,
+computed three ways on the same qc_sheets.db:
+
+  python_loop   every row fetched, the operator resolved and the unit rule
+                applied in Python, summed into nested defaultdicts (the
+                reports before qc_sql_functions)
+  sql_raw       GROUP BY operator_alias(operator), entry_date in SQLite,
+                minutes derived from the raw columns by time_minutes()
+  sql_stored    the same GROUP BY over the stored *_minutes columns
+                (skipped on databases built before they existed)
+
+All paths must produce the same, non-empty matrix; the benchmark fails
+otherwise, and when fewer than MIN_RESOLVED_FRACTION of the rows have an
+operator that resolves.
+The database is opened read-only.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import time
+from collections import defaultdict
+from urllib.request import pathname2url
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+REPEATS = 3
+
+# Minutes difference tolerated between paths (float summation order)
+TOLERANCE = 1e-6
+
+# Share of the rows whose operator must resolve for the comparison to count
+# (an unresolvable mapping would leave every path with the same empty matrix)
+MIN_RESOLVED_FRACTION = 0.5
+
+# Rows the reports consider
+ENTRY_FILTER = """
+    entry_date IS NOT NULL
+    AND entry_date > '2000-01-01'
+    AND entry_date < '2100-01-01'
+    AND operator IS NOT NULL AND operator != ''
+"""
+
+PATHS = ('python_loop', 'sql_raw', 'sql_stored')
+
+
+def open_database(db_path):
+    """Open db_path read-only with the QC SQL functions registered."""
+    from qc_sql_functions import connect
+    return connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+
+
+def has_stored_minutes(conn):
+    """True if qc_entries has the normalised minutes columns."""
+    from qc_time_units import TIME_MINUTES_COLUMNS
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(qc_entries)")}
+    return all(column in columns for column in TIME_MINUTES_COLUMNS)
+
+
+def python_loop(conn):
+    """Operator x date minutes, aggregated in Python."""
+    from qc_operator_resolver import resolve_operator
+    from qc_time_units import normalize_time_to_minutes
+    matrix = defaultdict(lambda: defaultdict(float))
+    for date, operator, total_time, process_time in conn.execute(f"""
+        SELECT entry_date, operator, total_time, process_time
+        FROM qc_entries WHERE {ENTRY_FILTER}
+    """):
+        raw_time = total_time if total_time else process_time
+        minutes = normalize_time_to_minutes(raw_time)
+        if minutes:
+            canonical = resolve_operator(operator)
+            if canonical:
+                matrix[canonical][date] += minutes
+    return matrix
+
+
+def sql_matrix(conn, minutes_expr):
+    """
+    Operator x date minutes, aggregated by SQLite over minutes_expr.
+
+    Rows are summed per raw operator spelling first, so operator_alias()
+    runs once per (operator, date) pair rather than once per row.
+    """
+    matrix = defaultdict(dict)
+    for canonical, date, minutes in conn.execute(f"""
+        SELECT operator_alias(operator) AS canonical_operator, entry_date, SUM(minutes)
+        FROM (
+            SELECT operator, entry_date, SUM({minutes_expr}) AS minutes
+            FROM qc_entries
+            WHERE {ENTRY_FILTER}
+            GROUP BY operator, entry_date
+            HAVING minutes IS NOT NULL
+        )
+        GROUP BY canonical_operator, entry_date
+        HAVING canonical_operator IS NOT NULL
+    """):
+        matrix[canonical][date] = minutes
+    return matrix
+
+
+def sql_raw(conn):
+    """Operator x date minutes from the raw time columns, via time_minutes()."""
+    return sql_matrix(conn, "time_minutes(CASE WHEN total_time THEN total_time ELSE process_time END)")
+
+
+def sql_stored(conn):
+    """Operator x date minutes from the stored minutes columns."""
+    from qc_time_units import ENTRY_MINUTES_SQL
+    return sql_matrix(conn, ENTRY_MINUTES_SQL)
+
+
+def flatten(matrix):
+    """{(operator, date): minutes} for a nested matrix."""
+    return {(operator, date): minutes for operator, dates in matrix.items() for date, minutes in dates.items()}
+
+
+def matrices_match(expected, actual):
+    """True if two flattened matrices have the same cells and minutes."""
+    return (expected.keys() == actual.keys()
+            and all(abs(expected[cell] - actual[cell]) <= TOLERANCE for cell in expected))
+
+
+def time_path(db_path, path, repeats):
+    """Run one path repeats times on fresh connections; returns (timings in ms, flattened matrix)."""
+    function = globals()[path]
+    timings = []
+    result = None
+    for _ in range(repeats):
+        conn = open_database(db_path)
+        try:
+            start = time.perf_counter()
+            result = function(conn)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            conn.close()
+    return timings, flatten(result)
+
+
+def run_benchmark(db_path, repeats=REPEATS):
+    """Time every path on db_path; returns a dict of results keyed by path."""
+    conn = open_database(db_path)
+    try:
+        rows = conn.execute(f"SELECT COUNT(*) FROM qc_entries WHERE {ENTRY_FILTER}").fetchone()[0]
+        resolved = conn.execute(f"""
+            SELECT COALESCE(SUM(entries), 0) FROM (
+                SELECT operator, COUNT(*) AS entries FROM qc_entries
+                WHERE {ENTRY_FILTER} GROUP BY operator
+            )
+            WHERE operator_alias(operator) IS NOT NULL
+        """).fetchone()[0]
+        paths = [path for path in PATHS if path != 'sql_stored' or has_stored_minutes(conn)]
+    finally:
+        conn.close()
+
+    if resolved < rows * MIN_RESOLVED_FRACTION:
+        raise RuntimeError(f"Only {resolved:,} of {rows:,} rows have an operator that resolves; "
+                           "check that operator_mapping is importable")
+
+    results = {'db': db_path, 'rows': rows, 'resolved_rows': resolved, 'repeats': repeats, 'paths': {}}
+    baseline = None
+    for path in paths:
+        timings, matrix = time_path(db_path, path, repeats)
+        if baseline is None:
+            if not matrix:
+                raise RuntimeError(f"{path} produced an empty matrix; nothing to compare")
+            baseline = matrix
+        elif not matrices_match(baseline, matrix):
+            raise RuntimeError(f"{path} does not match {paths[0]}")
+        results['paths'][path] = {
+            'median_ms': round(statistics.median(timings), 1),
+            'min_ms': round(min(timings), 1),
+            'cells': len(matrix),
+        }
+    base_ms = results['paths'][paths[0]]['median_ms']
+    for stats in results['paths'].values():
+        stats['speedup'] = round(base_ms / stats['median_ms'], 2) if stats['median_ms'] else None
+    return results
+
+
+def print_report(results):
+    """Print the benchmark results as a table."""
+    print(f"Database: {results['db']}")
+    print(f"Rows aggregated: {results['rows']:,}, {results['resolved_rows']:,} with a resolved operator "
+          f"(median of {results['repeats']} runs)")
+    print(f"\n{'Path':<14} {'Median ms':>10} {'Min ms':>10} {'Cells':>8} {'Speedup':>8}")
+    print("-" * 54)
+    for path, stats in results['paths'].items():
+        print(f"{path:<14} {stats['median_ms']:>10.1f} {stats['min_ms']:>10.1f} "
+              f"{stats['cells']:>8,} {stats['speedup']:>7.2f}x")
+    if 'sql_stored' not in results['paths']:
+        print("\n⚠️  No stored minutes columns; run qc_time_units.py to include sql_stored")
+    print("\n✅ All paths produced the same operator x date matrix")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare Python-loop and SQL-function aggregation of QC minutes on the same database.")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--repeats', type=int, default=REPEATS,
+                        help=f"Runs per path, the median is reported (default: {REPEATS})")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to run the aggregation benchmark."""
+    args = parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return
+
+    try:
+        results = run_benchmark(args.db, max(1, args.repeats))
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"❌ Benchmark failed: {e}")
+        return
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("SDP QC Aggregation Benchmark")
+    print("=" * 60)
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
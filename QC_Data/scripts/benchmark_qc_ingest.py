@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+SDP QC Ingest Benchmark
+Times the QC sheet ingest pipeline on synthetic workbooks and keeps a JSON
+history of the results so regressions show up between runs.
+
+Stages, each run in a fresh process so its peak RSS is its own:
+  generate       write the synthetic workbooks (generate_qc_workbooks)
+  extract        decode every sheet with extract_excel_file, no database
+  parse_excel    parse_excel_file into an empty qc_sheets.db, one file at a time
+  build_qc       build_qc_database end to end
+  build_unified  build_unified_qc_database Phase 2 into an empty qc_unified.db
+  cached_rebuild the same again, replaying rows from the row cache
+
+Each stage reports seconds, rows/sec, the stage process's peak RSS and
+the largest peak RSS of its worker processes.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reports',
+                            'ingest_benchmark_history.json')
+
+STAGES = ('generate', 'extract', 'parse_excel', 'build_qc', 'build_unified', 'cached_rebuild')
+
+# Rows/sec drop (vs. the last run with the same parameters) reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+def peak_rss_mb(who):
+    """Peak resident set size in MB of this process (RUSAGE_SELF) or its children."""
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def count_entries(db_path):
+    """Count qc_entries rows in a database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM qc_entries").fetchone()[0]
+    finally:
+        conn.close()
+
+def fresh_path(path):
+    """Remove a file left by an earlier run in the same work directory and return its path."""
+    if os.path.exists(path):
+        os.remove(path)
+    return path
+
+def workbook_paths(params, work_dir):
+    """Paths of the generated workbooks, in generation order."""
+    from generate_qc_workbooks import workbook_filename
+    return [os.path.join(work_dir, 'forms', workbook_filename(index, params['seed']))
+            for index in range(params['sheets'])]
+
+def run_generate(params, work_dir):
+    """Write the synthetic workbooks into an emptied work_dir/forms."""
+    from generate_qc_workbooks import generate_workbooks
+    forms_dir = os.path.join(work_dir, 'forms')
+    shutil.rmtree(forms_dir, ignore_errors=True)
+    _, rows = generate_workbooks(forms_dir, params['sheets'], params['seed'],
+                                 params['min_rows'], params['max_rows'], params['v2_share'],
+                                 params['workers'])
+    return rows
+
+def run_extract(params, work_dir):
+    """Decode every workbook without writing anything."""
+    from build_qc_database import iter_extracted_files
+    rows = 0
+    for result in iter_extracted_files(workbook_paths(params, work_dir), params['workers'], params['reader']):
+        rows += sum(1 for _ in result['entries'])
+    return rows
+
+def run_parse_excel(params, work_dir):
+    """Import every workbook with parse_excel_file into a fresh qc_sheets.db."""
+    from build_qc_database import create_database_schema, parse_excel_file
+    conn = sqlite3.connect(fresh_path(os.path.join(work_dir, 'parse_excel.db')))
+    create_database_schema(conn)
+    rows = 0
+    for file_path in workbook_paths(params, work_dir):
+        inserted, _ = parse_excel_file(file_path, conn, params['reader'])
+        rows += inserted
+    conn.close()
+    return rows
+
+def run_build_qc(params, work_dir):
+    """Run build_qc_database.main against the generated forms."""
+    import build_qc_database
+    build_qc_database.QC_FORMS_DIR = os.path.join(work_dir, 'forms')
+    build_qc_database.DB_PATH = fresh_path(os.path.join(work_dir, 'qc_sheets.db'))
+    argv = ['--workers', str(params['workers']), '--reader', params['reader']]
+    if params['bulk']:
+        argv.append('--bulk')
+    build_qc_database.main(argv)
+    return count_entries(build_qc_database.DB_PATH)
+
+def run_build_unified(params, work_dir, use_cached_rows=False):
+    """Run the unified builder's Excel phase into a fresh qc_unified.db."""
+    import build_unified_qc_database as unified
+    unified.QC_FORMS_DIR = os.path.join(work_dir, 'forms')
+    unified.UNIFIED_DB_PATH = fresh_path(os.path.join(work_dir, 'qc_unified.db'))
+    unified.ROW_CACHE_PATH = os.path.join(work_dir, 'qc_row_cache.db')
+    if not use_cached_rows:
+        fresh_path(unified.ROW_CACHE_PATH)
+    conn = sqlite3.connect(unified.UNIFIED_DB_PATH)
+    unified.create_unified_schema(conn)
+    conn.close()
+    unified.migrate_excel_data(workers=params['workers'], bulk=params['bulk'], reader=params['reader'])
+    return count_entries(unified.UNIFIED_DB_PATH)
+
+STAGE_RUNNERS = {
+    'generate': run_generate,
+    'extract': run_extract,
+    'parse_excel': run_parse_excel,
+    'build_qc': run_build_qc,
+    'build_unified': run_build_unified,
+    'cached_rebuild': lambda params, work_dir: run_build_unified(params, work_dir, use_cached_rows=True),
+}
+
+def stage_process(stage, params, work_dir, verbose, pipe):
+    """Child process body: run one stage and send its measurements back."""
+    try:
+        with open(os.devnull, 'w') as devnull:
+            with contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+                start = time.perf_counter()
+                rows = STAGE_RUNNERS[stage](params, work_dir)
+                seconds = time.perf_counter() - start
+        pipe.send({
+            'seconds': round(seconds, 3),
+            'rows': rows,
+            'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+            'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF),
+            'worker_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+        })
+    except Exception as e:
+        pipe.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        pipe.close()
+
+def run_stage(stage, params, work_dir, verbose=False):
+    """Run one stage in a fresh process and return its measurements."""
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=stage_process, args=(stage, params, work_dir, verbose, sender))
+    process.start()
+    sender.close()
+    try:
+        measurements = receiver.recv()
+    except EOFError:
+        measurements = {'error': "stage process exited without reporting"}
+    process.join()
+    return measurements
+
+def git_revision():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+def load_history(path):
+    """Load the benchmark history (a list of runs), or an empty list."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_history(path, history):
+    """Write the benchmark history, replacing the file atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+def previous_run(history, params):
+    """Most recent run in history with the same parameters, or None."""
+    for run in reversed(history):
+        if run.get('params') == params:
+            return run
+    return None
+
+def print_results(run, baseline):
+    """Print the stage table, with the change in rows/sec against baseline."""
+    print(f"\n{'Stage':<16}{'Seconds':>10}{'Rows':>10}{'Rows/sec':>12}{'RSS MB':>9}{'Workers MB':>12}  vs. last")
+    print("-" * 82)
+    regressions = []
+    for stage, result in run['stages'].items():
+        if 'error' in result:
+            print(f"{stage:<16}❌ {result['error']}")
+            continue
+        change = ''
+        previous = (baseline or {}).get('stages', {}).get(stage, {})
+        if previous.get('rows_per_sec') and result['rows_per_sec']:
+            delta = result['rows_per_sec'] / previous['rows_per_sec'] - 1
+            change = f"{delta:+.1%}"
+            if delta < -REGRESSION_THRESHOLD:
+                change += " ⚠️"
+                regressions.append(stage)
+        print(f"{stage:<16}{result['seconds']:>10.2f}{result['rows']:>10,}{result['rows_per_sec'] or 0:>12,.0f}"
+              f"{result['peak_rss_mb']:>9.1f}{result['worker_peak_rss_mb']:>12.1f}  {change}")
+    if baseline:
+        print(f"\nCompared with run of {baseline['timestamp']} ({baseline.get('git_revision') or 'unknown revision'})")
+        if regressions:
+            print(f"⚠️  Slower by more than {REGRESSION_THRESHOLD:.0%}: {', '.join(regressions)}")
+    else:
+        print("\nNo earlier run with these parameters to compare with")
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark QC sheet ingest on synthetic workbooks.")
+    parser.add_argument('--sheets', '-n', type=int, default=200,
+                        help="Number of synthetic workbooks (default: 200)")
+    parser.add_argument('--min-rows', type=int, default=5, help="Minimum data rows per sheet (default: 5)")
+    parser.add_argument('--max-rows', type=int, default=60, help="Maximum data rows per sheet (default: 60)")
+    parser.add_argument('--v2-share', type=float, default=0.5,
+                        help="Fraction of sheets using the v2 layout (default: 0.5)")
+    parser.add_argument('--seed', type=int, default=0, help="Generator seed (default: 0)")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Worker processes for generating and parsing (default: 1)")
+    parser.add_argument('--reader', choices=('openpyxl', 'xml'), default='openpyxl',
+                        help="Sheet reader passed to the builders (default: openpyxl)")
+    parser.add_argument('--bulk', action='store_true', help="Run the builders in bulk-load mode")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help="Stages to run (generate always runs first)")
+    parser.add_argument('--label', help="Free-text note stored with the run, e.g. the change being measured")
+    parser.add_argument('--history', default=HISTORY_PATH,
+                        help="JSON history file (default: QC_Data/reports/ingest_benchmark_history.json)")
+    parser.add_argument('--no-history', action='store_true', help="Do not record this run")
+    parser.add_argument('--work-dir', help="Directory for workbooks and databases (default: a temp dir)")
+    parser.add_argument('--keep', action='store_true', help="Keep the work directory afterwards")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Show the builders' own output")
+    return parser.parse_args(argv)
+
+def main():
+    """Main function to run the ingest benchmark."""
+    args = parse_args()
+    params = {
+        'sheets': args.sheets,
+        'min_rows': args.min_rows,
+        'max_rows': args.max_rows,
+        'v2_share': args.v2_share,
+        'seed': args.seed,
+        'workers': args.workers,
+        'reader': args.reader,
+        'bulk': args.bulk,
+    }
+    stages = ['generate'] + [stage for stage in STAGES if stage in args.stages and stage != 'generate']
+    if 'cached_rebuild' in stages and 'build_unified' not in stages:
+        # The cached rebuild replays the row cache written by build_unified
+        stages.insert(stages.index('cached_rebuild'), 'build_unified')
+
+    print("=" * 60)
+    print("SDP QC Ingest Benchmark")
+    print("=" * 60)
+    print(f"{args.sheets:,} sheets, {args.min_rows}-{args.max_rows} rows each, "
+          f"reader={args.reader}, workers={args.workers}{', bulk' if args.bulk else ''}")
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='qc_ingest_benchmark_')
+    os.makedirs(work_dir, exist_ok=True)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'label': args.label,
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'params': params,
+        'stages': {},
+    }
+    try:
+        for stage in stages:
+            print(f"⏱️  {stage}...")
+            run['stages'][stage] = run_stage(stage, params, work_dir, args.verbose)
+            if 'error' in run['stages'][stage] and stage == 'generate':
+                break
+    finally:
+        if args.keep:
+            print(f"\nWork directory kept: {work_dir}")
+        elif not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    history = load_history(args.history)
+    print_results(run, previous_run(history, params))
+    if not args.no_history:
+        history.append(run)
+        save_history(args.history, history)
+        print(f"\n✅ Recorded run {len(history)} in {os.path.normpath(args.history)}")
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,96 @@ Parses all QC Sheet Excel files and imports them into a SQLite database.
 import sqlite3
 import os
 import glob
+import argparse
+import hashlib
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from qc_bulk_load import bulk_load, DEFAULT_TRANSACTION_SIZE
+from qc_xlsx_reader import open_sheet_rows as open_xlsx_sheet_rows
+from qc_time_units import TIME_MINUTES_COLUMNS, time_minutes_values, ensure_time_minutes
+from qc_operator_days import ensure_operator_day_minutes, resolve_operator_canonical
+from qc_operator_resolver import ensure_operator_canonical, get_alias_map, resolve_operator
+from qc_entry_operators import ensure_entry_operators, link_file_entries
 from pathlib import Path
 from datetime import datetime, date, time, timedelta
 import openpyxl
 from openpyxl.utils import get_column_letter
 from openpyxl.utils.datetime import from_excel
 import re
+from collections import Counter, deque
 
 # Configuration
 QC_FORMS_DIR = "/mnt/nvme2/SDP/QC-Data"
 DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
 
+# Text DATE cells accept these formats, in this order of precedence, after
+# the time part is dropped: %Y-%m-%d, %m/%d/%Y, %d/%m/%Y, %Y/%m/%d,
+# %m-%d-%Y, %d-%m-%Y. Each shape lists the (year, month, day) positions of
+# its captured fields for every format it can match, in precedence order.
+DATE_STRING_SHAPES = [
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})$'), [(0, 1, 2)]),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})$'), [(2, 0, 1), (2, 1, 0)]),
+    (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})$'), [(0, 1, 2)]),
+    (re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})$'), [(2, 0, 1), (2, 1, 0)]),
+]
+
+# Excel serial dates (1900 date system) and the serial range covering
+# 2000-01-01 through 2100-12-31, the window accepted for QC sheet dates
+EXCEL_EPOCH = date(1899, 12, 30)
+EXCEL_SERIAL_MIN = (date(2000, 1, 1) - EXCEL_EPOCH).days
+EXCEL_SERIAL_MAX = (date(2101, 1, 1) - EXCEL_EPOCH).days
+
+# Bump whenever sheet decoding changes (header matching, converters, date
+# rules) so cached rows from older parsers are not replayed
+PARSER_VERSION = 2
+
+# Sheet readers selectable with --reader: openpyxl, or the standard-library
+# XML reader in qc_xlsx_reader (which falls back to openpyxl when needed)
+SHEET_READERS = ('openpyxl', 'xml')
+
+# Workbooks submitted to the parse pool per worker ahead of the writer; each
+# finished result holds a whole workbook's entries until it is written
+PARSE_AHEAD_PER_WORKER = 2
+
+# Decoded serial DATE cells, shared by every file parsed in this process
+_SERIAL_DATE_MEMO = {}
+
+# Columns added to qc_files after it was first created, with their types
+QC_FILES_ADDED_COLUMNS = {
+    'content_hash': 'TEXT',
+    'rows_hash': 'TEXT',
+    'duplicate_of': 'TEXT',
+    'template': 'TEXT',
+}
+
+# Columns added to qc_entries after it was first created, with their types.
+# The unified database's qc_entries gains the same ones.
+QC_ENTRIES_ADDED_COLUMNS = {
+    'source_row': 'INTEGER',
+}
+
+def ensure_qc_entries_columns(conn):
+    """Add qc_entries columns missing from databases built by older versions (no-op if the table is new)."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(qc_entries)")
+    entry_columns = {row[1] for row in cursor.fetchall()}
+    if not entry_columns:
+        return
+    for column, column_type in QC_ENTRIES_ADDED_COLUMNS.items():
+        if column not in entry_columns:
+            cursor.execute(f"ALTER TABLE qc_entries ADD COLUMN {column} {column_type}")
+
+def ensure_qc_files_columns(conn):
+    """Add qc_files columns (and their indexes) missing from databases built by older versions."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(qc_files)")
+    file_columns = {row[1] for row in cursor.fetchall()}
+    for column, column_type in QC_FILES_ADDED_COLUMNS.items():
+        if column not in file_columns:
+            cursor.execute(f"ALTER TABLE qc_files ADD COLUMN {column} {column_type}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_qc_files_content_hash ON qc_files(content_hash)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_qc_files_rows_hash ON qc_files(rows_hash)")
+
 def create_database_schema(conn):
     """Create the SQLite database schema for QC sheets."""
     cursor = conn.cursor()
@@ -27,15 +106,21 @@ def create_database_schema(conn):
         CREATE TABLE IF NOT EXISTS qc_entries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             source_file TEXT NOT NULL,
+            source_row INTEGER,
             work_order TEXT,
             customer_name TEXT,
             entry_date DATE,
             operator TEXT,
+            operator_canonical TEXT,
             part_name TEXT,
             start_time TIME,
             finish_time TIME,
             process_time REAL,
             total_time REAL,
+            process_time_minutes REAL,
+            process_time_unit TEXT,
+            total_time_minutes REAL,
+            total_time_unit TEXT,
             material TEXT,
             material_size TEXT,
             total_parts INTEGER,
@@ -60,9 +145,19 @@ def create_database_schema(conn):
             total_entries INTEGER DEFAULT 0,
             imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             import_status TEXT DEFAULT 'success',
-            error_message TEXT
+            error_message TEXT,
+            content_hash TEXT,
+            rows_hash TEXT,
+            duplicate_of TEXT,
+            template TEXT
         )
     """)
+    ensure_qc_entries_columns(conn)
+    ensure_qc_files_columns(conn)
+    ensure_time_minutes(conn)
+    ensure_operator_day_minutes(conn)
+    ensure_operator_canonical(conn)
+    ensure_entry_operators(conn)
     
     # Create indexes for common queries
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_entry_date ON qc_entries(entry_date)")
@@ -141,77 +236,298 @@ def parse_yield_status(yield_value):
     
     return yield_str, None, None
 
-def parse_excel_file(file_path, conn):
-    """Parse a single Excel file and import its data."""
-    cursor = conn.cursor()
-    filename = os.path.basename(file_path)
+def find_header_row(rows):
+    """
+    Advance a sheet's row iterator past the header row.
     
-    try:
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        ws = wb.active
-        
-        # Get file metadata
-        file_stat = os.stat(file_path)
-        file_info = parse_filename(filename)
+    Returns (header_row_idx, headers, width) where headers maps each
+    upper-cased header to its column position.
+    """
+    for row_idx, row in enumerate(rows, 1):
+        if not any(cell for cell in row):
+            continue
         
-        # Find header row
-        header_row_idx = None
-        headers = {}
+        # Check if this looks like a header row
+        row_str = ' '.join(str(cell).upper() if cell else '' for cell in row[:15])
+        if 'DATE' in row_str and 'OPERATOR' in row_str:
+            # Map headers
+            headers = {}
+            for col_idx, header in enumerate(row):
+                if header:
+                    header_clean = str(header).strip().upper()
+                    headers[header_clean] = col_idx
+            return row_idx, headers, len(row)
+    
+    raise ValueError("Could not find header row")
+
+def open_excel_sheet(file_path, reader='openpyxl'):
+    """
+    Open a workbook in read-only mode and locate the header row.
+    
+    Returns (wb, rows, header_row_idx, headers, width, reader_used) where
+    rows is the sheet's row iterator positioned just after the header, so
+    the data rows are decoded in the same single pass that found the header.
+    The caller owns wb and must close it. With reader='xml' the sheet is
+    read by qc_xlsx_reader; any workbook it cannot open falls back to
+    openpyxl, and reader_used says which reader was used.
+    """
+    if reader == 'xml':
+        archive = None
+        try:
+            archive, rows = open_xlsx_sheet_rows(file_path)
+            return (archive, rows) + find_header_row(rows) + ('xml',)
+        except Exception:
+            if archive is not None:
+                archive.close()
+    
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        return (wb, rows) + find_header_row(rows) + ('openpyxl',)
+    except Exception:
+        wb.close()
+        raise
+
+def new_date_stats():
+    """Return an empty counter of how many DATE cells took each decoding path."""
+    return Counter()
+
+def convert_serial_date(value):
+    """Convert an Excel serial (or Unix timestamp) DATE cell to a date, or None."""
+    # Integer serials inside the 2000-2100 window are plain day offsets
+    # (exactly what from_excel returns for them), so skip the float maths
+    if (isinstance(value, int) or value.is_integer()) and EXCEL_SERIAL_MIN <= value < EXCEL_SERIAL_MAX:
+        return EXCEL_EPOCH + timedelta(days=int(value)), 'serial'
+    
+    try:
+        # Use openpyxl's built-in conversion which handles Excel's date system correctly
+        # (accounts for Excel incorrectly treating 1900 as a leap year)
+        excel_datetime = from_excel(value)
+        if isinstance(excel_datetime, datetime):
+            entry_date = excel_datetime.date()
+        elif isinstance(excel_datetime, date):
+            entry_date = excel_datetime
+        else:
+            entry_date = None
         
-        for row_idx, row in enumerate(ws.iter_rows(values_only=True), 1):
-            if not any(cell for cell in row):
+        # Validate the date is reasonable (between 2000 and 2100 for QC sheets)
+        # This filters out obviously wrong dates like 1900 or 2925
+        if entry_date and (entry_date.year < 2000 or entry_date.year > 2100):
+            # Try alternative: maybe it's a Unix timestamp (seconds since 1970)
+            if value > 1000000000:  # Likely Unix timestamp
+                try:
+                    entry_date = datetime.fromtimestamp(value).date()
+                    # Re-validate after timestamp conversion
+                    if entry_date.year < 2000 or entry_date.year > 2100:
+                        return None, 'rejected'
+                    return entry_date, 'unix_timestamp'
+                except:
+                    return None, 'rejected'
+            return None, 'rejected'
+        return entry_date, ('serial' if entry_date else 'rejected')
+    except Exception:
+        return None, 'rejected'
+
+def parse_date_string(date_str, shape_order):
+    """
+    Parse a text date (time part already removed) without raising.
+    
+    Gives the same result as trying DATE_FORMATS in order with strptime:
+    the string is matched against DATE_STRING_SHAPES and each candidate
+    field order is tried in that same precedence (month-first before
+    day-first). shape_order lists shape indexes to try, most likely first.
+    Returns (date or None, index of the matching shape or None).
+    """
+    for shape_idx in shape_order:
+        pattern, field_orders = DATE_STRING_SHAPES[shape_idx]
+        match = pattern.match(date_str)
+        if not match:
+            continue
+        parts = [int(part) for part in match.groups()]
+        for year_pos, month_pos, day_pos in field_orders:
+            try:
+                return date(parts[year_pos], parts[month_pos], parts[day_pos]), shape_idx
+            except ValueError:
                 continue
+        # Shapes are mutually exclusive, so no other shape can match
+        return None, shape_idx
+    return None, None
+
+def make_date_converter(stats):
+    """
+    Return a DATE cell converter for one file.
+    
+    The converter remembers which string shape last matched in this file
+    and tries it first, memoises repeated string values, and resolves
+    Excel serials through a process-wide memo. Every cell is counted in
+    stats under the path it took (datetime, date, serial, unix_timestamp,
+    string, string_cached, rejected).
+    """
+    string_memo = {}
+    shape_order = list(range(len(DATE_STRING_SHAPES)))
+    
+    def convert_date(value):
+        """Convert a DATE cell (datetime, date, Excel serial or string) to a date, or None."""
+        if isinstance(value, datetime):
+            stats['datetime'] += 1
+            return value.date()
+        if isinstance(value, date):
+            stats['date'] += 1
+            return value
+        if isinstance(value, (int, float)):
+            entry_date, path = _SERIAL_DATE_MEMO.get(value) or _SERIAL_DATE_MEMO.setdefault(value, convert_serial_date(value))
+            stats[path] += 1
+            return entry_date
+        if isinstance(value, str) and value.strip():
+            # Handle dates with time components by splitting on space
+            date_str = value.strip()
+            if ' ' in date_str:
+                date_str = date_str.split()[0]  # Take just the date part
+            
+            if date_str in string_memo:
+                entry_date = string_memo[date_str]
+                stats['string_cached' if entry_date else 'rejected'] += 1
+                return entry_date
             
-            # Check if this looks like a header row
-            row_str = ' '.join(str(cell).upper() if cell else '' for cell in row[:15])
-            if 'DATE' in row_str and 'OPERATOR' in row_str:
-                header_row_idx = row_idx
-                # Map headers
-                for col_idx, header in enumerate(row):
-                    if header:
-                        header_clean = str(header).strip().upper()
-                        headers[header_clean] = col_idx
-                break
+            entry_date, shape_idx = parse_date_string(date_str, shape_order)
+            if shape_idx is not None and shape_order[0] != shape_idx:
+                # Per-file format inference: try this file's shape first next time
+                shape_order.remove(shape_idx)
+                shape_order.insert(0, shape_idx)
+            string_memo[date_str] = entry_date
+            stats['string' if entry_date else 'rejected'] += 1
+            return entry_date
+        stats['rejected'] += 1
+        return None
+    
+    return convert_date
+
+def convert_time(value):
+    """Convert a START/FINISH cell to an 'HH:MM:SS' string, or None."""
+    if isinstance(value, time):
+        return value.strftime('%H:%M:%S')
+    if isinstance(value, datetime):
+        return value.time().strftime('%H:%M:%S')
+    return None
+
+def convert_float(value):
+    """Convert a numeric time cell to float; text and zero become None."""
+    return float(value) if value and isinstance(value, (int, float)) else None
+
+def convert_int(value):
+    """Convert a TOTAL PARTS cell to int, or None if it isn't a number."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if value:
+        try:
+            return int(float(str(value)))
+        except:
+            pass
+    return None
+
+def convert_text(value):
+    """Convert a free-text cell to str, or None if empty."""
+    return str(value) if value else None
+
+# Header name -> (entry field, converter) for columns read by exact header
+COLUMN_CONVERTERS = {
+    'PART NAME': ('part_name', convert_text),
+    'START': ('start_time', convert_time),
+    'FINISH': ('finish_time', convert_time),
+    'PROCESS TIME': ('process_time', convert_float),
+    'TOTAL TIME': ('total_time', convert_float),
+    'MATERIAL': ('material', convert_text),
+    'MATERIAL SIZE': ('material_size', convert_text),
+    'TOTAL PARTS': ('total_parts', convert_int),
+    'YIELD': ('yield', parse_yield_status),
+}
+
+# Compiled row decoders keyed by header fingerprint, shared by all sheets
+# built from the same template
+_ROW_DECODER_CACHE = {}
+
+def compile_row_decoder(headers, width):
+    """
+    Resolve a sheet's headers once into a row decoder.
+    
+    Returns a dict with the DATE and OPERATOR column positions, a tuple of
+    (field, column, converter) for the remaining known columns, and the
+    headers that were not recognised or were expected but not found. The
+    result is cached by header fingerprint so sheets sharing a template
+    reuse it.
+    """
+    fingerprint = (tuple(headers.items()), width)
+    decoder = _ROW_DECODER_CACHE.get(fingerprint)
+    if decoder is not None:
+        return decoder
+    
+    # DATE/OPERATOR headers vary ("DATE (mm/dd/yyyy)"), so match by substring
+    date_col_idx = next((col for key, col in headers.items() if 'DATE' in key), 0)
+    operator_col_idx = next((col for key, col in headers.items() if 'OPERATOR' in key), 1)
+    
+    fields = tuple(
+        (field, headers[header], converter)
+        for header, (field, converter) in COLUMN_CONVERTERS.items()
+        if header in headers
+    )
+    
+    unknown_headers = [
+        key for key in headers
+        if key not in COLUMN_CONVERTERS and 'DATE' not in key and 'OPERATOR' not in key
+    ]
+    missing_headers = [header for header in COLUMN_CONVERTERS if header not in headers]
+    
+    decoder = {
+        'date_col': date_col_idx,
+        'operator_col': operator_col_idx if operator_col_idx < width else None,
+        'fields': fields,
+        'unknown_headers': unknown_headers,
+        'missing_headers': missing_headers
+    }
+    _ROW_DECODER_CACHE[fingerprint] = decoder
+    return decoder
+
+def header_fingerprint(headers):
+    """
+    Return a sheet's header layout as a stable string, e.g. "DATE | OPERATOR | PART NAME".
+    
+    Sheets saved from the same QC template share a fingerprint, which the
+    unified builder uses to tell template versions apart.
+    """
+    return ' | '.join(sorted(headers, key=headers.get))
+
+def iter_sheet_entries(wb, rows, header_row_idx, headers, width, filename, file_info, warnings, date_stats):
+    """
+    Yield QC entry dicts for the data rows following the header.
+    
+    Rows are decoded one at a time straight from the read-only sheet, so
+    memory stays bounded regardless of sheet length. Row-level problems are
+    appended to warnings and DATE decoding paths are counted in date_stats.
+    The workbook is closed once the rows are exhausted.
+    """
+    try:
+        convert_date = make_date_converter(date_stats)
+        decoder = compile_row_decoder(headers, width)
+        if decoder['unknown_headers']:
+            warnings.append(f"Ignoring unrecognised headers: {', '.join(decoder['unknown_headers'])}")
+        if decoder['missing_headers']:
+            warnings.append(f"Expected headers not found: {', '.join(decoder['missing_headers'])}")
         
-        if not header_row_idx:
-            raise ValueError("Could not find header row")
+        date_col = decoder['date_col']
+        operator_col = decoder['operator_col']
+        fields = decoder['fields']
         
-        # Parse data rows (skip header row)
-        entries = []
-        all_rows = list(ws.iter_rows(values_only=True))
-        # header_row_idx from enumerate is 1-indexed, but when used as list index it works correctly
-        # because enumerate(iter, 1) numbers items starting at 1, matching their 0-indexed position + 1
-        # So header_row_idx=6 means the 6th item (at list index 5), and we want to start from index 6
-        for i, row in enumerate(all_rows[header_row_idx:], start=header_row_idx + 1):
-            row_idx = i  # 1-indexed row number for error messages
-            # Skip empty rows
-            if not any(cell for cell in row):
-                continue
-            
-            # Check if this is a data row (has date and operator)
-            # Find DATE column (header might be "DATE (mm/dd/yyyy)" or similar)
-            date_col_idx = None
-            for key in headers.keys():
-                if 'DATE' in key:
-                    date_col_idx = headers[key]
-                    break
-            if date_col_idx is None:
-                date_col_idx = 0  # Default to first column
+        for row_idx, row in enumerate(rows, start=header_row_idx + 1):
+            # Rows in read-only mode are only as wide as the sheet dimension
+            # says; pad them so header-based lookups behave like full mode
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
             
-            # Find OPERATOR column
-            operator_col_idx = None
-            for key in headers.keys():
-                if 'OPERATOR' in key:
-                    operator_col_idx = headers[key]
-                    break
-            if operator_col_idx is None:
-                operator_col_idx = 1  # Default to second column
-            
-            if date_col_idx >= len(row):
+            # Skip empty rows
+            if not any(row):
                 continue
             
-            date_val = row[date_col_idx]
-            operator_val = row[operator_col_idx] if operator_col_idx < len(row) else None
+            date_val = row[date_col]
             
             # Require date, but operator can be empty (will be set to None)
             # Check if date_val is None, empty string, or falsy
@@ -220,219 +536,530 @@ def parse_excel_file(file_path, conn):
             
             # Parse row data
             try:
-                entry_date = None
-                if isinstance(date_val, datetime):
-                    entry_date = date_val.date()
-                elif isinstance(date_val, date):
-                    entry_date = date_val
-                elif isinstance(date_val, (int, float)):
-                    # Handle Excel serial number dates
-                    # When openpyxl reads dates with data_only=True, if cells aren't formatted
-                    # as dates in Excel, they're returned as floats (Excel serial numbers)
-                    try:
-                        # Use openpyxl's built-in conversion which handles Excel's date system correctly
-                        # (accounts for Excel incorrectly treating 1900 as a leap year)
-                        excel_datetime = from_excel(date_val)
-                        if isinstance(excel_datetime, datetime):
-                            entry_date = excel_datetime.date()
-                        elif isinstance(excel_datetime, date):
-                            entry_date = excel_datetime
-                        else:
-                            entry_date = None
-                        
-                        # Validate the date is reasonable (between 2000 and 2100 for QC sheets)
-                        # This filters out obviously wrong dates like 1900 or 2925
-                        if entry_date and (entry_date.year < 2000 or entry_date.year > 2100):
-                            # Try alternative: maybe it's a Unix timestamp (seconds since 1970)
-                            if date_val > 1000000000:  # Likely Unix timestamp
-                                try:
-                                    entry_date = datetime.fromtimestamp(date_val).date()
-                                    # Re-validate after timestamp conversion
-                                    if entry_date.year < 2000 or entry_date.year > 2100:
-                                        entry_date = None
-                                except:
-                                    entry_date = None
-                            else:
-                                entry_date = None
-                    except Exception as e:
-                        entry_date = None
-                elif isinstance(date_val, str) and date_val.strip():
-                    # Try to parse date string
-                    # Handle dates with time components by splitting on space
-                    date_str = date_val.strip()
-                    if ' ' in date_str:
-                        date_str = date_str.split()[0]  # Take just the date part
-                    
-                    # Try multiple date formats (including formats with time)
-                    date_formats = [
-                        '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', 
-                        '%m-%d-%Y', '%d-%m-%Y', '%Y-%m-%d %H:%M:%S',
-                        '%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S'
-                    ]
-                    for fmt in date_formats:
-                        try:
-                            entry_date = datetime.strptime(date_str, fmt).date()
-                            break
-                        except:
-                            continue
-                
                 # If date parsing failed, skip this row
+                entry_date = convert_date(date_val)
                 if not entry_date:
                     continue
                 
+                operator_val = row[operator_col] if operator_col is not None else None
                 operator = str(operator_val).strip() if operator_val else None
-                part_name = str(row[headers.get('PART NAME', 2)]) if 'PART NAME' in headers and row[headers.get('PART NAME', 2)] else None
-                
-                start_time = None
-                start_val = row[headers.get('START', 3)] if 'START' in headers else None
-                if isinstance(start_val, time):
-                    start_time = start_val
-                elif isinstance(start_val, datetime):
-                    start_time = start_val.time()
-                
-                finish_time = None
-                finish_val = row[headers.get('FINISH', 5)] if 'FINISH' in headers else None
-                if isinstance(finish_val, time):
-                    finish_time = finish_val
-                elif isinstance(finish_val, datetime):
-                    finish_time = finish_val.time()
-                
-                process_time = row[headers.get('PROCESS TIME', 4)] if 'PROCESS TIME' in headers else None
-                total_time = row[headers.get('TOTAL TIME', 6)] if 'TOTAL TIME' in headers else None
-                
-                material = str(row[headers.get('MATERIAL', 7)]) if 'MATERIAL' in headers and row[headers.get('MATERIAL', 7)] else None
-                material_size = str(row[headers.get('MATERIAL SIZE', 10)]) if 'MATERIAL SIZE' in headers and row[headers.get('MATERIAL SIZE', 10)] else None
-                
-                total_parts = None
-                parts_val = row[headers.get('TOTAL PARTS', 8)] if 'TOTAL PARTS' in headers else None
-                if isinstance(parts_val, (int, float)):
-                    total_parts = int(parts_val)
-                elif parts_val:
-                    try:
-                        total_parts = int(float(str(parts_val)))
-                    except:
-                        pass
-                
-                yield_val = row[headers.get('YIELD', 9)] if 'YIELD' in headers else None
-                yield_status, scrap_count, defects_count = parse_yield_status(yield_val)
-                
-                # Detect department
-                department = detect_department(operator, part_name, material)
-                
-                # Convert date/time objects to strings for SQLite
-                entry_date_str = entry_date.isoformat() if entry_date else None
-                start_time_str = start_time.strftime('%H:%M:%S') if start_time else None
-                finish_time_str = finish_time.strftime('%H:%M:%S') if finish_time else None
                 
                 entry = {
                     'source_file': filename,
+                    'source_row': row_idx,
                     'work_order': file_info['work_order'],
                     'customer_name': file_info['customer_name'],
-                    'entry_date': entry_date_str,
+                    'entry_date': entry_date.isoformat(),
                     'operator': operator,
-                    'part_name': part_name,
-                    'start_time': start_time_str,
-                    'finish_time': finish_time_str,
-                    'process_time': float(process_time) if process_time and isinstance(process_time, (int, float)) else None,
-                    'total_time': float(total_time) if total_time and isinstance(total_time, (int, float)) else None,
-                    'material': material,
-                    'material_size': material_size,
-                    'total_parts': total_parts,
-                    'yield_status': yield_status,
-                    'scrap_count': scrap_count,
-                    'defects_count': defects_count,
-                    'department': department
+                    'part_name': None,
+                    'start_time': None,
+                    'finish_time': None,
+                    'process_time': None,
+                    'total_time': None,
+                    'material': None,
+                    'material_size': None,
+                    'total_parts': None,
+                    'yield_status': None,
+                    'scrap_count': None,
+                    'defects_count': None
                 }
+                for field, col_idx, converter in fields:
+                    entry[field] = converter(row[col_idx])
+                
+                if 'yield' in entry:
+                    entry['yield_status'], entry['scrap_count'], entry['defects_count'] = entry.pop('yield')
+                
+                # Detect department
+                entry['department'] = detect_department(operator, entry['part_name'], entry['material'])
                 
-                entries.append(entry)
+                yield entry
                 
             except Exception as e:
-                print(f"  Warning: Error parsing row {row_idx + 1}: {e}")
+                warnings.append(f"Error parsing row {row_idx + 1}: {e}")
                 continue
+    finally:
+        wb.close()
+
+def extract_excel_file(file_path, stream=False, reader='openpyxl'):
+    """
+    Parse a single Excel file into QC entry rows without touching the database.
+    
+    Returns a plain dict holding the file metadata, the parsed entries,
+    row-level warnings, the header fingerprint and the file-level error
+    message if the workbook could not be opened. By default entries is a list (picklable, so the result can
+    cross a process pool boundary); with stream=True it is a lazy generator
+    that reads the sheet while the writer consumes it. reader picks the
+    sheet reader (see open_excel_sheet).
+    """
+    filename = os.path.basename(file_path)
+    result = {
+        'filename': filename,
+        'file_path': file_path,
+        'file_size': None,
+        'last_modified': None,
+        'entries': [],
+        'warnings': [],
+        'date_stats': new_date_stats(),
+        'template': None,
+        'reader': None,
+        'error': None
+    }
+    
+    try:
+        wb, rows, header_row_idx, headers, width, result['reader'] = open_excel_sheet(file_path, reader)
+        result['template'] = header_fingerprint(headers)
         
-        # Delete existing entries for this file to prevent duplicates on re-import
-        cursor.execute("DELETE FROM qc_entries WHERE source_file = ?", (filename,))
+        # Get file metadata
+        file_stat = os.stat(file_path)
+        result['file_size'] = file_stat.st_size
+        result['last_modified'] = datetime.fromtimestamp(file_stat.st_mtime)
+        file_info = parse_filename(filename)
         
-        # Insert entries into database
-        insert_count = 0
-        for entry in entries:
+        entries = iter_sheet_entries(wb, rows, header_row_idx, headers, width,
+                                     filename, file_info, result['warnings'], result['date_stats'])
+        result['entries'] = entries if stream else list(entries)
+        
+    except Exception as e:
+        result['error'] = str(e)
+        result['entries'] = []
+        # Metadata is still recorded for failed imports
+        try:
+            file_stat = os.stat(file_path)
+            result['file_size'] = file_stat.st_size
+            result['last_modified'] = datetime.fromtimestamp(file_stat.st_mtime)
+        except:
+            pass
+    
+    return result
+
+# Column order used for qc_entries inserts
+ENTRY_COLUMNS = (
+    'source_file', 'source_row', 'work_order', 'customer_name', 'entry_date', 'operator',
+    'part_name', 'start_time', 'finish_time', 'process_time', 'total_time',
+    'material', 'material_size', 'total_parts', 'yield_status', 'scrap_count',
+    'defects_count', 'department'
+)
+
+# Inserted rows also carry the normalised minutes and their unit provenance
+# (see qc_time_units), derived from process_time and total_time, and the
+# canonical operator (see qc_operator_resolver)
+INSERT_ENTRY_COLUMNS = ENTRY_COLUMNS + tuple(TIME_MINUTES_COLUMNS) + ('operator_canonical',)
+INSERT_ENTRY_SQL = f"""
+    INSERT INTO qc_entries ({', '.join(INSERT_ENTRY_COLUMNS)})
+    VALUES ({', '.join('?' for _ in INSERT_ENTRY_COLUMNS)})
+"""
+
+# Rows buffered before each executemany while streaming a sheet
+INSERT_BATCH_SIZE = 500
+
+# Entry fields read from the sheet itself, as opposed to the ones derived
+# from the filename. A renamed re-save of the same rows hashes alike, and
+# cached rows can be replayed under a different filename.
+SHEET_ENTRY_COLUMNS = tuple(
+    column for column in ENTRY_COLUMNS
+    if column not in ('source_file', 'work_order', 'customer_name')
+)
+
+# Entry fields fed into rows_hash: the sheet contents without their position,
+# so a copy with an extra title row still counts as a near-duplicate
+ROWS_HASH_COLUMNS = tuple(column for column in SHEET_ENTRY_COLUMNS if column != 'source_row')
+
+# qc_files statuses whose rows are in qc_entries and can be pointed at by duplicates
+CANONICAL_FILE_STATUSES = ('success', 'near_duplicate')
+
+def insert_entry_batch(cursor, batch):
+    """Insert a batch of entry tuples, falling back to row-by-row on error."""
+    # The savepoint undoes the rows executemany wrote before the failing one
+    cursor.execute("SAVEPOINT qc_batch")
+    try:
+        cursor.executemany(INSERT_ENTRY_SQL, batch)
+        cursor.execute("RELEASE qc_batch")
+        return len(batch)
+    except Exception:
+        cursor.execute("ROLLBACK TO qc_batch")
+        cursor.execute("RELEASE qc_batch")
+        inserted = 0
+        for values in batch:
             try:
-                cursor.execute("""
-                    INSERT INTO qc_entries (
-                        source_file, work_order, customer_name, entry_date, operator,
-                        part_name, start_time, finish_time, process_time, total_time,
-                        material, material_size, total_parts, yield_status, scrap_count,
-                        defects_count, department
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    entry['source_file'],
-                    entry['work_order'],
-                    entry['customer_name'],
-                    entry['entry_date'],
-                    entry['operator'],
-                    entry['part_name'],
-                    entry['start_time'],
-                    entry['finish_time'],
-                    entry['process_time'],
-                    entry['total_time'],
-                    entry['material'],
-                    entry['material_size'],
-                    entry['total_parts'],
-                    entry['yield_status'],
-                    entry['scrap_count'],
-                    entry['defects_count'],
-                    entry['department']
-                ))
-                insert_count += 1
+                cursor.execute(INSERT_ENTRY_SQL, values)
+                inserted += 1
             except Exception as e:
                 print(f"  Warning: Error inserting entry: {e}")
-                continue
-        
-        # Record file import
-        cursor.execute("""
+        return inserted
+
+def record_file_error(conn, result, error_msg, commit=True):
+    """Record a failed import in qc_files."""
+    if result['file_size'] is None:
+        return
+    try:
+        conn.execute("""
             INSERT OR REPLACE INTO qc_files (
-                filename, file_path, file_size, last_modified, total_entries,
-                import_status, error_message
+                filename, file_path, file_size, last_modified,
+                import_status, error_message, content_hash
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
-            filename,
-            file_path,
-            file_stat.st_size,
-            datetime.fromtimestamp(file_stat.st_mtime),
-            insert_count,
-            'success',
-            None
+            result['filename'],
+            result['file_path'],
+            result['file_size'],
+            result['last_modified'],
+            'error',
+            error_msg,
+            result.get('content_hash')
         ))
+        if commit:
+            conn.commit()
+    except:
+        pass
+
+def update_rows_digest(digest, entry):
+    """Feed one decoded entry into a rows_hash digest."""
+    digest.update(repr(tuple(entry[column] for column in ROWS_HASH_COLUMNS)).encode('utf-8'))
+
+def find_near_duplicate(cursor, filename, rows_hash):
+    """Return the first other imported workbook whose rows hash to rows_hash, or None."""
+    cursor.execute(f"""
+        SELECT filename FROM qc_files
+        WHERE rows_hash = ? AND filename != ?
+          AND import_status IN ({', '.join('?' for _ in CANONICAL_FILE_STATUSES)})
+        ORDER BY id LIMIT 1
+    """, (rows_hash, filename) + CANONICAL_FILE_STATUSES)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def record_imported_file(cursor, result, insert_count, rows_digest):
+    """
+    Record a successful import in qc_files.
+    
+    A workbook whose bytes differ from every other file but whose sheet rows
+    match an already imported one (e.g. re-saved under a new work order) is
+    kept but flagged as near_duplicate, pointing at the earlier file.
+    """
+    filename = result['filename']
+    rows_hash = rows_digest.hexdigest() if insert_count else None
+    duplicate_of = find_near_duplicate(cursor, filename, rows_hash) if rows_hash else None
+    if duplicate_of:
+        print(f"  Warning: Same rows as {duplicate_of} (near-duplicate, rows kept)")
+    
+    cursor.execute("""
+        INSERT OR REPLACE INTO qc_files (
+            filename, file_path, file_size, last_modified, total_entries,
+            import_status, error_message, content_hash, rows_hash, duplicate_of, template
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        filename,
+        result['file_path'],
+        result['file_size'],
+        result['last_modified'],
+        insert_count,
+        'near_duplicate' if duplicate_of else 'success',
+        None,
+        result.get('content_hash'),
+        rows_hash,
+        duplicate_of,
+        result.get('template')
+    ))
+    return duplicate_of
+
+def write_excel_result(result, conn, commit=True):
+    """
+    Write the output of extract_excel_file into the database.
+    
+    Entries are consumed as an iterator and inserted in batches of
+    INSERT_BATCH_SIZE, so a streamed result never holds more than one batch
+    in memory. Each file is written inside a savepoint so a failure only
+    undoes that file. With commit=False the caller decides when to commit,
+    letting bulk loads group many files into one transaction.
+    """
+    cursor = conn.cursor()
+    filename = result['filename']
+    
+    if result['error']:
+        for warning in result['warnings']:
+            print(f"  Warning: {warning}")
+        record_file_error(conn, result, result['error'], commit)
+        return 0, result['error']
+    
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT qc_file")
+    
+    try:
+        # Delete existing entries for this file to prevent duplicates on re-import
+        cursor.execute("DELETE FROM qc_entries WHERE source_file = ?", (filename,))
         
-        conn.commit()
+        # Insert entries into database
+        insert_count = 0
+        batch = []
+        operators = set()
+        rows_digest = hashlib.sha256()
+        for entry in result['entries']:
+            update_rows_digest(rows_digest, entry)
+            operators.add(entry['operator'])
+            batch.append(tuple(entry[column] for column in ENTRY_COLUMNS)
+                         + time_minutes_values(entry['process_time'], entry['total_time'])
+                         + (resolve_operator(entry['operator']),))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                insert_count += insert_entry_batch(cursor, batch)
+                batch = []
+        if batch:
+            insert_count += insert_entry_batch(cursor, batch)
+        
+        # Split group entries ("Z,F") into qc_entry_operators
+        link_file_entries(cursor, filename, operators)
+        
+        for warning in result['warnings']:
+            print(f"  Warning: {warning}")
+        
+        result['duplicate_of'] = record_imported_file(cursor, result, insert_count, rows_digest)
+        
+        cursor.execute("RELEASE qc_file")
+        if commit:
+            conn.commit()
         return insert_count, None
         
     except Exception as e:
-        error_msg = str(e)
-        # Record failed import
+        # A streamed sheet can fail part-way through; keep the previous rows
+        cursor.execute("ROLLBACK TO qc_file")
+        cursor.execute("RELEASE qc_file")
+        record_file_error(conn, result, str(e), commit)
+        return 0, str(e)
+
+def parse_excel_file(file_path, conn, reader='openpyxl'):
+    """Parse a single Excel file and import its data, streaming rows into the database."""
+    return write_excel_result(extract_excel_file(file_path, stream=True, reader=reader), conn)
+
+def compute_file_hash(file_path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_qc_forms_dir(excel_files):
+    """
+    Build a manifest of the QC forms directory from a cheap stat() pass.
+    
+    Returns {filename: {'file_path', 'file_size', 'last_modified'}} where
+    last_modified is formatted the same way sqlite3 stores the datetime
+    written by write_excel_result, so it can be compared to qc_files directly.
+    """
+    manifest = {}
+    for file_path in excel_files:
         try:
             file_stat = os.stat(file_path)
-            cursor.execute("""
-                INSERT OR REPLACE INTO qc_files (
-                    filename, file_path, file_size, last_modified,
-                    import_status, error_message
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                filename,
-                file_path,
-                file_stat.st_size,
-                datetime.fromtimestamp(file_stat.st_mtime),
-                'error',
-                error_msg
-            ))
-            conn.commit()
-        except:
-            pass
+        except OSError:
+            continue
+        manifest[os.path.basename(file_path)] = {
+            'file_path': file_path,
+            'file_size': file_stat.st_size,
+            'last_modified': str(datetime.fromtimestamp(file_stat.st_mtime))
+        }
+    return manifest
+
+def plan_incremental_import(conn, manifest, use_hash=False):
+    """
+    Compare a directory manifest against qc_files.
+    
+    Returns (changed, unchanged, deleted): file paths that need parsing,
+    file names that can be skipped, and file names recorded in qc_files that
+    no longer exist on disk. When use_hash is set, files whose size/mtime
+    changed but whose content hash matches the recorded one are treated as
+    unchanged (their metadata is refreshed instead of re-parsing).
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT filename, file_size, last_modified, content_hash FROM qc_files")
+    known = {row[0]: row[1:] for row in cursor.fetchall()}
+    
+    changed = []
+    unchanged = []
+    for filename, info in manifest.items():
+        if filename not in known:
+            changed.append(info['file_path'])
+            continue
         
-        return 0, error_msg
+        file_size, last_modified, content_hash = known[filename]
+        if file_size == info['file_size'] and str(last_modified) == info['last_modified']:
+            unchanged.append(filename)
+            continue
+        
+        if use_hash and content_hash:
+            info['content_hash'] = compute_file_hash(info['file_path'])
+            if info['content_hash'] == content_hash:
+                # Touched or copied over with identical bytes
+                cursor.execute("""
+                    UPDATE qc_files SET file_path = ?, file_size = ?, last_modified = ?
+                    WHERE filename = ?
+                """, (info['file_path'], info['file_size'], info['last_modified'], filename))
+                unchanged.append(filename)
+                continue
+        
+        changed.append(info['file_path'])
+    
+    deleted = sorted(set(known) - set(manifest))
+    conn.commit()
+    return changed, unchanged, deleted
+
+def remove_deleted_files(conn, filenames):
+    """Remove entries and file records for workbooks no longer on disk."""
+    cursor = conn.cursor()
+    removed_entries = 0
+    for filename in filenames:
+        cursor.execute("DELETE FROM qc_entries WHERE source_file = ?", (filename,))
+        removed_entries += cursor.rowcount
+        cursor.execute("DELETE FROM qc_files WHERE filename = ?", (filename,))
+    conn.commit()
+    return removed_entries
+
+def find_orphaned_duplicates(conn, manifest, changed):
+    """
+    Return paths of recorded duplicates that must be re-evaluated.
+    
+    A workbook skipped as a byte-identical copy has no rows of its own, so it
+    needs parsing again once its canonical file is deleted, changed, or is
+    about to be re-imported with different contents.
+    """
+    changing = {os.path.basename(file_path) for file_path in changed}
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT d.filename, d.content_hash, c.filename, c.content_hash
+        FROM qc_files d
+        LEFT JOIN qc_files c ON c.filename = d.duplicate_of
+        WHERE d.import_status = 'duplicate'
+    """)
+    orphaned = []
+    for filename, content_hash, canonical, canonical_hash in cursor.fetchall():
+        if filename not in manifest or filename in changing:
+            continue
+        if (canonical is None or canonical not in manifest or canonical in changing
+                or canonical_hash != content_hash):
+            orphaned.append(manifest[filename]['file_path'])
+    return orphaned
+
+def split_duplicate_files(conn, excel_files, manifest):
+    """
+    Separate byte-identical copies of other workbooks from the files to parse.
+    
+    Returns (to_parse, duplicates) where duplicates is a list of
+    (file_path, canonical filename). The canonical copy is the workbook
+    already imported with that content hash, or else the oldest one (by
+    mtime, then name) in excel_files, so plain copies defer to the original.
+    Content hashes are stored in the manifest for the writer.
+    """
+    parsing = {os.path.basename(file_path) for file_path in excel_files}
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT filename, content_hash FROM qc_files
+        WHERE content_hash IS NOT NULL
+          AND import_status IN ({', '.join('?' for _ in CANONICAL_FILE_STATUSES)})
+        ORDER BY id
+    """, CANONICAL_FILE_STATUSES)
+    canonical = {}
+    for filename, content_hash in cursor.fetchall():
+        # Only files that are still on disk and not being re-imported keep their hash
+        if filename in manifest and filename not in parsing:
+            canonical.setdefault(content_hash, filename)
+    
+    candidates = sorted(
+        (info['last_modified'], filename) for filename, info in manifest.items()
+        if filename in parsing
+    )
+    for _, filename in candidates:
+        info = manifest[filename]
+        if not info.get('content_hash'):
+            info['content_hash'] = compute_file_hash(info['file_path'])
+        canonical.setdefault(info['content_hash'], filename)
+    
+    to_parse = []
+    duplicates = []
+    for file_path in excel_files:
+        filename = os.path.basename(file_path)
+        info = manifest.get(filename)
+        if info is None or canonical[info['content_hash']] == filename:
+            to_parse.append(file_path)
+        else:
+            duplicates.append((file_path, canonical[info['content_hash']]))
+    return to_parse, duplicates
+
+def record_duplicate_file(conn, info, canonical, commit=True):
+    """Record a byte-identical copy in qc_files and drop any rows it had."""
+    filename = os.path.basename(info['file_path'])
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM qc_entries WHERE source_file = ?", (filename,))
+    cursor.execute("""
+        INSERT OR REPLACE INTO qc_files (
+            filename, file_path, file_size, last_modified, total_entries,
+            import_status, error_message, content_hash, duplicate_of
+        ) VALUES (?, ?, ?, ?, 0, 'duplicate', NULL, ?, ?)
+    """, (
+        filename,
+        info['file_path'],
+        info['file_size'],
+        info['last_modified'],
+        info['content_hash'],
+        canonical
+    ))
+    if commit:
+        conn.commit()
 
-def main():
+def iter_extracted_files(excel_files, workers=1, reader='openpyxl'):
+    """
+    Yield extract_excel_file results in the same order as excel_files.
+    
+    Serially, each result streams its sheet rows straight into the writer.
+    With workers > 1 the workbooks are parsed in a process pool; results are
+    still yielded in input order so the single writer inserts rows exactly as
+    a serial run would (same ids, same qc_files contents). At most
+    PARSE_AHEAD_PER_WORKER workbooks per worker are in flight or waiting
+    for the writer, so memory stays flat however many files there are.
+    """
+    if workers <= 1:
+        for file_path in excel_files:
+            yield extract_excel_file(file_path, stream=True, reader=reader)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        files = iter(excel_files)
+        pending = deque()
+        try:
+            for file_path in files:
+                pending.append(executor.submit(extract_excel_file, file_path, reader=reader))
+                if len(pending) >= workers * PARSE_AHEAD_PER_WORKER:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for file_path in files:
+                    pending.append(executor.submit(extract_excel_file, file_path, reader=reader))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Build the QC sheets database from Excel files.")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Number of worker processes used to parse workbooks (default: 1, serial)")
+    parser.add_argument('--reader', choices=SHEET_READERS, default='openpyxl',
+                        help="Sheet reader: openpyxl, or xml for the faster standard-library reader "
+                             "(falls back to openpyxl per workbook when needed)")
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help="Only parse new or changed workbooks and remove rows for deleted ones")
+    parser.add_argument('--hash', action='store_true',
+                        help="Record content hashes and use them to skip workbooks whose bytes did not change")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Import byte-identical copies of other workbooks instead of skipping them")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Bulk-load mode: ingest pragmas, deferred index builds and batched commits")
+    parser.add_argument('--transaction-size', type=int, default=DEFAULT_TRANSACTION_SIZE,
+                        help=f"Rows per commit in bulk-load mode (default: {DEFAULT_TRANSACTION_SIZE})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to build the QC database."""
+    args = parse_args(argv)
+    
     print("=" * 60)
     print("SDP QC Sheets Database Builder")
     print("=" * 60)
@@ -446,40 +1073,111 @@ def main():
     excel_files = glob.glob(os.path.join(QC_FORMS_DIR, "*.xlsx"))
     excel_files.extend(glob.glob(os.path.join(QC_FORMS_DIR, "*.xls")))
     
-    print(f"\nFound {len(excel_files)} Excel files to process")
+    print(f"\nFound {len(excel_files)} Excel files")
     
     # Create/connect to database
     conn = sqlite3.connect(DB_PATH)
     create_database_schema(conn)
+    if get_alias_map()['fallback'] is None:
+        print("⚠️  operator_mapping not found; operator_canonical is resolved against the roster only")
+    
+    manifest = scan_qc_forms_dir(excel_files)
+    skipped_files = 0
+    removed_files = 0
+    if args.incremental:
+        excel_files, unchanged, deleted = plan_incremental_import(conn, manifest, args.hash)
+        skipped_files = len(unchanged)
+        if deleted:
+            removed_entries = remove_deleted_files(conn, deleted)
+            removed_files = len(deleted)
+            print(f"Removed {removed_files} deleted files ({removed_entries} entries)")
+        print(f"Incremental mode: {len(excel_files)} new or changed, {skipped_files} unchanged")
+    
+    duplicate_files = 0
+    if not args.keep_duplicates:
+        if args.incremental:
+            excel_files += find_orphaned_duplicates(conn, manifest, excel_files)
+        excel_files, duplicates = split_duplicate_files(conn, excel_files, manifest)
+        for file_path, canonical in duplicates:
+            record_duplicate_file(conn, manifest[os.path.basename(file_path)], canonical, commit=False)
+        conn.commit()
+        duplicate_files = len(duplicates)
+        if duplicates:
+            print(f"Skipped {duplicate_files} byte-identical copies of other workbooks")
     
     # Process files
     total_entries = 0
     successful_files = 0
     failed_files = 0
+    near_duplicate_files = 0
     
-    print("\nProcessing files...")
-    for i, file_path in enumerate(excel_files, 1):
-        filename = os.path.basename(file_path)
-        print(f"[{i}/{len(excel_files)}] Processing: {filename}")
-        
-        count, error = parse_excel_file(file_path, conn)
+    workers = max(1, args.workers)
+    if workers > 1:
+        print(f"\nProcessing files with {workers} worker processes...")
+    else:
+        print("\nProcessing files...")
+    
+    # Bulk mode keeps idx_source_file: the per-file DELETE relies on it
+    load_session = bulk_load(conn, keep_indexes=('idx_source_file',)) if args.bulk else nullcontext()
+    pending_rows = 0
+    date_stats = new_date_stats()
+    reader_stats = Counter()
+    with load_session:
+        for i, result in enumerate(iter_extracted_files(excel_files, workers, args.reader), 1):
+            print(f"[{i}/{len(excel_files)}] Processing: {result['filename']}")
+            
+            info = manifest.get(result['filename'], {})
+            if info.get('content_hash'):
+                result['content_hash'] = info['content_hash']
+            elif args.hash:
+                result['content_hash'] = compute_file_hash(result['file_path'])
+            
+            count, error = write_excel_result(result, conn, commit=not args.bulk)
+            
+            if error:
+                print(f"  ❌ Error: {error}")
+                failed_files += 1
+            else:
+                print(f"  ✅ Imported {count} entries")
+                total_entries += count
+                successful_files += 1
+                if result.get('duplicate_of'):
+                    near_duplicate_files += 1
+            
+            date_stats.update(result['date_stats'])
+            if result['reader']:
+                reader_stats[result['reader']] += 1
+            pending_rows += count
+            if args.bulk and pending_rows >= args.transaction_size:
+                conn.commit()
+                pending_rows = 0
         
-        if error:
-            print(f"  ❌ Error: {error}")
-            failed_files += 1
-        else:
-            print(f"  ✅ Imported {count} entries")
-            total_entries += count
-            successful_files += 1
+        if args.bulk:
+            print("\nRebuilding deferred indexes...")
+    
+    # Canonical operators of new operator-day cells, so reports only read
+    resolve_operator_canonical(conn)
     
     # Print summary
     print("\n" + "=" * 60)
     print("Import Summary")
     print("=" * 60)
     print(f"Total files processed: {len(excel_files)}")
+    if args.incremental:
+        print(f"Unchanged (skipped): {skipped_files}")
+        print(f"Deleted (removed): {removed_files}")
     print(f"Successful: {successful_files}")
     print(f"Failed: {failed_files}")
+    if not args.keep_duplicates:
+        print(f"Duplicates (skipped): {duplicate_files}")
+        print(f"Near-duplicates (flagged): {near_duplicate_files}")
     print(f"Total QC entries imported: {total_entries}")
+    if date_stats:
+        print("Date cells by decoding path: " + ", ".join(
+            f"{path} {count}" for path, count in sorted(date_stats.items())))
+    if args.reader != 'openpyxl':
+        print("Workbooks by sheet reader: " + ", ".join(
+            f"{reader} {count}" for reader, count in sorted(reader_stats.items())))
     print(f"\nDatabase saved to: {DB_PATH}")
     
     # Print some statistics
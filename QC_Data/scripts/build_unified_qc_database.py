@@ -10,8 +10,18 @@ Main script to consolidate all QC data from three sources into a single unified
 import sqlite3
 import os
 import sys
+import argparse
+import glob
+import time
+import hashlib
+import json
 from datetime import datetime
 from pathlib import Path
+from contextlib import nullcontext
+from functools import lru_cache
+from collections import Counter
+from qc_bulk_load import bulk_load, DEFAULT_TRANSACTION_SIZE
+from qc_time_units import ensure_time_minutes_columns, minutes_sql, time_minutes_values, unit_sql
 
 # Configuration
 UNIFIED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_unified.db"
@@ -19,6 +29,8 @@ QC_FORMS_DIR = "/mnt/nvme2/SDP/QC-Data"
 PROD_MGMT_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/production-management-app/backend/data/production_mgmt.db"
 RAW_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
 CLEANED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_cleaned_2025.db"
+# Parsed workbook rows keyed by content hash (see qc_row_cache); kept across --recreate
+ROW_CACHE_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_row_cache.db"
 SCHEMA_FILE = "qc_unified_database_schema.sql"
 
 
@@ -27,6 +39,9 @@ def create_unified_schema(conn):
     print("Creating unified database schema...")
     
     schema_path = os.path.join(os.path.dirname(__file__), SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        # The schema is kept in QC_Data/databases next to the database files
+        schema_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'databases', SCHEMA_FILE)
     
     if not os.path.exists(schema_path):
         print(f"Error: Schema file not found: {schema_path}")
@@ -35,17 +50,44 @@ def create_unified_schema(conn):
     with open(schema_path, 'r') as f:
         schema_sql = f.read()
         try:
+            from build_qc_database import ensure_qc_entries_columns, ensure_qc_files_columns
+            # Columns the schema's indexes need, for databases built by older versions
+            ensure_qc_entries_columns(conn)
             conn.executescript(schema_sql)
+            # Unified databases created before qc_files gained these columns
+            ensure_qc_files_columns(conn)
+            # ... and before qc_entries recorded time units
+            added = ensure_time_minutes_columns(conn)
             conn.commit()
             print("✅ Schema created successfully")
+            if added:
+                print(f"⚠️  Added {', '.join(added)}; rebuild with --recreate to fill them for existing rows")
             return True
         except Exception as e:
             print(f"❌ Error creating schema: {e}")
             return False
 
 
-def migrate_excel_data():
-    """Migrate Excel data (v1 and v2) using migration script."""
+def migrate_excel_data(workers=1, bulk=False, transaction_size=DEFAULT_TRANSACTION_SIZE, keep_duplicates=False,
+                       reader='openpyxl', use_row_cache=True, db_path=None):
+    """
+    Stream Excel data (v1 and v2) from the QC forms directory into the unified database.
+    
+    Workbooks are decoded by build_qc_database and written straight into the
+    unified qc_entries table, with times normalised to minutes and
+    data_source taken from each sheet's template; no intermediate
+    qc_sheets.db is involved. Only new or changed workbooks (per qc_files)
+    are parsed and rows of deleted workbooks are removed, so re-running on an
+    up-to-date database is cheap. With bulk=True the load runs with bulk-load
+    pragmas, deferred index builds and a commit every transaction_size rows.
+    With use_row_cache, rows are replayed from ROW_CACHE_PATH for workbooks
+    parsed before (e.g. after --recreate) and cached for new ones. db_path
+    overrides UNIFIED_DB_PATH, e.g. to fill a shadow database.
+    """
+    from build_qc_database import (scan_qc_forms_dir, plan_incremental_import,
+                                   remove_deleted_files, find_orphaned_duplicates)
+    from qc_row_cache import open_row_cache, prune_row_cache
+    
     print("\n" + "=" * 60)
     print("Phase 2: Migrating Excel Data")
     print("=" * 60)
@@ -55,22 +97,71 @@ def migrate_excel_data():
         print("   Skipping Excel data migration")
         return False
     
-    # Import and run the Excel migration script
+    conn = sqlite3.connect(db_path or UNIFIED_DB_PATH)
+    row_cache = open_row_cache(ROW_CACHE_PATH) if use_row_cache else None
     try:
-        from migrate_excel_data import migrate_excel_files
-        migrate_excel_files()
+        manifest = scan_qc_forms_dir(list_qc_workbooks())
+        changed, unchanged, deleted = plan_incremental_import(conn, manifest)
+        print(f"Found {len(manifest)} Excel files: {len(changed)} new or changed, {len(unchanged)} unchanged")
+        
+        if deleted:
+            removed_entries = remove_deleted_files(conn, deleted)
+            conn.executemany("DELETE FROM qc_source_metadata WHERE source_file = ?",
+                             [(filename,) for filename in deleted])
+            conn.commit()
+            print(f"Removed {len(deleted)} deleted files ({removed_entries} entries)")
+        if not keep_duplicates:
+            changed += find_orphaned_duplicates(conn, manifest, changed)
+        
+        batch_id = f"excel_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # The unique natural-key indexes stay in bulk mode and also serve the per-file lookups
+        load_session = bulk_load(conn) if bulk else nullcontext()
+        with load_session:
+            stats = ingest_excel_files(conn, changed, batch_id, manifest,
+                                       workers=max(1, workers),
+                                       transaction_size=transaction_size if bulk else None,
+                                       reader=reader,
+                                       skip_duplicates=not keep_duplicates,
+                                       row_cache=row_cache)
+        
+        if row_cache is not None:
+            # Keep cached rows only for workbooks still in the forms directory
+            live_hashes = {info['content_hash'] for info in manifest.values() if info.get('content_hash')}
+            live_hashes.update(content_hash for filename, content_hash in
+                               conn.execute("SELECT filename, content_hash FROM qc_files")
+                               if filename in manifest)
+            prune_row_cache(row_cache, live_hashes)
+        
+        print(f"\n✅ Ingested {stats['entries']} entries from {stats['files'] - stats['failed']} files "
+              f"({stats['changed']} rows inserted, updated or removed)")
+        if stats['cached']:
+            print(f"⚡ {stats['cached']} files replayed from the row cache")
+        if stats['failed']:
+            print(f"⚠️  {stats['failed']} files failed to import")
+        if stats['duplicates']:
+            print(f"⏭️  {stats['duplicates']} byte-identical copies skipped")
         return True
     except Exception as e:
         print(f"❌ Error migrating Excel data: {e}")
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        conn.close()
+        if row_cache is not None:
+            row_cache.close()
 
 
-def migrate_direct_input_data():
-    """Migrate direct input data from web app."""
+def migrate_direct_input_data(db_path=None):
+    """
+    Sync direct input data from the web app's production_mgmt.db.
+    
+    Only source rows added or changed since the last sync are copied (see
+    migrate_direct_input); a fresh shadow build starts without a watermark
+    and so copies every row. db_path overrides UNIFIED_DB_PATH.
+    """
     print("\n" + "=" * 60)
-    print("Phase 3: Migrating Direct Input Data")
+    print("Phase 3: Syncing Direct Input Data")
     print("=" * 60)
     
     if not os.path.exists(PROD_MGMT_DB_PATH):
@@ -78,10 +169,9 @@ def migrate_direct_input_data():
         print("   Skipping direct input migration")
         return False
     
-    # Import and run the direct input migration script
     try:
         from migrate_direct_input import migrate_direct_input
-        migrate_direct_input()
+        migrate_direct_input(db_path or UNIFIED_DB_PATH, PROD_MGMT_DB_PATH)
         return True
     except Exception as e:
         print(f"❌ Error migrating direct input data: {e}")
@@ -90,106 +180,694 @@ def migrate_direct_input_data():
         return False
 
 
-def migrate_from_existing_databases():
-    """Optionally migrate from existing raw/cleaned databases as backup."""
+# Column order of unified qc_entries rows built from QC sheet entries
+UNIFIED_ENTRY_COLUMNS = (
+    'data_source', 'source_file', 'source_row', 'work_order', 'customer_name', 'entry_date',
+    'operator', 'part_name', 'start_time', 'finish_time', 'process_time_minutes',
+    'process_time_unit', 'total_time_minutes', 'total_time_unit', 'material', 'material_size',
+    'total_parts', 'parts_produced',
+    'defects_count', 'scrap_count', 'yield_status', 'notes', 'department', 'created_at'
+)
+
+# Columns an upsert refreshes on an existing row; the natural key and created_at stay
+UNIFIED_UPDATE_COLUMNS = tuple(
+    column for column in UNIFIED_ENTRY_COLUMNS
+    if column not in ('source_file', 'source_row', 'created_at')
+)
+
+# Conflict clause for Excel rows keyed by (source_file, source_row). Rows whose
+# values did not change are left alone, so re-importing a workbook only
+# writes (and bumps updated_at on) the rows that were edited.
+EXCEL_ROW_UPSERT_SQL = f"""
+    ON CONFLICT(source_file, source_row) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in UNIFIED_UPDATE_COLUMNS)}
+    WHERE ({', '.join(f'qc_entries.{column}' for column in UNIFIED_UPDATE_COLUMNS)})
+        IS NOT ({', '.join(f'excluded.{column}' for column in UNIFIED_UPDATE_COLUMNS)})
+"""
+
+# Upsert of one unified row (a unified_values_from_raw tuple)
+UNIFIED_UPSERT_SQL = f"""
+    INSERT INTO qc_entries ({', '.join(UNIFIED_ENTRY_COLUMNS)})
+    VALUES ({', '.join('?' for _ in UNIFIED_ENTRY_COLUMNS[:-1])}, COALESCE(?, CURRENT_TIMESTAMP))
+""" + EXCEL_ROW_UPSERT_SQL
+
+# Set-based Phase 4 copy from a qc_sheets.db attached as raw_src, upserted on
+# the Excel natural key. Times go through the qc_time_units rule in its SQL
+# form (minutes_sql/unit_sql), as unified_values_from_raw does for rows
+# inserted from Python, so both databases agree on every row's minutes and
+# record the unit applied. Each file's data_source comes from
+# temp.raw_file_sources (see resolve_raw_file_sources), so it matches what
+# Phase 2 picks for the same workbook. Rows whose entry_date is not an ISO
+# date are skipped. {source_row} is NULL for raw databases built before rows
+# were numbered.
+RAW_MIGRATION_SQL = f"""
+    INSERT INTO qc_entries ({', '.join(UNIFIED_ENTRY_COLUMNS)})
+    SELECT
+        raw_templates.data_source,
+        source_file, {{source_row}}, work_order, customer_name, entry_date,
+        operator, part_name, start_time, finish_time,
+        {minutes_sql('process_time')},
+        {unit_sql('process_time')},
+        {minutes_sql('total_time')},
+        {unit_sql('total_time')},
+        material, material_size, total_parts, total_parts,
+        defects_count, scrap_count, yield_status, notes, department,
+        COALESCE(created_at, CURRENT_TIMESTAMP)
+    FROM raw_src.qc_entries
+    JOIN temp.raw_file_sources AS raw_templates USING (source_file)
+    WHERE date(entry_date) = entry_date
+    ORDER BY entry_date
+""" + EXCEL_ROW_UPSERT_SQL.replace('{', '{{').replace('}', '}}')
+
+# Rows per executemany call when migrating
+INSERT_BATCH_SIZE = 1000
+
+# Header columns only v2 QC sheets have, and the marker of the v2 date header
+# ("DATE (MM/DD/YYYY)"); v1 sheets have a plain DATE header and TOTAL TIME
+V2_TEMPLATE_HEADERS = ('MATERIAL SIZE',)
+V2_DATE_HEADER_MARKER = 'MM/DD'
+V1_TEMPLATE_HEADERS = ('DATE', 'TOTAL TIME')
+
+# A --recreate builds into this file next to the live database and renames
+# it over the live one once validation passes
+SHADOW_DB_SUFFIX = '.building'
+
+# Seconds to wait for writers on the live database to finish before the swap
+SWAP_LOCK_TIMEOUT = 60
+
+# Seconds between directory scans in watch mode
+WATCH_POLL_INTERVAL = 15
+
+# A changed workbook must keep the same size and mtime for this long before
+# watch mode ingests it
+WATCH_DEBOUNCE_SECONDS = 10
+
+
+@lru_cache(maxsize=65536)
+def classify_excel_entry_date(entry_date):
+    """
+    Pick excel_v1/excel_v2 for an ISO entry_date string.
+    
+    Heuristic: if entry_date is recent (after July 2025), likely v2,
+    otherwise likely v1. Raises ValueError for malformed dates. Cached
+    because a full history only has a few thousand distinct dates.
+    """
+    entry_date_obj = datetime.strptime(entry_date, '%Y-%m-%d').date()
+    
+    # July 2025 cutoff
+    cutoff_date = datetime(2025, 7, 1).date()
+    return 'excel_v2' if entry_date_obj >= cutoff_date else 'excel_v1'
+
+
+def unified_values_from_raw(source_file, work_order, customer_name, entry_date, operator,
+                            part_name, start_time, finish_time, process_time, total_time,
+                            material, material_size, total_parts, yield_status, scrap_count,
+                            defects_count, notes, department, created_at, data_source=None, source_row=None):
+    """
+    Convert one raw QC sheet row into a UNIFIED_UPSERT_SQL tuple.
+    
+    data_source comes from the sheet's template when known; otherwise it is
+    guessed from entry_date. Times are converted to minutes by
+    qc_time_units.time_unit, which also gives the unit recorded with them.
+    Raises for rows that cannot be converted (e.g. malformed entry_date).
+    """
+    if data_source is None:
+        if isinstance(entry_date, str):
+            data_source = classify_excel_entry_date(entry_date)
+        else:
+            data_source = 'excel_v2' if entry_date >= datetime(2025, 7, 1).date() else 'excel_v1'
+    
+    return (
+        data_source, source_file, source_row, work_order, customer_name, entry_date,
+        operator, part_name, start_time, finish_time,
+        *time_minutes_values(process_time, total_time),
+        material, material_size, total_parts, total_parts,
+        defects_count, scrap_count, yield_status, notes, department, created_at
+    )
+
+
+def upsert_unified_batch(cursor, batch):
+    """
+    Upsert a batch of unified rows, retrying one row at a time if the batch fails.
+    
+    Returns (rows now holding the batch's values, rows actually inserted or
+    updated); rows rejected by a constraint are skipped.
+    """
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+    # The savepoint undoes the rows executemany wrote before the failing one
+    cursor.execute("SAVEPOINT qc_batch")
+    try:
+        cursor.executemany(UNIFIED_UPSERT_SQL, batch)
+        changed = cursor.rowcount
+        cursor.execute("RELEASE qc_batch")
+        return len(batch), changed
+    except sqlite3.IntegrityError:
+        cursor.execute("ROLLBACK TO qc_batch")
+        cursor.execute("RELEASE qc_batch")
+        written = changed = 0
+        for values in batch:
+            try:
+                cursor.execute(UNIFIED_UPSERT_SQL, values)
+                written += 1
+                changed += cursor.rowcount
+            except sqlite3.IntegrityError:
+                pass
+        return written, changed
+
+
+def excel_entry_to_unified(entry, data_source=None):
+    """Convert a parsed QC sheet entry (see build_qc_database) into a UNIFIED_UPSERT_SQL tuple."""
+    return unified_values_from_raw(
+        entry['source_file'], entry['work_order'], entry['customer_name'], entry['entry_date'],
+        entry['operator'], entry['part_name'], entry['start_time'], entry['finish_time'],
+        entry['process_time'], entry['total_time'], entry['material'], entry['material_size'],
+        entry['total_parts'], entry['yield_status'], entry['scrap_count'], entry['defects_count'],
+        None, entry['department'], None, data_source, entry.get('source_row')
+    )
+
+
+def classify_sheet_template(fingerprint):
+    """
+    Pick excel_v1/excel_v2 for a header fingerprint from its columns alone.
+    
+    v2 sheets added a MATERIAL SIZE column and spell the date column
+    "DATE (MM/DD/YYYY)"; a layout with either is excel_v2, one with a plain
+    DATE and a TOTAL TIME column but neither is excel_v1. Returns None for
+    layouts the headers do not decide.
+    """
+    headers = fingerprint.split(' | ')
+    if any(header in V2_TEMPLATE_HEADERS or V2_DATE_HEADER_MARKER in header for header in headers):
+        return 'excel_v2'
+    if all(header in headers for header in V1_TEMPLATE_HEADERS):
+        return 'excel_v1'
+    return None
+
+
+def resolve_sheet_template(cursor, fingerprint, filename):
+    """
+    Return the data_source of a sheet's header layout, or None if it must be voted on.
+    
+    A recorded layout keeps its data_source, except one classified by the
+    entry-date vote, which is re-classified from its headers when they
+    decide (earlier workbooks keep their rows' data_source until the next
+    --recreate). A new layout is classified from its headers and recorded
+    with detected_by = 'header'.
+    """
+    if fingerprint is None:
+        return None
+    cursor.execute("SELECT data_source, detected_by FROM qc_sheet_templates WHERE fingerprint = ?",
+                   (fingerprint,))
+    row = cursor.fetchone()
+    if row is not None and row[1] != 'entry_date':
+        return row[0]
+    
+    data_source = classify_sheet_template(fingerprint)
+    if data_source is None:
+        return row[0] if row else None
+    cursor.execute("""
+        INSERT INTO qc_sheet_templates (fingerprint, data_source, first_seen_file, detected_by)
+        VALUES (?, ?, ?, 'header')
+        ON CONFLICT(fingerprint) DO UPDATE SET data_source = excluded.data_source, detected_by = 'header'
+    """, (fingerprint, data_source, filename))
+    if row is None:
+        print(f"  New QC sheet template classified as {data_source} from its headers: {fingerprint}")
+    elif row[0] != data_source:
+        print(f"  QC sheet template re-classified from {row[0]} to {data_source} from its headers: {fingerprint}")
+    return data_source
+
+
+def register_sheet_template(cursor, fingerprint, filename):
+    """
+    Classify a new header layout its headers do not decide, from the rows just written for filename.
+    
+    Last resort after classify_sheet_template: the rows were inserted with
+    the per-row entry_date guess; the layout takes whichever version most
+    of them got, and the file's rows are made consistent with it. Returns
+    the chosen data_source, or None for a sheet without rows (the layout
+    stays unclassified until a sheet has some).
+    """
+    cursor.execute("""
+        SELECT data_source FROM qc_entries
+        WHERE source_file = ? AND data_source LIKE 'excel_%'
+        GROUP BY data_source
+        ORDER BY COUNT(*) DESC, data_source DESC
+        LIMIT 1
+    """, (filename,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    
+    data_source = row[0]
+    cursor.execute("""
+        INSERT OR IGNORE INTO qc_sheet_templates (fingerprint, data_source, first_seen_file, detected_by)
+        VALUES (?, ?, ?, 'entry_date')
+    """, (fingerprint, data_source, filename))
+    cursor.execute("""
+        UPDATE qc_entries SET data_source = ?
+        WHERE source_file = ? AND data_source LIKE 'excel_%' AND data_source != ?
+    """, (data_source, filename, data_source))
+    print(f"  New QC sheet template classified as {data_source} by entry date: {fingerprint}")
+    return data_source
+
+
+def carry_over_sheet_templates(conn, previous_db_path):
+    """Copy qc_sheet_templates from a previous unified database so a rebuild keeps its classifications."""
+    try:
+        conn.execute("ATTACH DATABASE ? AS previous", (previous_db_path,))
+    except sqlite3.Error:
+        return 0
+    try:
+        cursor = conn.execute("""
+            INSERT OR IGNORE INTO qc_sheet_templates
+                (fingerprint, data_source, first_seen_file, detected_by, created_at)
+            SELECT fingerprint, data_source, first_seen_file, detected_by, created_at
+            FROM previous.qc_sheet_templates
+        """)
+        conn.commit()
+        return cursor.rowcount
+    except sqlite3.Error:
+        # Databases built before templates were tracked
+        return 0
+    finally:
+        conn.execute("DETACH DATABASE previous")
+
+
+def write_unified_excel_result(result, conn, batch_id, commit=True):
+    """
+    Merge one workbook's freshly parsed rows into the unified database.
+    
+    result is the output of build_qc_database.extract_excel_file. Rows are
+    upserted on their natural key (source_file, source_row), so only edited
+    rows are rewritten; rows no longer in the sheet are deleted. The file's
+    qc_source_metadata rows and qc_files record are refreshed in the same
+    savepoint, so a failure only undoes that file. Rows get their
+    data_source from the sheet's template (qc_sheet_templates), classified
+    from the header columns when the layout is new. The number
+    of rows inserted, updated or deleted is left in result['changed_rows'].
+    With commit=False the caller decides when to commit.
+    """
+    from build_qc_database import record_file_error, record_imported_file, update_rows_digest
+    
+    filename = result['filename']
+    if result['error']:
+        record_file_error(conn, result, result['error'], commit)
+        return 0, result['error']
+    
+    cursor = conn.cursor()
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT qc_file")
+    try:
+        cursor.execute("DELETE FROM qc_source_metadata WHERE source_file = ?", (filename,))
+        
+        data_source = resolve_sheet_template(cursor, result.get('template'), filename)
+        
+        insert_count = 0
+        changed_rows = 0
+        batch = []
+        sheet_rows = set()
+        rows_digest = hashlib.sha256()
+        for entry in result['entries']:
+            try:
+                batch.append(excel_entry_to_unified(entry, data_source))
+            except Exception:
+                continue
+            sheet_rows.add(entry.get('source_row'))
+            update_rows_digest(rows_digest, entry)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                written, changed = upsert_unified_batch(cursor, batch)
+                insert_count += written
+                changed_rows += changed
+                batch = []
+        if batch:
+            written, changed = upsert_unified_batch(cursor, batch)
+            insert_count += written
+            changed_rows += changed
+        
+        # Rows removed from the sheet, and rows imported before rows were numbered
+        cursor.execute("""
+            SELECT id, source_row FROM qc_entries
+            WHERE source_file = ? AND data_source LIKE 'excel_%'
+        """, (filename,))
+        stale = [(entry_id,) for entry_id, source_row in cursor.fetchall()
+                 if source_row is None or source_row not in sheet_rows]
+        cursor.executemany("DELETE FROM qc_entries WHERE id = ?", stale)
+        result['changed_rows'] = changed_rows + len(stale)
+        
+        if data_source is None and result.get('template') and insert_count:
+            register_sheet_template(cursor, result['template'], filename)
+        
+        cursor.execute("""
+            INSERT INTO qc_source_metadata (
+                data_source, source_file, import_batch_id, total_entries,
+                date_range_start, date_range_end
+            )
+            SELECT data_source, source_file, ?, COUNT(*), MIN(entry_date), MAX(entry_date)
+            FROM qc_entries
+            WHERE source_file = ? AND data_source LIKE 'excel_%'
+            GROUP BY data_source
+        """, (batch_id, filename))
+        
+        result['duplicate_of'] = record_imported_file(cursor, result, insert_count, rows_digest)
+        
+        cursor.execute("RELEASE qc_file")
+        if commit:
+            conn.commit()
+        return insert_count, None
+    
+    except Exception as e:
+        cursor.execute("ROLLBACK TO qc_file")
+        cursor.execute("RELEASE qc_file")
+        record_file_error(conn, result, str(e), commit)
+        return 0, str(e)
+
+
+def ingest_excel_files(conn, file_paths, batch_id, manifest=None, workers=1, transaction_size=None,
+                       reader='openpyxl', skip_duplicates=True, row_cache=None):
+    """
+    Parse the given workbooks and write them straight into the unified database.
+    
+    With a manifest (from scan_qc_forms_dir), byte-identical copies of other
+    workbooks are recorded as duplicates in qc_files instead of being parsed
+    (unless skip_duplicates is False), and with a row_cache connection (see
+    qc_row_cache) workbooks whose rows are cached are replayed without being
+    opened. Workbooks are parsed by `workers` processes with the given sheet
+    reader and written in input order.
+    With transaction_size, files are committed together every
+    transaction_size rows instead of one by one. Returns a Counter of files,
+    entries, changed rows, failures, cache hits and skipped duplicates.
+    """
+    from build_qc_database import split_duplicate_files, record_duplicate_file, iter_extracted_files
+    from qc_row_cache import iter_cached_or_extracted, store_cached_result
+    
+    stats = Counter()
+    if manifest is not None and skip_duplicates:
+        file_paths, duplicates = split_duplicate_files(conn, file_paths, manifest)
+        for file_path, canonical in duplicates:
+            conn.execute("DELETE FROM qc_source_metadata WHERE source_file = ?",
+                         (os.path.basename(file_path),))
+            record_duplicate_file(conn, manifest[os.path.basename(file_path)], canonical)
+            print(f"  ⏭️  {os.path.basename(file_path)}: copy of {canonical}, skipped")
+        stats['duplicates'] = len(duplicates)
+    
+    if manifest is not None and row_cache is not None:
+        results = iter_cached_or_extracted(row_cache, file_paths, manifest, workers, reader)
+    else:
+        results = iter_extracted_files(file_paths, workers, reader)
+    
+    pending_rows = 0
+    for result in results:
+        if manifest is not None and not result.get('content_hash'):
+            result['content_hash'] = manifest[result['filename']].get('content_hash')
+        count, error = write_unified_excel_result(result, conn, batch_id, commit=transaction_size is None)
+        stats['files'] += 1
+        if error:
+            print(f"  ❌ {result['filename']}: {error}")
+            stats['failed'] += 1
+        else:
+            cached = result['reader'] == 'cache'
+            print(f"  ✅ {result['filename']}: {count} entries, {result['changed_rows']} changed"
+                  f"{' (cached rows)' if cached else ''}")
+            stats['entries'] += count
+            stats['changed'] += result['changed_rows']
+            stats['cached'] += cached
+            if result.get('cache_rows') is not None:
+                store_cached_result(row_cache, result['content_hash'], result, result['cache_rows'])
+        
+        pending_rows += count
+        if transaction_size is not None and pending_rows >= transaction_size:
+            conn.commit()
+            pending_rows = 0
+    conn.commit()
+    return stats
+
+
+def list_qc_workbooks():
+    """List QC sheet workbooks, ignoring the ~$ owner files Excel keeps next to open workbooks."""
+    excel_files = glob.glob(os.path.join(QC_FORMS_DIR, "*.xlsx"))
+    excel_files.extend(glob.glob(os.path.join(QC_FORMS_DIR, "*.xls")))
+    return [path for path in excel_files if not os.path.basename(path).startswith('~$')]
+
+
+def watch_qc_forms_dir(poll_interval=WATCH_POLL_INTERVAL, debounce_seconds=WATCH_DEBOUNCE_SECONDS,
+                       reader='openpyxl', use_row_cache=True):
+    """
+    Poll QC_FORMS_DIR and ingest new or changed workbooks into the unified database.
+    
+    Each poll is a stat() scan compared against qc_files, so an idle poll
+    touches no workbook. A changed workbook is only ingested once its size
+    and mtime have stayed the same for debounce_seconds, which leaves files
+    Excel is still saving alone. Rows for deleted workbooks are removed.
+    On first start every workbook without a qc_files record is ingested once.
+    Runs until interrupted.
+    """
+    from build_qc_database import (scan_qc_forms_dir, plan_incremental_import,
+                                   remove_deleted_files, find_orphaned_duplicates)
+    from qc_row_cache import open_row_cache
+    
+    print("\n" + "=" * 60)
+    print("Watching QC Forms Directory")
+    print("=" * 60)
+    print(f"Directory: {QC_FORMS_DIR}")
+    print(f"Poll interval: {poll_interval}s, debounce: {debounce_seconds}s (Ctrl+C to stop)")
+    
+    conn = sqlite3.connect(UNIFIED_DB_PATH)
+    row_cache = open_row_cache(ROW_CACHE_PATH) if use_row_cache else None
+    pending = {}  # file_path -> ((file_size, last_modified), first seen with that signature)
+    
+    try:
+        while True:
+            manifest = scan_qc_forms_dir(list_qc_workbooks())
+            changed, _, deleted = plan_incremental_import(conn, manifest)
+            
+            now = time.monotonic()
+            ready = []
+            still_pending = {}
+            for file_path in changed:
+                info = manifest[os.path.basename(file_path)]
+                signature = (info['file_size'], info['last_modified'])
+                seen = pending.get(file_path)
+                if seen is None or seen[0] != signature:
+                    still_pending[file_path] = (signature, now)
+                elif now - seen[1] >= debounce_seconds:
+                    ready.append(file_path)
+                else:
+                    still_pending[file_path] = seen
+            pending = still_pending
+            
+            stamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if deleted:
+                removed_entries = remove_deleted_files(conn, deleted)
+                conn.executemany("DELETE FROM qc_source_metadata WHERE source_file = ?",
+                                 [(filename,) for filename in deleted])
+                conn.commit()
+                print(f"[{stamp}] Removed {len(deleted)} deleted files ({removed_entries} entries)")
+            # Copies whose original was deleted or changed need their own rows now
+            ready += find_orphaned_duplicates(conn, manifest, ready)
+            if ready:
+                print(f"[{stamp}] Ingesting {len(ready)} changed files")
+                batch_id = f"watch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                ingest_excel_files(conn, ready, batch_id, manifest, reader=reader, row_cache=row_cache)
+            
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        conn.close()
+        if row_cache is not None:
+            row_cache.close()
+
+
+# Per-file data_source vote of raw_src, for files without a recorded
+# template: MATERIAL SIZE only exists in v2 sheets, so a file with any
+# material_size value is excel_v2; otherwise its entry dates vote on the
+# July 2025 cutoff
+RAW_FILE_VOTE_SQL = """
+    SELECT source_file,
+           CASE WHEN COUNT(material_size) > 0 THEN 'excel_v2'
+                WHEN SUM(entry_date >= '2025-07-01') * 2 >= COUNT(entry_date) THEN 'excel_v2'
+                ELSE 'excel_v1' END
+    FROM raw_src.qc_entries
+    GROUP BY source_file
+"""
+
+
+def resolve_raw_file_sources(cursor):
+    """
+    Fill temp.raw_file_sources with the data_source of every raw_src file.
+    
+    Files whose qc_files row records their header template are classified
+    the way Phase 2 classifies them (resolve_sheet_template, then for
+    layouts the headers do not decide the vote of the first such file,
+    recorded in qc_sheet_templates). Files of raw databases built before
+    templates were recorded keep the RAW_FILE_VOTE_SQL vote. Returns the
+    number of files classified by template.
+    """
+    cursor.execute("DROP TABLE IF EXISTS temp.raw_file_sources")
+    cursor.execute("CREATE TEMP TABLE raw_file_sources (source_file TEXT PRIMARY KEY, data_source TEXT NOT NULL)")
+    cursor.execute(f"INSERT INTO temp.raw_file_sources {RAW_FILE_VOTE_SQL}")
+    
+    cursor.execute("PRAGMA raw_src.table_info(qc_files)")
+    if 'template' not in {row[1] for row in cursor.fetchall()}:
+        return 0
+    cursor.execute("""
+        SELECT f.filename, f.template, v.data_source
+        FROM raw_src.qc_files AS f
+        JOIN temp.raw_file_sources AS v ON v.source_file = f.filename
+        WHERE f.template IS NOT NULL
+        ORDER BY f.filename
+    """)
+    templates = {}
+    files = cursor.fetchall()
+    for filename, fingerprint, vote in files:
+        if fingerprint not in templates:
+            data_source = resolve_sheet_template(cursor, fingerprint, filename)
+            if data_source is None:
+                data_source = vote
+                cursor.execute("""
+                    INSERT INTO qc_sheet_templates (fingerprint, data_source, first_seen_file, detected_by)
+                    VALUES (?, ?, ?, 'entry_date')
+                """, (fingerprint, data_source, filename))
+                print(f"  New QC sheet template classified as {data_source} by entry date: {fingerprint}")
+            templates[fingerprint] = data_source
+        cursor.execute("UPDATE temp.raw_file_sources SET data_source = ? WHERE source_file = ?",
+                       (templates[fingerprint], filename))
+    return len(files)
+
+
+def merge_raw_entries(cursor, has_source_row):
+    """
+    Upsert the qc_sheets.db attached as raw_src into qc_entries (RAW_MIGRATION_SQL).
+    
+    Each raw file's data_source is resolved first (resolve_raw_file_sources).
+    Excel rows migrated from an older raw database have no source_row and so
+    never conflict with the keyed rows; when raw_src has row numbers, those
+    rows of the files being migrated are deleted first, in the caller's
+    transaction. Raises RuntimeError, leaving the rollback to the caller,
+    if the entry count afterwards is not the count before, less the rows
+    deleted, plus the raw rows whose key was new (so re-migrating an
+    unchanged raw database leaves it unchanged). Returns (rows inserted or
+    updated, rows deleted).
+    """
+    cursor.execute("SELECT COUNT(*) FROM qc_entries")
+    entries_before = cursor.fetchone()[0]
+    resolve_raw_file_sources(cursor)
+    
+    rekeyed = 0
+    if has_source_row:
+        cursor.execute("""
+            DELETE FROM qc_entries
+            WHERE data_source LIKE 'excel_%' AND source_row IS NULL
+              AND source_file IN (SELECT source_file FROM raw_src.qc_entries)
+        """)
+        rekeyed = cursor.rowcount
+    
+    # Raw rows that will be inserted rather than merged into an existing row;
+    # rows without a row number never merge
+    raw_row = 'raw.source_row' if has_source_row else 'NULL'
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM raw_src.qc_entries AS raw
+            WHERE date(raw.entry_date) = raw.entry_date
+              AND NOT EXISTS (
+                  SELECT 1 FROM qc_entries
+                  WHERE source_file = raw.source_file AND source_row = {raw_row}
+              )
+            GROUP BY raw.source_file, COALESCE({raw_row}, -raw.id)
+        )
+    """)
+    new_entries = cursor.fetchone()[0]
+    
+    cursor.execute(RAW_MIGRATION_SQL.format(source_row='source_row' if has_source_row else 'NULL'))
+    migrated = cursor.rowcount
+    cursor.execute("DROP TABLE temp.raw_file_sources")
+    
+    cursor.execute("SELECT COUNT(*) FROM qc_entries")
+    entries_after = cursor.fetchone()[0]
+    expected = entries_before - rekeyed + new_entries
+    if entries_after != expected:
+        raise RuntimeError(f"raw migration would leave {entries_after} entries instead of {expected}")
+    return migrated, rekeyed
+
+
+def migrate_from_existing_databases(bulk=False, db_path=None):
+    """
+    Optionally migrate from existing raw/cleaned databases as backup.
+    
+    The raw database is attached and copied with a single INSERT ... SELECT
+    (RAW_MIGRATION_SQL), so rows never pass through Python and memory use
+    does not grow with the size of the history. Rows are upserted on their
+    natural key, so re-running merges only new or changed rows, and rows
+    an older raw database left without a row number are replaced (see
+    merge_raw_entries); a raw database without sheet row numbers can only
+    be copied into a database with no Excel rows yet. Skipped once workbooks have been ingested
+    directly (Phase 2), which then owns the Excel rows. With bulk=True the
+    unified database runs with bulk-load pragmas and its indexes are rebuilt
+    after the load. db_path overrides UNIFIED_DB_PATH.
+    """
     print("\n" + "=" * 60)
     print("Phase 4: Migrating from Existing Databases (Backup)")
     print("=" * 60)
     
-    unified_conn = sqlite3.connect(UNIFIED_DB_PATH)
+    unified_conn = sqlite3.connect(db_path or UNIFIED_DB_PATH)
     unified_cursor = unified_conn.cursor()
     
-    # Check for existing entries to avoid duplicates
-    unified_cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE data_source LIKE 'excel_%'")
-    existing_excel_count = unified_cursor.fetchone()[0]
+    # Rows ingested straight from the workbooks must not be overwritten
+    unified_cursor.execute("""
+        SELECT COUNT(*) FROM qc_entries
+        WHERE data_source LIKE 'excel_%' AND source_file IN (SELECT filename FROM qc_files)
+    """)
+    ingested_excel_count = unified_cursor.fetchone()[0]
     
-    if existing_excel_count > 0:
-        print(f"⚠️  Found {existing_excel_count} Excel entries already in unified database")
+    if ingested_excel_count > 0:
+        print(f"⚠️  Found {ingested_excel_count} Excel entries already in unified database")
         print("   Skipping migration from existing databases (data already migrated from Excel files)")
         unified_conn.close()
         return True
     
+    unified_cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE data_source LIKE 'excel_%'")
+    existing_excel_count = unified_cursor.fetchone()[0]
+    
     migrated_any = False
     
     # Try raw database
     if os.path.exists(RAW_DB_PATH):
         print(f"\nAttempting to migrate from raw database: {RAW_DB_PATH}")
         try:
-            raw_conn = sqlite3.connect(RAW_DB_PATH)
-            raw_cursor = raw_conn.cursor()
-            
-            # Get entries from raw database
-            raw_cursor.execute("""
-                SELECT source_file, work_order, customer_name, entry_date, operator,
-                       part_name, start_time, finish_time, process_time, total_time,
-                       material, material_size, total_parts, yield_status, scrap_count,
-                       defects_count, notes, department, created_at
-                FROM qc_entries
-                WHERE entry_date IS NOT NULL
-                ORDER BY entry_date
-            """)
-            
-            raw_entries = raw_cursor.fetchall()
-            print(f"   Found {len(raw_entries)} entries in raw database")
-            
-            # Determine format version for each file (heuristic: assume v1 for old database)
-            # Or detect based on file modification date or date range
-            migrated_from_raw = 0
-            
-            for entry in raw_entries:  # Process ALL entries
-                (source_file, work_order, customer_name, entry_date, operator,
-                 part_name, start_time, finish_time, process_time, total_time,
-                 material, material_size, total_parts, yield_status, scrap_count,
-                 defects_count, notes, department, created_at) = entry
+            # ATTACH is not allowed inside a transaction
+            unified_conn.commit()
+            unified_cursor.execute("ATTACH DATABASE ? AS raw_src", (RAW_DB_PATH,))
+            try:
+                unified_cursor.execute("SELECT COUNT(*) FROM raw_src.qc_entries WHERE entry_date IS NOT NULL")
+                print(f"   Found {unified_cursor.fetchone()[0]} entries in raw database")
+                unified_cursor.execute("PRAGMA raw_src.table_info(qc_entries)")
+                has_source_row = 'source_row' in {row[1] for row in unified_cursor.fetchall()}
                 
-                # Heuristic: if entry_date is recent (after July 2025), likely v2
-                # Otherwise likely v1
-                try:
-                    if isinstance(entry_date, str):
-                        entry_date_obj = datetime.strptime(entry_date, '%Y-%m-%d').date()
-                    else:
-                        entry_date_obj = entry_date
-                    
-                    # July 2025 cutoff
-                    cutoff_date = datetime(2025, 7, 1).date()
-                    data_source = 'excel_v2' if entry_date_obj >= cutoff_date else 'excel_v1'
-                    
-                    # Normalize time
-                    total_time_minutes = None
-                    if total_time:
-                        if total_time > 24:
-                            total_time_minutes = total_time
-                        else:
-                            total_time_minutes = total_time * 60.0
-                    
+                migrated_from_raw = None
+                if has_source_row or existing_excel_count == 0:
+                    load_session = bulk_load(unified_conn) if bulk else nullcontext()
                     try:
-                        unified_cursor.execute("""
-                            INSERT INTO qc_entries (
-                                data_source, source_file, work_order, customer_name, entry_date,
-                                operator, part_name, start_time, finish_time, process_time_minutes,
-                                total_time_minutes, material, material_size, total_parts, parts_produced,
-                                defects_count, scrap_count, yield_status, notes, department, created_at
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            data_source, source_file, work_order, customer_name, entry_date,
-                            operator, part_name, start_time, finish_time,
-                            process_time * 60.0 if process_time and process_time <= 8 else process_time,
-                            total_time_minutes, material, material_size, total_parts, total_parts,
-                            defects_count, scrap_count, yield_status, notes, department, created_at
-                        ))
-                        migrated_from_raw += 1
-                    except sqlite3.IntegrityError:
-                        # Duplicate - skip
-                        pass
-                
-                except Exception as e:
-                    continue
+                        with load_session:
+                            migrated_from_raw, rekeyed = merge_raw_entries(unified_cursor, has_source_row)
+                            unified_conn.commit()
+                    except Exception:
+                        unified_conn.rollback()
+                        raise
+                    if rekeyed:
+                        print(f"   Replaced {rekeyed} entries migrated before sheet rows were numbered")
+            finally:
+                unified_conn.commit()
+                unified_cursor.execute("DETACH DATABASE raw_src")
             
-            unified_conn.commit()
-            raw_conn.close()
-            
-            if migrated_from_raw > 0:
-                print(f"   ✅ Migrated {migrated_from_raw} entries from raw database")
+            if migrated_from_raw is None:
+                print(f"   ⚠️  Raw database has no sheet row numbers and {existing_excel_count} Excel entries "
+                      f"are already migrated; rebuild qc_sheets.db to merge it")
+            elif migrated_from_raw > 0:
+                print(f"   ✅ Migrated {migrated_from_raw} new or changed entries from raw database")
+                migrated_any = True
+            elif existing_excel_count > 0:
+                print(f"   ✅ Unified database already matches the raw database")
                 migrated_any = True
             else:
                 print(f"   ⚠️  No entries migrated from raw database")
@@ -201,98 +879,252 @@ def migrate_from_existing_databases():
     return migrated_any
 
 
-def validate_data_integrity():
-    """Validate data integrity and print statistics."""
+def validate_data_integrity(db_path=None, report_path=None):
+    """
+    Validate data integrity and print statistics.
+    
+    The statistics come from validate_unified_database.collect_statistics,
+    which reads qc_entries in a single scan. With report_path they are also
+    written there as JSON. Returns False if the database is missing, fails
+    SQLite's quick_check or holds no QC entries; a rebuild is only promoted
+    when this passes.
+    """
+    from validate_unified_database import collect_statistics
+    
     print("\n" + "=" * 60)
     print("Phase 5: Data Validation")
     print("=" * 60)
     
-    if not os.path.exists(UNIFIED_DB_PATH):
-        print(f"❌ Unified database not found: {UNIFIED_DB_PATH}")
+    db_path = db_path or UNIFIED_DB_PATH
+    if not os.path.exists(db_path):
+        print(f"❌ Unified database not found: {db_path}")
         return False
     
-    conn = sqlite3.connect(UNIFIED_DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Count entries by source
-    cursor.execute("SELECT data_source, COUNT(*) FROM qc_entries GROUP BY data_source")
-    source_counts = cursor.fetchall()
+    cursor.execute("PRAGMA quick_check")
+    problems = [row[0] for row in cursor.fetchall() if row[0] != 'ok']
+    if problems:
+        print(f"❌ Database failed quick_check: {problems[0]}")
+        conn.close()
+        return False
+    
+    stats = collect_statistics(conn)
+    conn.close()
     
+    # Count entries by source
     print("\nEntries by data source:")
-    total_entries = 0
-    for source, count in source_counts:
-        print(f"  {source}: {count:,}")
-        total_entries += count
+    for source in stats['by_source']:
+        print(f"  {source['data_source']}: {source['entries']:,}")
     
+    total_entries = stats['total_entries']
     print(f"\nTotal entries: {total_entries:,}")
-    
-    # Date range
-    cursor.execute("SELECT MIN(entry_date), MAX(entry_date) FROM qc_entries WHERE entry_date IS NOT NULL")
-    date_range = cursor.fetchone()
-    if date_range[0] and date_range[1]:
-        print(f"Date range: {date_range[0]} to {date_range[1]}")
-    
-    # Operator counts
-    cursor.execute("SELECT COUNT(DISTINCT operator) FROM qc_entries WHERE operator IS NOT NULL")
-    operator_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(DISTINCT operator_id) FROM qc_entries WHERE operator_id IS NOT NULL")
-    operator_id_count = cursor.fetchone()[0]
-    print(f"Unique operators (name): {operator_count}")
-    print(f"Unique operators (ID): {operator_id_count}")
-    
-    # Work order counts
-    cursor.execute("SELECT COUNT(DISTINCT work_order) FROM qc_entries WHERE work_order IS NOT NULL")
-    wo_count = cursor.fetchone()[0]
-    print(f"Unique work orders: {wo_count}")
-    
-    # Department breakdown
-    cursor.execute("SELECT department, COUNT(*) FROM qc_entries WHERE department IS NOT NULL GROUP BY department")
-    dept_counts = cursor.fetchall()
-    if dept_counts:
-        print("\nEntries by department:")
-        for dept, count in dept_counts:
-            print(f"  {dept}: {count:,}")
-    
-    # Validation checks
-    print("\nValidation checks:")
-    
-    # Check for entries with missing required fields
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE entry_date IS NULL")
-    missing_dates = cursor.fetchone()[0]
-    if missing_dates > 0:
-        print(f"  ⚠️  {missing_dates} entries with missing entry_date")
+    valid = total_entries > 0
+    if valid:
+        # Date range
+        if stats['date_range']['min'] and stats['date_range']['max']:
+            print(f"Date range: {stats['date_range']['min']} to {stats['date_range']['max']}")
+        
+        # Operator and work order counts
+        print(f"Unique operators (name): {stats['operators']['unique_names']}")
+        print(f"Unique operators (ID): {stats['operators']['unique_ids']}")
+        print(f"Unique work orders: {stats['work_orders']['unique']}")
+        
+        # Department breakdown
+        if stats['departments']['counts']:
+            print("\nEntries by department:")
+            for dept, count in stats['departments']['counts']:
+                print(f"  {dept}: {count:,}")
+        
+        # Validation checks
+        print("\nValidation checks:")
+        checks = stats['checks']
+        if checks['missing_entry_date'] > 0:
+            print(f"  ⚠️  {checks['missing_entry_date']} entries with missing entry_date")
+        else:
+            print(f"  ✅ All entries have entry_date")
+        if checks['missing_operator'] > 0:
+            print(f"  ⚠️  {checks['missing_operator']} entries with missing operator info")
+        else:
+            print(f"  ✅ All entries have operator info")
+        
+        # Check data source distribution
+        print("\nData source distribution:")
+        for source in stats['by_source']:
+            if source['dated_entries']:
+                print(f"  {source['data_source']}: {source['dated_entries']:,} entries "
+                      f"({source['min_date']} to {source['max_date']})")
     else:
-        print(f"  ✅ All entries have entry_date")
+        print("❌ Unified database has no QC entries")
     
-    # Check for entries with no operator info
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE operator IS NULL AND operator_id IS NULL")
-    missing_operator = cursor.fetchone()[0]
-    if missing_operator > 0:
-        print(f"  ⚠️  {missing_operator} entries with missing operator info")
-    else:
-        print(f"  ✅ All entries have operator info")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump({'database': db_path, 'validated_at': datetime.now().isoformat(timespec='seconds'),
+                       'quick_check': 'ok', 'statistics': stats, 'valid': valid}, f, indent=2)
+        print(f"\n📝 Validation report written to {report_path}")
+    return valid
+
+
+def remove_database_files(db_path):
+    """Delete a database file together with any rollback journal left next to it."""
+    for path in (db_path, db_path + '-journal'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def carry_over_live_data(shadow_path, live_path, replace_tables=()):
+    """
+    Copy what only the live database holds into a finished shadow build.
     
-    # Check data source distribution
-    print("\nData source distribution:")
-    cursor.execute("""
-        SELECT data_source, 
-               COUNT(*) as count,
-               MIN(entry_date) as min_date,
-               MAX(entry_date) as max_date
-        FROM qc_entries
-        WHERE entry_date IS NOT NULL
-        GROUP BY data_source
-    """)
-    source_stats = cursor.fetchall()
-    for source, count, min_date, max_date in source_stats:
-        print(f"  {source}: {count:,} entries ({min_date} to {max_date})")
+    Tables the build does not create (the web app's operators, departments,
+    machines and Asana cache) are copied whole with their indexes and
+    triggers, and so are the qc_entries the app inserted directly
+    (direct_input rows without a source_entry_id, which no source can
+    rebuild). App entries keep their id unless the build already used it;
+    those get a new one. Safe to run again: replace_tables, the tables an
+    earlier run copied, are dropped and the app entries re-copied.
+    Returns (names of the tables copied, entries copied, entries renumbered).
+    """
+    conn = sqlite3.connect(shadow_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (live_path,))
+    except sqlite3.Error:
+        conn.close()
+        return [], 0, 0
+    try:
+        for name in replace_tables:
+            conn.execute(f'DROP TABLE IF EXISTS main."{name}"')
+        live_tables = conn.execute("""
+            SELECT name, sql FROM live.sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+              AND name NOT IN (SELECT name FROM main.sqlite_master WHERE type = 'table')
+        """).fetchall()
+        for name, sql in live_tables:
+            conn.execute(sql)
+            conn.execute(f'INSERT INTO main."{name}" SELECT * FROM live."{name}"')
+            for (object_sql,) in conn.execute("""
+                SELECT sql FROM live.sqlite_master
+                WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL
+            """, (name,)).fetchall():
+                conn.execute(object_sql)
+        
+        app_entries = "data_source = 'direct_input' AND source_entry_id IS NULL"
+        conn.execute(f"DELETE FROM main.qc_entries WHERE {app_entries}")
+        shadow_columns = {row[1] for row in conn.execute("PRAGMA main.table_info(qc_entries)")}
+        columns = ', '.join(row[1] for row in conn.execute("PRAGMA live.table_info(qc_entries)")
+                            if row[1] in shadow_columns and row[1] != 'id')
+        entries = renumbered = 0
+        if columns:
+            conn.execute(f"""
+                CREATE TEMP TABLE taken_ids AS
+                SELECT id FROM live.qc_entries
+                WHERE {app_entries} AND id IN (SELECT id FROM main.qc_entries)
+            """)
+            entries = conn.execute(f"""
+                INSERT INTO main.qc_entries (id, {columns})
+                SELECT id, {columns} FROM live.qc_entries
+                WHERE {app_entries} AND id NOT IN (SELECT id FROM temp.taken_ids)
+            """).rowcount
+            renumbered = conn.execute(f"""
+                INSERT INTO main.qc_entries ({columns})
+                SELECT {columns} FROM live.qc_entries
+                WHERE {app_entries} AND id IN (SELECT id FROM temp.taken_ids)
+                ORDER BY id
+            """).rowcount
+            conn.execute("DROP TABLE temp.taken_ids")
+        conn.commit()
+        return [name for name, _ in live_tables], entries + renumbered, renumbered
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def promote_shadow_database(shadow_path, live_path):
+    """
+    Atomically replace live_path with a finished shadow database.
     
-    conn.close()
-    return True
+    Live-only tables and app-entered rows are first copied into the shadow
+    without any lock (carry_over_live_data). BEGIN IMMEDIATE on the live
+    database is then taken and held across the rename, so no writer is
+    mid-transaction (its rollback journal would otherwise end up next to
+    the new file); if PRAGMA data_version shows a write since the copy, the
+    copy is redone under the lock. The shadow is synced to disk and renamed
+    over the live file, so a reader opening live_path sees either the old
+    or the new database, never a partial one.
+    
+    Writers blocked on the lock resume against the replaced file once it is
+    released, so what they write then is lost unless they check the file
+    again after locking, as the web app's writeTransaction does
+    (qc-feedback-system/lib/db.ts). Returns (tables copied, entries copied,
+    entries renumbered).
+    """
+    live_conn = None
+    carried = ([], 0, 0)
+    try:
+        if os.path.exists(live_path):
+            live_conn = sqlite3.connect(live_path, timeout=SWAP_LOCK_TIMEOUT, isolation_level=None)
+            version = live_conn.execute("PRAGMA data_version").fetchone()[0]
+            carried = carry_over_live_data(shadow_path, live_path)
+            live_conn.execute("BEGIN IMMEDIATE")
+            if live_conn.execute("PRAGMA data_version").fetchone()[0] != version:
+                carried = carry_over_live_data(shadow_path, live_path, replace_tables=carried[0])
+        with open(shadow_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(shadow_path, live_path)
+        # Make the rename itself durable
+        dir_fd = os.open(os.path.dirname(os.path.abspath(live_path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    finally:
+        if live_conn is not None:
+            if live_conn.in_transaction:
+                live_conn.execute("ROLLBACK")
+            live_conn.close()
+    tables, entries, renumbered = carried
+    return len(tables), entries, renumbered
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Build the unified QC database.")
+    parser.add_argument('--recreate', '-r', action='store_true',
+                        help="Rebuild the unified database from scratch in a shadow file and swap it in "
+                             "once validation passes (the previous database is snapshotted first)")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Number of worker processes used to parse workbooks (default: 1, serial)")
+    parser.add_argument('--reader', choices=('openpyxl', 'xml'), default='openpyxl',
+                        help="Sheet reader: openpyxl, or xml for the faster standard-library reader "
+                             "(falls back to openpyxl per workbook when needed)")
+    parser.add_argument('--no-row-cache', action='store_true',
+                        help="Parse every workbook instead of replaying rows cached from earlier runs")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Import byte-identical copies of other workbooks instead of skipping them")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Bulk-load mode: ingest pragmas, deferred index builds and batched commits")
+    parser.add_argument('--transaction-size', type=int, default=DEFAULT_TRANSACTION_SIZE,
+                        help=f"Rows per commit when migrating (default: {DEFAULT_TRANSACTION_SIZE})")
+    parser.add_argument('--validation-report', metavar='PATH',
+                        help="Also write the Phase 5 statistics and checks to PATH as JSON")
+    parser.add_argument('--backup', action='store_true',
+                        help="Take a verified online snapshot of the unified database, prune old ones and exit")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and ingest new or changed QC sheets from the forms directory")
+    parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_INTERVAL,
+                        help=f"Seconds between directory scans in watch mode (default: {WATCH_POLL_INTERVAL})")
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help=f"Seconds a changed file must stay unchanged before it is ingested (default: {WATCH_DEBOUNCE_SECONDS})")
+    return parser.parse_args(argv)
 
 
 def main():
     """Main function to build unified QC database."""
+    args = parse_args()
+    
     print("=" * 60)
     print("Unified QC Database Builder")
     print("=" * 60)
@@ -300,42 +1132,73 @@ def main():
     print(f"QC Forms Directory: {QC_FORMS_DIR}")
     print(f"Production Management DB: {PROD_MGMT_DB_PATH}")
     
-    # Check if we should recreate the database
-    recreate = False
-    if len(sys.argv) > 1 and sys.argv[1] in ['--recreate', '-r']:
-        recreate = True
-        if os.path.exists(UNIFIED_DB_PATH):
-            print(f"\n⚠️  Recreating database (existing will be backed up)")
-            backup_path = f"{UNIFIED_DB_PATH}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            import shutil
-            shutil.copy2(UNIFIED_DB_PATH, backup_path)
-            os.remove(UNIFIED_DB_PATH)
-            print(f"   Backup saved to: {backup_path}")
+    if args.backup:
+        from backup_unified_database import backup_unified_database
+        print()
+        backup_unified_database(UNIFIED_DB_PATH)
+        return
+    
+    # A recreate builds into a shadow file; the live database stays readable
+    # until the finished build is swapped in
+    build_path = UNIFIED_DB_PATH
+    if args.recreate:
+        build_path = UNIFIED_DB_PATH + SHADOW_DB_SUFFIX
+        print(f"\n⚠️  Recreating database in shadow file: {build_path}")
+        remove_database_files(build_path)
     
     # Phase 1: Create unified schema
     print("\n" + "=" * 60)
     print("Phase 1: Creating Unified Database Schema")
     print("=" * 60)
     
-    conn = sqlite3.connect(UNIFIED_DB_PATH)
+    conn = sqlite3.connect(build_path)
     if not create_unified_schema(conn):
         print("❌ Failed to create schema. Exiting.")
         conn.close()
         return
     
+    if args.recreate and os.path.exists(UNIFIED_DB_PATH):
+        carried = carry_over_sheet_templates(conn, UNIFIED_DB_PATH)
+        if carried:
+            print(f"✅ Kept {carried} QC sheet template classifications from the previous database")
     conn.close()
     
+    if args.watch and not args.recreate:
+        watch_qc_forms_dir(args.poll_interval, args.debounce, args.reader, not args.no_row_cache)
+        return
+    
     # Phase 2: Migrate Excel data (v1 and v2)
-    excel_success = migrate_excel_data()
+    excel_success = migrate_excel_data(workers=args.workers, bulk=args.bulk,
+                                       transaction_size=args.transaction_size,
+                                       keep_duplicates=args.keep_duplicates,
+                                       reader=args.reader,
+                                       use_row_cache=not args.no_row_cache,
+                                       db_path=build_path)
     
     # Phase 3: Migrate direct input data
-    direct_input_success = migrate_direct_input_data()
+    direct_input_success = migrate_direct_input_data(db_path=build_path)
     
-    # Phase 4: Optionally migrate from existing databases as backup
-    migrate_from_existing_databases()
+    # Phase 4: Fall back to an existing qc_sheets.db when Phase 2 loaded no Excel rows
+    migrate_from_existing_databases(bulk=args.bulk, db_path=build_path)
     
     # Phase 5: Validate data integrity
-    validation_success = validate_data_integrity()
+    validation_success = validate_data_integrity(build_path, report_path=args.validation_report)
+    
+    if args.recreate:
+        if not validation_success:
+            print(f"\n❌ Validation failed; {UNIFIED_DB_PATH} was left unchanged")
+            print(f"   Shadow build kept for inspection: {build_path}")
+            return
+        if os.path.exists(UNIFIED_DB_PATH):
+            from backup_unified_database import backup_unified_database
+            print("\nBacking up the previous database...")
+            backup_unified_database(UNIFIED_DB_PATH)
+        tables, entries, renumbered = promote_shadow_database(build_path, UNIFIED_DB_PATH)
+        print(f"\n✅ Swapped the rebuilt database into place")
+        if tables or entries:
+            print(f"   Kept {tables} web app tables and {entries} app-entered QC entries from the previous database")
+        if renumbered:
+            print(f"⚠️  {renumbered} app-entered QC entries got a new id (the rebuild had used theirs)")
     
     # Final summary
     print("\n" + "=" * 60)
@@ -346,6 +1209,9 @@ def main():
     print(f"Data validation: {'✅ Success' if validation_success else '❌ Failed'}")
     print(f"\nUnified database location: {UNIFIED_DB_PATH}")
     print("\n✅ Unified database build complete!")
+    
+    if args.watch:
+        watch_qc_forms_dir(args.poll_interval, args.debounce, args.reader, not args.no_row_cache)
 
 
 if __name__ == "__main__":
@@ -8,40 +8,13 @@ import sqlite3
 from datetime import datetime
 from collections import defaultdict
 from operator_mapping import get_operator_alias, get_all_operator_aliases
+from qc_operator_days import require_report_tables
+from qc_time_units import entry_minutes_sql
 
 # Database path
 DB_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/qc_sheets.db"
 CSV_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/Detailed_12-27-2025_____.csv"
 
-def normalize_time_to_minutes(time_value):
-    """
-    Normalize time value to minutes.
-    
-    The raw database contains mixed units:
-    - Values > 24 are MINUTES (e.g., 450 = 450 minutes = 7.5 hours)
-    - Values <= 8 are likely HOURS (e.g., 1.75 = 1.75 hours)
-    - Values 8-24 are ambiguous and require heuristics
-    """
-    if time_value is None or time_value <= 0:
-        return None
-    
-    COMMON_MINUTE_VALUES = [30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330, 360, 390, 420, 450, 480, 510]
-    
-    if time_value > 24:
-        return time_value  # Already in minutes
-    
-    if time_value <= 8:
-        return time_value * 60.0  # Convert hours to minutes
-    
-    # Ambiguous range (8 < value <= 24)
-    if time_value in COMMON_MINUTE_VALUES:
-        return time_value  # Treat as minutes
-    
-    if time_value % 1 == 0 and time_value % 60 == 0:
-        return time_value * 60.0  # Likely hours
-    
-    return time_value * 60.0  # Default: treat as hours
-
 # Mapping from CSV employee names (Last, First) to canonical operator names
 # This maps the CSV format to the operator mapping system
 # Uses standardized names from operator_mapping.py
@@ -109,44 +82,47 @@ def get_csv_times():
 def get_qc_times():
     """Load times worked from QC database."""
     conn = sqlite3.connect(DB_PATH)
+    require_report_tables(conn)
     cursor = conn.cursor()
     
     qc_times = defaultdict(lambda: defaultdict(float))  # operator -> date -> hours
     
-    # Query all entries with time data
+    # Hours per canonical operator and day, from the operator_day_minutes
+    # fact table (see qc_operator_days)
     cursor.execute("""
         SELECT 
+            operator_canonical,
             entry_date,
-            operator,
-            total_time,
-            process_time
-        FROM qc_entries
-        WHERE entry_date IS NOT NULL
-        AND entry_date > '2000-01-01'
+            SUM(minutes) / 60.0
+        FROM operator_day_minutes
+        WHERE entry_date > '2000-01-01'
         AND entry_date < '2100-01-01'
-        AND (total_time IS NOT NULL OR process_time IS NOT NULL)
-        ORDER BY entry_date, operator
+        AND operator_canonical IS NOT NULL
+        AND timed_entries > 0
+        GROUP BY operator_canonical, entry_date
+        ORDER BY entry_date, operator_canonical
     """)
     
-    for row in cursor.fetchall():
-        date, operator, total_time, process_time = row
-        
-        if not operator or not date:
-            continue
-        
-        # Use total_time if available, otherwise process_time
-        raw_time = total_time if total_time else (process_time if process_time else None)
-        
-        if raw_time and raw_time > 0:
-            # Normalize time to minutes, then convert to hours
-            minutes = normalize_time_to_minutes(raw_time)
-            if minutes:
-                hours = minutes / 60.0
-                
-                # Normalize operator name
-                normalized = get_operator_alias(operator)
-                if normalized:
-                    qc_times[normalized][date] += hours
+    for operator, date, hours in cursor.fetchall():
+        qc_times[operator][date] = hours
+    
+    # Each operator's share of group entries ("Z,F"), from the
+    # qc_entry_operators bridge (see qc_entry_operators)
+    cursor.execute(f"""
+        SELECT 
+            eo.operator_canonical,
+            e.entry_date,
+            SUM(({entry_minutes_sql('e.')}) * eo.share) / 60.0 AS hours
+        FROM qc_entry_operators eo
+        JOIN qc_entries e ON e.id = eo.entry_id
+        WHERE e.entry_date > '2000-01-01'
+        AND e.entry_date < '2100-01-01'
+        GROUP BY eo.operator_canonical, e.entry_date
+        HAVING hours IS NOT NULL
+    """)
+    
+    for operator, date, hours in cursor.fetchall():
+        qc_times[operator][date] += hours
     
     conn.close()
     return qc_times
@@ -308,4 +284,7 @@ def compare_times():
             print(f"{operator}: {qc_total:.2f} hours in QC, no CSV match found")
 
 if __name__ == "__main__":
-    compare_times()
+    try:
+        compare_times()
+    except RuntimeError as e:
+        print(f"❌ {e}")
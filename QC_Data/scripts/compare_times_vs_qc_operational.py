@@ -9,27 +9,12 @@ import sqlite3
 from datetime import datetime
 from collections import defaultdict
 from operator_mapping import get_operator_alias
+from qc_operator_days import require_report_tables
+from qc_time_units import entry_minutes_sql
 
 DB_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/qc_sheets.db"
 CSV_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/Detailed_12-27-2025_____.csv"
 
-def normalize_time_to_minutes(time_value):
-    """Normalize time value to minutes."""
-    if time_value is None or time_value <= 0:
-        return None
-    
-    COMMON_MINUTE_VALUES = [30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330, 360, 390, 420, 450, 480, 510]
-    
-    if time_value > 24:
-        return time_value
-    if time_value <= 8:
-        return time_value * 60.0
-    if time_value in COMMON_MINUTE_VALUES:
-        return time_value
-    if time_value % 1 == 0 and time_value % 60 == 0:
-        return time_value * 60.0
-    return time_value * 60.0
-
 EMPLOYEE_NAME_MAPPING = {
     "Baltazar, Jesus": "Jesus Baltazar",
     "Magdaleno, Jesus": "Jesus Magdaleno",
@@ -90,44 +75,53 @@ def get_csv_times():
 def get_qc_times():
     """Load times worked from QC database (actual work performed)."""
     conn = sqlite3.connect(DB_PATH)
+    require_report_tables(conn)
     cursor = conn.cursor()
     
     qc_times = defaultdict(lambda: defaultdict(float))
     qc_by_dept = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))  # date -> dept -> operator -> hours
     
+    # Read from the operator_day_minutes fact table (see qc_operator_days)
     cursor.execute("""
         SELECT 
+            operator_canonical,
             entry_date,
-            operator,
             department,
-            total_time,
-            process_time
-        FROM qc_entries
-        WHERE entry_date IS NOT NULL
-        AND entry_date > '2000-01-01'
+            SUM(minutes) / 60.0
+        FROM operator_day_minutes
+        WHERE entry_date > '2000-01-01'
         AND entry_date < '2100-01-01'
-        AND (total_time IS NOT NULL OR process_time IS NOT NULL)
-        ORDER BY entry_date, operator
+        AND operator_canonical IS NOT NULL
+        AND timed_entries > 0
+        GROUP BY operator_canonical, entry_date, department
+        ORDER BY entry_date, operator_canonical
     """)
     
-    for row in cursor.fetchall():
-        date, operator, department, total_time, process_time = row
-        
-        if not operator or not date:
-            continue
-        
-        raw_time = total_time if total_time else (process_time if process_time else None)
-        
-        if raw_time and raw_time > 0:
-            minutes = normalize_time_to_minutes(raw_time)
-            if minutes:
-                hours = minutes / 60.0
-                
-                normalized = get_operator_alias(operator)
-                if normalized:
-                    qc_times[normalized][date] += hours
-                    if department:
-                        qc_by_dept[date][department][normalized] += hours
+    for operator, date, department, hours in cursor.fetchall():
+        qc_times[operator][date] += hours
+        if department:
+            qc_by_dept[date][department][operator] += hours
+    
+    # Each operator's share of group entries ("Z,F"), from the
+    # qc_entry_operators bridge (see qc_entry_operators)
+    cursor.execute(f"""
+        SELECT 
+            eo.operator_canonical,
+            e.entry_date,
+            COALESCE(e.department, ''),
+            SUM(({entry_minutes_sql('e.')}) * eo.share) / 60.0 AS hours
+        FROM qc_entry_operators eo
+        JOIN qc_entries e ON e.id = eo.entry_id
+        WHERE e.entry_date > '2000-01-01'
+        AND e.entry_date < '2100-01-01'
+        GROUP BY eo.operator_canonical, e.entry_date, COALESCE(e.department, '')
+        HAVING hours IS NOT NULL
+    """)
+    
+    for operator, date, department, hours in cursor.fetchall():
+        qc_times[operator][date] += hours
+        if department:
+            qc_by_dept[date][department][operator] += hours
     
     conn.close()
     return qc_times, qc_by_dept
@@ -338,4 +332,7 @@ def compare_times():
             print(f"{employee} ({operator}): {csv_total:.2f} hours, {first_date} to {last_date}")
 
 if __name__ == "__main__":
-    compare_times()
+    try:
+        compare_times()
+    except RuntimeError as e:
+        print(f"❌ {e}")
@@ -7,58 +7,25 @@ import sqlite3
 import csv
 from datetime import datetime
 from pathlib import Path
-from operator_mapping import get_operator_alias, INITIAL_MAPPINGS, NAME_VARIATIONS
+from qc_operator_days import require_report_tables
 
 DB_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/qc_sheets.db"
 OUTPUT_FILE = "/Users/zax/SDP/SDP Prod Mgmt Engine/Reports/Filiberto_QC_Entries_Export.csv"
 
-def get_all_filiberto_operators():
-    """Get all operator name variations that map to Filiberto."""
-    filiberto_variations = set()
-    
-    # Check canonical name
-    filiberto_variations.add("Filiberto")
-    
-    # Check initial mappings
-    for initial, canonical in INITIAL_MAPPINGS.items():
-        if canonical == "Filiberto":
-            filiberto_variations.add(initial)
-            filiberto_variations.add(initial.upper())
-            filiberto_variations.add(initial.lower())
-            filiberto_variations.add(initial.capitalize())
-    
-    # Check name variations
-    for variation, canonical in NAME_VARIATIONS.items():
-        if canonical == "Filiberto":
-            filiberto_variations.add(variation)
-            filiberto_variations.add(variation.upper())
-            filiberto_variations.add(variation.lower())
-    
-    # Common variations found in data
-    additional_variations = [
-        "FH", "Fh", "fh", "F.H", "F,h", "F;h",
-        "Filiberto", "filiberto", "FILIBERTO",
-        "Z,F", "F,H", "F,H,RC"  # Group entries
-    ]
-    filiberto_variations.update(additional_variations)
-    
-    return list(filiberto_variations)
+OPERATOR_CANONICAL = "Filiberto"
 
 def export_filiberto_entries():
     """Export all QC entries for Filiberto to CSV."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # Enable column access by name
+    require_report_tables(conn, tables=('qc_entry_operators',))
     cursor = conn.cursor()
     
-    # Get all operator variations
-    filiberto_operators = get_all_filiberto_operators()
-    
-    print(f"Searching for Filiberto entries with operator variations: {filiberto_operators[:10]}...")
+    print(f"Searching for entries resolved to {OPERATOR_CANONICAL}, alone or in a group...")
     
-    # Build query - use LIKE to catch variations
-    placeholders = ','.join(['?'] * len(filiberto_operators))
+    # Index seeks on the resolved operator and the group entry bridge
     
-    query = f"""
+    query = """
         SELECT 
             id,
             source_file,
@@ -82,15 +49,13 @@ def export_filiberto_entries():
             created_at,
             updated_at
         FROM qc_entries
-        WHERE operator IN ({placeholders})
-           OR operator LIKE 'F%H%'
-           OR operator LIKE '%Filiberto%'
-           OR operator LIKE '%FH%'
+        WHERE operator_canonical = ?
+           OR id IN (SELECT entry_id FROM qc_entry_operators WHERE operator_canonical = ?)
         ORDER BY entry_date ASC, id ASC
     """
     
     # Execute query
-    cursor.execute(query, filiberto_operators)
+    cursor.execute(query, (OPERATOR_CANONICAL, OPERATOR_CANONICAL))
     rows = cursor.fetchall()
     
     print(f"\nFound {len(rows)} QC entries for Filiberto")
@@ -150,4 +115,7 @@ if __name__ == "__main__":
     print("=" * 80)
     print("Filiberto QC Entries Export")
     print("=" * 80)
-    export_filiberto_entries()
+    try:
+        export_filiberto_entries()
+    except RuntimeError as e:
+        print(f"❌ {e}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+SDP QC Workbook Generator
+Writes synthetic QC sheet workbooks shaped like the ones in the QC forms
+directory, for benchmarking and exercising the database builders.
+
+Both sheet layouts are produced: v1 sheets (2024 and earlier style) log
+PROCESS/TOTAL TIME in hours, v2 sheets log them in minutes and add a
+MATERIAL SIZE column. Sheets start with a few title rows before the header,
+mix the DATE encodings seen in practice (datetimes, mm/dd/yyyy text, Excel
+serials, "YYYY-MM-DD 00:00:00" text and the odd unreadable value) and use
+group operator strings like "F,H,RC". Workbook i is generated from seed + i,
+so a run is reproducible regardless of the number of workers.
+"""
+
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from functools import partial
+
+import openpyxl
+
+CUSTOMERS = [
+    "ACME", "BLUE RIDGE", "CASCADE FAB", "DELTA MARINE", "EVERGREEN",
+    "FRONTIER", "GRANITE WORKS", "HARBOR SIGNS", "IRONWOOD", "JUNIPER",
+]
+
+OPERATORS = [
+    "F", "H", "RC", "JE", "Z", "WJ", "Kaleb", "Filiberto", "Fh", "Router RT",
+    "F,H,RC", "Z,F", "Jc+Zb", "F/H", "JE & Z", "fh ", " WJ", None,
+]
+
+MATERIALS = ["ALU", "ACRYLIC", "PVC", "HDPE", "MDF", "BRASS", "STEEL"]
+MATERIAL_SIZES = ["4x8", "5x10", "48x96", "1/4\"", "0.125", None]
+YIELDS = ["GOOD", "GOOD", "GOOD", "100%", "SCRAP 2", "2 SCRAP", "scrap", "DEFECT 1", "BAD", None]
+
+# Header layouts; v1 times are in hours, v2 times in minutes
+SHEET_LAYOUTS = {
+    'v1': ["DATE", "OPERATOR", "PART NAME", "START", "FINISH", "PROCESS TIME",
+           "TOTAL TIME", "MATERIAL", "TOTAL PARTS", "YIELD"],
+    'v2': ["DATE (mm/dd/yyyy)", "OPERATOR", "PART NAME", "MATERIAL", "MATERIAL SIZE",
+           "START", "PROCESS TIME", "FINISH", "TOTAL TIME", "TOTAL PARTS", "YIELD"],
+}
+LAYOUT_DATE_RANGES = {
+    'v1': (datetime(2023, 6, 1), datetime(2025, 6, 30)),
+    'v2': (datetime(2025, 7, 1), datetime(2026, 6, 30)),
+}
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def encode_date(rng, day):
+    """Return day as one of the DATE cell encodings found in real sheets."""
+    kind = rng.random()
+    if kind < 0.55:
+        return day
+    if kind < 0.75:
+        return day.strftime('%m/%d/%Y')
+    if kind < 0.85:
+        return (day - EXCEL_EPOCH).days
+    if kind < 0.95:
+        return day.strftime('%Y-%m-%d 00:00:00')
+    return rng.choice(["n/a", "SEE ABOVE", "13/45/2025"])
+
+def make_row(rng, layout, day):
+    """Build the cell values of one sheet row for the given layout."""
+    start_minutes = rng.randrange(6 * 60, 16 * 60, 5)
+    process_minutes = rng.choice([5, 10, 15, 30, 45, 60, 90, 120, 240, 450])
+    total_minutes = process_minutes + rng.choice([0, 5, 10, 15, 30])
+    finish_minutes = min(start_minutes + total_minutes, 23 * 60 + 55)
+    if layout == 'v1':
+        process_time, total_time = process_minutes / 60, total_minutes / 60
+    else:
+        process_time, total_time = process_minutes, total_minutes
+    if rng.random() < 0.05:
+        process_time = None
+    if rng.random() < 0.03:
+        total_time = "TBD"
+
+    values = {
+        'DATE': encode_date(rng, day),
+        'OPERATOR': rng.choice(OPERATORS),
+        'PART NAME': f"PART-{rng.randint(1, 400):03d}",
+        'START': time(start_minutes // 60, start_minutes % 60),
+        'FINISH': time(finish_minutes // 60, finish_minutes % 60),
+        'PROCESS TIME': process_time,
+        'TOTAL TIME': total_time,
+        'MATERIAL': rng.choice(MATERIALS),
+        'MATERIAL SIZE': rng.choice(MATERIAL_SIZES),
+        'TOTAL PARTS': rng.choice([rng.randint(1, 500), str(rng.randint(1, 50)), None]),
+        'YIELD': rng.choice(YIELDS),
+    }
+    return [values[header.split(' (')[0]] for header in SHEET_LAYOUTS[layout]]
+
+def workbook_filename(index, seed):
+    """Return the QC form filename for workbook index, e.g. "ACME PO 10042.xlsx"."""
+    customer = CUSTOMERS[(index + seed) % len(CUSTOMERS)]
+    return f"{customer} PO {10000 + index}.xlsx"
+
+def write_workbook(index, out_dir, seed=0, min_rows=5, max_rows=60, v2_share=0.5):
+    """Generate workbook index into out_dir; returns (path, data row count)."""
+    rng = random.Random(seed + index)
+    layout = 'v2' if rng.random() < v2_share else 'v1'
+    first_day, last_day = LAYOUT_DATE_RANGES[layout]
+    day = first_day + timedelta(days=rng.randint(0, (last_day - first_day).days))
+    filename = workbook_filename(index, seed)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("QC")
+    # Title block above the header, 0-4 rows
+    title_rows = [
+        ["SDP QUALITY CONTROL SHEET"],
+        ["Customer:", filename.split(" PO ")[0]],
+        ["Work Order:", 10000 + index],
+        [],
+    ]
+    for title_row in title_rows[:rng.randint(0, len(title_rows))]:
+        ws.append(title_row)
+    ws.append(SHEET_LAYOUTS[layout])
+
+    row_count = rng.randint(min_rows, max_rows)
+    for _ in range(row_count):
+        # Jobs run over a few days, most rows share the previous row's date
+        if rng.random() < 0.2:
+            day += timedelta(days=1)
+        ws.append(make_row(rng, layout, day))
+
+    path = os.path.join(out_dir, filename)
+    wb.save(path)
+    return path, row_count
+
+def generate_workbooks(out_dir, count, seed=0, min_rows=5, max_rows=60, v2_share=0.5, workers=1):
+    """Generate count workbooks into out_dir; returns (paths, total data rows)."""
+    os.makedirs(out_dir, exist_ok=True)
+    write = partial(write_workbook, out_dir=out_dir, seed=seed, min_rows=min_rows,
+                    max_rows=max_rows, v2_share=v2_share)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(write, range(count), chunksize=64))
+    else:
+        results = [write(index) for index in range(count)]
+    return [path for path, _ in results], sum(rows for _, rows in results)
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Generate synthetic QC sheet workbooks.")
+    parser.add_argument('out_dir', help="Directory to write the workbooks to")
+    parser.add_argument('--count', '-n', type=int, default=100,
+                        help="Number of workbooks to generate (default: 100)")
+    parser.add_argument('--min-rows', type=int, default=5, help="Minimum data rows per sheet (default: 5)")
+    parser.add_argument('--max-rows', type=int, default=60, help="Maximum data rows per sheet (default: 60)")
+    parser.add_argument('--v2-share', type=float, default=0.5,
+                        help="Fraction of sheets using the v2 layout (default: 0.5)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Number of worker processes (default: 1)")
+    return parser.parse_args(argv)
+
+def main():
+    """Main function to generate QC workbooks."""
+    args = parse_args()
+    start = datetime.now()
+    paths, rows = generate_workbooks(args.out_dir, args.count, args.seed, args.min_rows,
+                                     args.max_rows, args.v2_share, args.workers)
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"✅ Wrote {len(paths):,} workbooks ({rows:,} rows) to {args.out_dir} in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,11 @@ Proves or disproves whether operators have logged more QC entries than are being
 """
 
 import sqlite3
-from collections import defaultdict
 from datetime import datetime
-from operator_mapping import get_operator_alias, get_all_operator_aliases
+from operator_mapping import get_all_operator_aliases
+from qc_time_units import ENTRY_MINUTES_SQL, entry_minutes_sql
+from qc_operator_days import require_report_tables
+from qc_trigram_index import get_search_index, search
 
 DB_PATH = "/Users/zax/SDP/SDP Prod Mgmt Engine/qc_sheets.db"
 
@@ -20,94 +22,71 @@ INVESTIGATION_OPERATORS = {
     "Kaleb": ["Kaleb", "Kaleb Starkey", "Starkey, Kaleb"],
 }
 
-def normalize_time_to_minutes(time_value):
-    """Normalize time value to minutes."""
-    if time_value is None or time_value <= 0:
-        return None
-    
-    COMMON_MINUTE_VALUES = [30, 60, 90, 120, 150, 180, 210, 240, 270, 300, 330, 360, 390, 420, 450, 480, 510]
-    
-    if time_value > 24:
-        return time_value
-    if time_value <= 8:
-        return time_value * 60.0
-    if time_value in COMMON_MINUTE_VALUES:
-        return time_value
-    if time_value % 1 == 0 and time_value % 60 == 0:
-        return time_value * 60.0
-    return time_value * 60.0
-
 def get_all_raw_operator_names():
     """Get all unique raw operator names from QC database."""
     conn = sqlite3.connect(DB_PATH)
+    require_report_tables(conn, tables=())
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT DISTINCT operator
+        SELECT DISTINCT operator, operator_canonical
         FROM qc_entries
         WHERE operator IS NOT NULL
         ORDER BY operator
     """)
     
     raw_operators = {}
-    for row in cursor.fetchall():
-        raw_name = row[0]
+    for raw_name, standardized in cursor.fetchall():
         if raw_name:
-            standardized = get_operator_alias(raw_name)
             raw_operators[raw_name] = standardized
     
     conn.close()
     return raw_operators
 
-def find_potential_matches(raw_operators, search_terms):
-    """Find raw operator names that might match search terms."""
+def find_potential_matches(conn, search_terms):
+    """
+    Find raw operator names similar to the search terms, as (raw name,
+    canonical operator) pairs, best first per term, from the operator
+    trigram index cached for this process (see qc_trigram_index).
+    """
+    search_index = get_search_index(conn, ('operator',))
     matches = []
-    search_lower = [term.lower() for term in search_terms]
-    
-    for raw_name, standardized in raw_operators.items():
-        raw_lower = raw_name.lower()
-        # Check if any search term appears in the raw name
-        for term in search_lower:
-            if term in raw_lower or raw_lower in term:
-                matches.append((raw_name, standardized))
-                break
+    seen = set()
+    for term in search_terms:
+        for match in search(search_index, term, limit=None):
+            if match['value'] not in seen:
+                seen.add(match['value'])
+                matches.append((match['value'], match['canonical']))
     
     return matches
 
 def analyze_operator_qc_entries(operator_canonical, search_terms):
     """Analyze all QC entries for an operator."""
     conn = sqlite3.connect(DB_PATH)
+    require_report_tables(conn)
     cursor = conn.cursor()
     
     # Get all aliases for this operator
     aliases = get_all_operator_aliases(operator_canonical)
     
-    # Query 1: Entries that match via standardization
-    # Get all aliases and check if operator maps to our canonical name
-    cursor.execute("""
+    # Query 1: Entries that match via standardization, an index seek on the
+    # canonical operator resolved at ingest (see qc_operator_resolver)
+    cursor.execute(f"""
         SELECT 
             entry_date,
             operator,
-            total_time,
-            process_time,
+            operator_canonical,
+            {ENTRY_MINUTES_SQL},
             department,
             work_order
         FROM qc_entries
-        WHERE operator IS NOT NULL
+        WHERE operator_canonical = ?
         AND entry_date IS NOT NULL
         AND entry_date > '2000-01-01'
         AND entry_date < '2100-01-01'
         ORDER BY entry_date
-    """)
-    
-    all_entries = cursor.fetchall()
-    standardized_entries = []
-    for entry in all_entries:
-        date, operator, total_time, process_time, department, work_order = entry
-        if operator:
-            mapped = get_operator_alias(operator)
-            if mapped == operator_canonical:
-                standardized_entries.append((date, operator, mapped, total_time, process_time, department, work_order))
+    """, (operator_canonical,))
+    standardized_entries = cursor.fetchall()
     
     # Query 2: Entries with raw names that match aliases
     placeholders = ','.join(['?' for _ in aliases])
@@ -115,8 +94,8 @@ def analyze_operator_qc_entries(operator_canonical, search_terms):
         SELECT 
             entry_date,
             operator,
-            total_time,
-            process_time,
+            operator_canonical,
+            {ENTRY_MINUTES_SQL},
             department,
             work_order
         FROM qc_entries
@@ -127,98 +106,70 @@ def analyze_operator_qc_entries(operator_canonical, search_terms):
         ORDER BY entry_date
     """, aliases)
     
-    raw_matched = cursor.fetchall()
-    raw_matched_entries = []
-    for entry in raw_matched:
-        date, operator, total_time, process_time, department, work_order = entry
-        mapped = get_operator_alias(operator) if operator else None
-        raw_matched_entries.append((date, operator, mapped, total_time, process_time, department, work_order))
+    raw_matched_entries = cursor.fetchall()
     
-    # Query 3: Group entries that might contain this operator
-    group_patterns = []
-    for alias in aliases:
-        if len(alias) >= 2:
-            group_patterns.append(f"%{alias}%")
+    # Query 3: Group entries this operator worked on, through the
+    # qc_entry_operators bridge; minutes are the operator's share
+    cursor.execute(f"""
+        SELECT 
+            e.entry_date,
+            e.operator,
+            eo.operator_canonical,
+            ({entry_minutes_sql('e.')}) * eo.share,
+            e.department,
+            e.work_order
+        FROM qc_entry_operators eo
+        JOIN qc_entries e ON e.id = eo.entry_id
+        WHERE eo.operator_canonical = ?
+        AND e.entry_date IS NOT NULL
+        AND e.entry_date > '2000-01-01'
+        AND e.entry_date < '2100-01-01'
+        ORDER BY e.entry_date
+    """, (operator_canonical,))
     
-    if group_patterns:
-        # Build LIKE conditions
-        like_conditions = ' OR '.join(['operator LIKE ?' for _ in group_patterns])
-        cursor.execute(f"""
-            SELECT 
-                entry_date,
-                operator,
-                total_time,
-                process_time,
-                department,
-                work_order
-            FROM qc_entries
-            WHERE ({like_conditions})
-            AND (operator LIKE '%+%' OR operator LIKE '%,%' OR operator LIKE '%/%' OR operator LIKE '%-%')
-            AND entry_date IS NOT NULL
-            AND entry_date > '2000-01-01'
-            AND entry_date < '2100-01-01'
-            ORDER BY entry_date
-        """, group_patterns)
-        
-        group_raw = cursor.fetchall()
-        group_entries = []
-        for entry in group_raw:
-            date, operator, total_time, process_time, department, work_order = entry
-            mapped = get_operator_alias(operator) if operator else None
-            group_entries.append((date, operator, mapped, total_time, process_time, department, work_order))
-    else:
-        group_entries = []
+    group_entries = cursor.fetchall()
     
-    # Query 4: Find all raw operator names that contain search terms (potential unmapped entries)
-    search_matches = []
-    for term in search_terms:
-        cursor.execute("""
-            SELECT DISTINCT operator
-            FROM qc_entries
-            WHERE operator LIKE ?
-            AND entry_date IS NOT NULL
-            AND entry_date > '2000-01-01'
-            AND entry_date < '2100-01-01'
-        """, (f'%{term}%',))
-        
-        for row in cursor.fetchall():
-            raw_name = row[0]
-            if raw_name and raw_name not in [m[0] for m in search_matches]:
-                std_name = get_operator_alias(raw_name)
-                search_matches.append((raw_name, std_name))
+    # Query 4: Raw operator names similar to the search terms (potential
+    # unmapped entries), from the trigram index (see qc_trigram_index)
+    search_matches = find_potential_matches(conn, search_terms)
     
+    standardized_totals = operator_day_totals(cursor, operator_canonical)
     conn.close()
     
     return {
         'standardized_entries': standardized_entries,
+        'standardized_totals': standardized_totals,
         'raw_matched_entries': raw_matched_entries,
         'group_entries': group_entries,
         'search_matches': search_matches
     }
 
+def operator_day_totals(cursor, operator_canonical):
+    """Total hours, days and sorted dates for a canonical operator, from operator_day_minutes."""
+    cursor.execute("""
+        SELECT entry_date, SUM(minutes) / 60.0
+        FROM operator_day_minutes
+        WHERE operator_canonical = ?
+        AND entry_date > '2000-01-01'
+        AND entry_date < '2100-01-01'
+        GROUP BY entry_date
+        ORDER BY entry_date
+    """, (operator_canonical,))
+    days = cursor.fetchall()
+    return sum(hours for _, hours in days), len(days), [date for date, _ in days]
+
 def calculate_hours_and_days(entries):
     """Calculate total hours and unique days from entries."""
     total_hours = 0
     unique_dates = set()
     
     for entry in entries:
-        # Entry format: (date, operator, standardized, total_time, process_time, department, work_order)
-        if len(entry) == 7:
-            date, _, _, total_time, process_time, _, _ = entry
-        else:
-            # Fallback for different entry formats
-            date = entry[0]
-            total_time = entry[3] if len(entry) > 3 else None
-            process_time = entry[4] if len(entry) > 4 else None
-        
+        # Entry format: (date, operator, standardized, minutes, department, work_order)
+        date, minutes = entry[0], entry[3]
         if date:
             unique_dates.add(date)
-        
-        raw_time = total_time if total_time else (process_time if process_time else None)
-        if raw_time and raw_time > 0:
-            minutes = normalize_time_to_minutes(raw_time)
-            if minutes:
-                total_hours += minutes / 60.0
+        if minutes:
+            total_hours += minutes / 60.0
     
     return total_hours, len(unique_dates), sorted(unique_dates)
 
@@ -246,7 +197,7 @@ def generate_investigation_report():
         analysis = analyze_operator_qc_entries(operator_canonical, search_terms)
         
         # Calculate statistics for standardized entries
-        std_hours, std_days, std_dates = calculate_hours_and_days(analysis['standardized_entries'])
+        std_hours, std_days, std_dates = analysis['standardized_totals']
         
         # Calculate statistics for raw matched entries
         raw_hours, raw_days, raw_dates = calculate_hours_and_days(analysis['raw_matched_entries'])
@@ -278,25 +229,24 @@ def generate_investigation_report():
         
         print(f"\n--- GROUP ENTRIES (containing this operator) ---")
         print(f"  Total entries: {len(analysis['group_entries'])}")
-        print(f"  Total hours: {group_hours:.2f}")
+        print(f"  Total hours (this operator's share): {group_hours:.2f}")
         print(f"  Unique dates: {group_days}")
         if analysis['group_entries']:
             print(f"  Example group entries:")
             for entry in analysis['group_entries'][:10]:
-                date, raw, std, _, _, dept, wo = entry
+                date, raw, std, _, dept, wo = entry
                 print(f"    {date}: '{raw}' → '{std}' (Dept: {dept}, WO: {wo})")
             if len(analysis['group_entries']) > 10:
                 print(f"    ... and {len(analysis['group_entries']) - 10} more")
         
         print(f"\n--- POTENTIAL UNMAPPED ENTRIES (fuzzy search) ---")
-        print(f"  Found {len(analysis['search_matches'])} raw operator names containing search terms:")
+        print(f"  Found {len(analysis['search_matches'])} raw operator names similar to search terms:")
         for raw_name, std_name in sorted(analysis['search_matches']):
             if std_name != operator_canonical:
                 print(f"    '{raw_name}' → currently mapped to '{std_name}'")
                 # Check if this should map to our operator
-                test_mapping = get_operator_alias(raw_name)
-                if test_mapping != operator_canonical and test_mapping:
-                    print(f"      ⚠️  Maps to '{test_mapping}' instead of '{operator_canonical}'")
+                if std_name:
+                    print(f"      ⚠️  Maps to '{std_name}' instead of '{operator_canonical}'")
         
         # Summary
         print(f"\n--- SUMMARY ---")
@@ -324,7 +274,7 @@ def generate_investigation_report():
     
     for operator_canonical, search_terms in INVESTIGATION_OPERATORS.items():
         analysis = analyze_operator_qc_entries(operator_canonical, search_terms)
-        std_hours, std_days, _ = calculate_hours_and_days(analysis['standardized_entries'])
+        std_hours, std_days, _ = analysis['standardized_totals']
         group_hours, group_days, _ = calculate_hours_and_days(analysis['group_entries'])
         
         total_std_days += std_days
@@ -349,10 +299,13 @@ def generate_investigation_report():
     print("=" * 100)
     print("\nThis report shows:")
     print("1. All QC entries that are currently matched to each operator (standardized)")
-    print("2. Group entries that might contain work by these operators")
+    print("2. Group entries these operators worked on, with their share of the hours")
     print("3. Potential unmapped entries that might belong to these operators")
     print("\nCompare these numbers to the 'comparison days' in the time comparison report")
     print("to determine if there are missing matches.")
 
 if __name__ == "__main__":
-    generate_investigation_report()
+    try:
+        generate_investigation_report()
+    except RuntimeError as e:
+        print(f"❌ {e}")
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Direct Input Sync
+Copies QC entries submitted through the web app from production_mgmt.db
+into the unified database, incrementally.
+
+Each run pulls only the source rows added or changed since the previous
+run. The high-water mark (the largest source rowid and updated_at seen) is
+kept per source in qc_sync_state and advanced in the same transaction as
+the rows it covers, so an interrupted run is simply repeated. Rows are
+upserted on (data_source, source_entry_id), with source_entry_id being the
+source rowid; a row that changed in the source, e.g. a qc_status move from
+draft to approved, updates its unified row in place. Rows updated in the
+same second as the watermark are pulled again on the next run and skipped
+by the upsert when nothing changed. Deleting a source row is not visible
+to an incremental run; --full re-reads the whole table and removes unified
+rows whose source row is gone.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+# Configuration
+UNIFIED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_unified.db"
+PROD_MGMT_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/production-management-app/backend/data/production_mgmt.db"
+
+# Source table in production_mgmt.db and its change-tracking column
+DIRECT_INPUT_TABLE = "qc_entries"
+DIRECT_INPUT_UPDATED_COLUMN = "updated_at"
+
+# qc_sync_state key for this source
+SYNC_SOURCE_NAME = "production_mgmt.qc_entries"
+
+# Columns copied from the source table into the unified qc_entries table
+# (the fields the web app records, see qc-feedback-system/lib/db.ts).
+# Columns missing from the source are copied as NULL.
+DIRECT_INPUT_COLUMNS = (
+    'work_order', 'customer_name', 'entry_date', 'operator', 'operator_id', 'part_name',
+    'start_timestamp', 'mid_timestamp', 'stop_timestamp', 'start_time', 'finish_time',
+    'process_time_minutes', 'total_time_minutes', 'setup_minutes', 'downtime_minutes',
+    'parts_produced', 'total_parts', 'defects_count', 'scrap_count', 'yield_status',
+    'material', 'material_size', 'downtime_category', 'notes', 'department',
+    'qc_status', 'reviewed_by', 'reviewed_at', 'asana_task_gid', 'utilization_pct', 'actual_ppm'
+)
+
+# Seconds between runs with --interval (default)
+SYNC_INTERVAL = 300
+
+
+def source_columns(conn):
+    """Return the column names of the attached source table."""
+    rows = conn.execute(f"PRAGMA direct_src.table_info({DIRECT_INPUT_TABLE})").fetchall()
+    return {row[1] for row in rows}
+
+
+def changed_rows_filter(track_updates):
+    """
+    WHERE clause selecting source rows past the watermark.
+
+    updated_at is compared with >= so that rows written in the same second
+    as the previous run's newest row are not missed.
+    """
+    if track_updates:
+        return f"rowid > ? OR {DIRECT_INPUT_UPDATED_COLUMN} >= ?"
+    return "rowid > ?"
+
+
+def build_sync_sql(available, track_updates):
+    """
+    Build the INSERT ... SELECT that upserts changed source rows.
+
+    Parameters are the rowid and updated_at watermarks. OR IGNORE skips
+    source rows the unified schema rejects (no entry_date, an unknown
+    qc_status) instead of failing the whole sync; the ON CONFLICT clause
+    only rewrites rows whose values changed.
+    """
+    values = [column if column in available else 'NULL' for column in DIRECT_INPUT_COLUMNS]
+    created_at = 'COALESCE(created_at, CURRENT_TIMESTAMP)' if 'created_at' in available else 'CURRENT_TIMESTAMP'
+    return f"""
+        INSERT OR IGNORE INTO qc_entries (data_source, source_entry_id, {', '.join(DIRECT_INPUT_COLUMNS)}, created_at)
+        SELECT 'direct_input', rowid, {', '.join(values)}, {created_at}
+        FROM direct_src.{DIRECT_INPUT_TABLE}
+        WHERE {changed_rows_filter(track_updates)}
+        ON CONFLICT(data_source, source_entry_id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in DIRECT_INPUT_COLUMNS)}
+        WHERE ({', '.join(f'qc_entries.{column}' for column in DIRECT_INPUT_COLUMNS)})
+            IS NOT ({', '.join(f'excluded.{column}' for column in DIRECT_INPUT_COLUMNS)})
+    """
+
+
+def sync_direct_input(conn, source_db_path, full=False):
+    """
+    Upsert the source rows added or changed since the last sync into conn.
+
+    With full=True the watermark is ignored, every source row is compared
+    and unified rows whose source row was deleted are removed. Returns a
+    dict with the rows pulled, changed and removed and the new watermark.
+    """
+    state = conn.execute("SELECT last_rowid, last_updated_at FROM qc_sync_state WHERE source = ?",
+                         (SYNC_SOURCE_NAME,)).fetchone()
+    last_rowid, last_updated_at = (0, None) if full or state is None else state
+
+    # ATTACH is not allowed inside a transaction
+    conn.commit()
+    conn.execute("ATTACH DATABASE ? AS direct_src", (source_db_path,))
+    try:
+        available = source_columns(conn)
+        if not available:
+            raise RuntimeError(f"table {DIRECT_INPUT_TABLE} not found in {source_db_path}")
+        track_updates = DIRECT_INPUT_UPDATED_COLUMN in available
+        params = (last_rowid, last_updated_at or '') if track_updates else (last_rowid,)
+        updated_expr = f"MAX({DIRECT_INPUT_UPDATED_COLUMN})" if track_updates else "NULL"
+
+        # One transaction: the source is read from a single snapshot and the
+        # watermark only moves if the rows it covers were written
+        conn.execute("BEGIN")
+        try:
+            pulled, max_rowid, max_updated_at = conn.execute(f"""
+                SELECT COUNT(*), MAX(rowid), {updated_expr}
+                FROM direct_src.{DIRECT_INPUT_TABLE}
+                WHERE {changed_rows_filter(track_updates)}
+            """, params).fetchone()
+            changed = conn.execute(build_sync_sql(available, track_updates), params).rowcount
+
+            removed = 0
+            if full:
+                removed = conn.execute(f"""
+                    DELETE FROM qc_entries
+                    WHERE data_source = 'direct_input' AND source_entry_id IS NOT NULL
+                      AND source_entry_id NOT IN (SELECT rowid FROM direct_src.{DIRECT_INPUT_TABLE})
+                """).rowcount
+
+            last_rowid = max(last_rowid, max_rowid or 0)
+            if max_updated_at is not None and (last_updated_at is None or max_updated_at > last_updated_at):
+                last_updated_at = max_updated_at
+            conn.execute("""
+                INSERT INTO qc_sync_state (source, last_rowid, last_updated_at, synced_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source) DO UPDATE SET
+                    last_rowid = excluded.last_rowid,
+                    last_updated_at = excluded.last_updated_at,
+                    synced_at = excluded.synced_at
+            """, (SYNC_SOURCE_NAME, last_rowid, last_updated_at))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("DETACH DATABASE direct_src")
+
+    return {'pulled': pulled, 'changed': changed, 'removed': removed, 'last_rowid': last_rowid,
+            'last_updated_at': last_updated_at, 'track_updates': track_updates}
+
+
+def migrate_direct_input(db_path=None, source_db_path=None, full=False):
+    """
+    Sync direct input entries from production_mgmt.db into the unified database.
+
+    Returns the sync_direct_input stats. db_path and source_db_path override
+    UNIFIED_DB_PATH and PROD_MGMT_DB_PATH.
+    """
+    source_db_path = source_db_path or PROD_MGMT_DB_PATH
+    if not os.path.exists(source_db_path):
+        raise FileNotFoundError(f"production management database not found: {source_db_path}")
+
+    conn = sqlite3.connect(db_path or UNIFIED_DB_PATH)
+    try:
+        has_state = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'qc_sync_state'").fetchone()
+        if not has_state:
+            # Unified databases built before the sync existed
+            from build_unified_qc_database import create_unified_schema
+            if not create_unified_schema(conn):
+                raise RuntimeError("could not upgrade the unified database schema")
+        stats = sync_direct_input(conn, source_db_path, full=full)
+    finally:
+        conn.close()
+
+    print(f"✅ Direct input: {stats['pulled']} source rows pulled, {stats['changed']} inserted or updated"
+          + (f", {stats['removed']} removed" if full else ""))
+    print(f"   Watermark: rowid {stats['last_rowid']}, {DIRECT_INPUT_UPDATED_COLUMN} {stats['last_updated_at']}")
+    if not stats['track_updates']:
+        print(f"   ⚠️  {DIRECT_INPUT_TABLE} has no {DIRECT_INPUT_UPDATED_COLUMN} column; "
+              f"only new rows are picked up (run with --full to refresh changed ones)")
+    return stats
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Incrementally sync web app QC entries from production_mgmt.db into the unified database.")
+    parser.add_argument('--db', default=UNIFIED_DB_PATH, help="Unified database (default: %(default)s)")
+    parser.add_argument('--source-db', default=PROD_MGMT_DB_PATH,
+                        help="Production management database (default: %(default)s)")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the watermark, compare every source row and remove deleted ones")
+    parser.add_argument('--interval', type=float, nargs='?', const=SYNC_INTERVAL,
+                        help=f"Keep running and sync every INTERVAL seconds (default: {SYNC_INTERVAL})")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to sync direct input entries."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("Direct Input Sync")
+    print("=" * 60)
+
+    if args.interval is None:
+        try:
+            migrate_direct_input(args.db, args.source_db, full=args.full)
+        except (sqlite3.Error, RuntimeError, FileNotFoundError) as e:
+            print(f"❌ Sync failed: {e}")
+        return
+
+    print(f"Syncing every {args.interval:g}s (Ctrl+C to stop)")
+    full = args.full
+    try:
+        while True:
+            print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]")
+            try:
+                migrate_direct_input(args.db, args.source_db, full=full)
+                full = False
+            except (sqlite3.Error, RuntimeError, FileNotFoundError) as e:
+                # Typically a lock held by the web app; retried next interval
+                print(f"❌ Sync failed: {e}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped syncing.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+QC Bulk Load Helpers
+SQLite settings and index handling used while (re)loading large batches of QC entries.
+"""
+
+from contextlib import contextmanager
+
+# Default number of rows written between commits in bulk-load mode
+DEFAULT_TRANSACTION_SIZE = 50000
+
+# Pragmas applied for the duration of a bulk load. The rollback journal is
+# kept in memory and fsyncs are skipped, so a crash mid-load can corrupt the
+# file; bulk mode is meant for rebuilds that can simply be re-run.
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -262144,  # 256 MiB
+    'temp_store': 'MEMORY',
+}
+
+
+def get_secondary_indexes(conn, table):
+    """Return (name, sql) for the explicitly created indexes on a table."""
+    cursor = conn.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+        ORDER BY name
+    """, (table,))
+    return cursor.fetchall()
+
+
+@contextmanager
+def bulk_load(conn, table='qc_entries', keep_indexes=()):
+    """
+    Apply bulk-load pragmas and defer index builds on table while loading.
+
+    Indexes not listed in keep_indexes are dropped on entry and rebuilt in
+    one pass on exit, which is much cheaper than maintaining them row by row.
+    Keep any index the load itself queries (e.g. the one behind a per-file
+    DELETE). Unique indexes are never deferred: upserts rely on them to
+    detect conflicting rows. The previous pragma values are restored on exit, even if the
+    load fails.
+    """
+    # journal_mode cannot change inside an open transaction
+    conn.commit()
+
+    previous = {}
+    for pragma, value in BULK_LOAD_PRAGMAS.items():
+        previous[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+    unique_indexes = {row[1] for row in conn.execute(f"PRAGMA index_list({table})") if row[2]}
+    deferred = [(name, sql) for name, sql in get_secondary_indexes(conn, table)
+                if name not in keep_indexes and name not in unique_indexes]
+    for name, _ in deferred:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        for _, sql in deferred:
+            conn.execute(sql)
+        conn.commit()
+        for pragma, value in previous.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+QC Entry Operators
+Maintains qc_entry_operators in qc_sheets.db: one row per operator of a
+group entry ("Z,F", "F,H,RC", "Jc+Zb"), with the share of the entry's time
+attributed to them, so per-operator hours and days can include group work
+through an indexed join instead of LIKE scans over qc_entries.
+
+Group spellings are split by qc_operator_resolver.group_members. Every
+member gets an equal share, 1 / number of members; members that cannot be
+resolved get no row, so their share stays unattributed. Entries of a
+single operator are not in the table, they carry operator_canonical
+themselves (group entries have none).
+
+The builder links each file's group entries as it imports them. A trigger
+drops an entry's rows when it is deleted, or when its operator is edited
+(re-link afterwards with --relink).
+
+Example, Filiberto's hours per day of group work:
+
+    SELECT e.entry_date, SUM(e.total_time_minutes * eo.share) / 60.0
+    FROM qc_entry_operators eo JOIN qc_entries e ON e.id = eo.entry_id
+    WHERE eo.operator_canonical = 'Filiberto'
+    GROUP BY e.entry_date
+"""
+
+import argparse
+import sqlite3
+
+from qc_operator_resolver import group_members
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+ENTRY_OPERATORS_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS qc_entry_operators (
+        entry_id INTEGER NOT NULL,
+        operator_canonical TEXT NOT NULL,
+        share REAL NOT NULL,
+        PRIMARY KEY (entry_id, operator_canonical)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_entry_operators_canonical
+        ON qc_entry_operators(operator_canonical, entry_id);
+    CREATE TRIGGER IF NOT EXISTS qc_entry_operators_delete
+    AFTER DELETE ON qc_entries
+    BEGIN
+        DELETE FROM qc_entry_operators WHERE entry_id = OLD.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS qc_entry_operators_update
+    AFTER UPDATE OF operator ON qc_entries
+    BEGIN
+        DELETE FROM qc_entry_operators WHERE entry_id = OLD.id;
+    END;
+"""
+
+
+def link_group_rows(cursor, operator, source_file=None):
+    """Add the bridge rows of the entries spelled operator (in source_file only, if given); returns rows added."""
+    members = group_members(operator)
+    if not members:
+        return 0
+    where = "operator = ?" + (" AND source_file = ?" if source_file is not None else "")
+    params = (operator,) + ((source_file,) if source_file is not None else ())
+    share = 1.0 / len(members)
+    linked = 0
+    for canonical in members:
+        if canonical:
+            linked += cursor.execute(f"""
+                INSERT OR IGNORE INTO qc_entry_operators (entry_id, operator_canonical, share)
+                SELECT id, ?, ? FROM qc_entries WHERE {where}
+            """, (canonical, share) + params).rowcount
+    return linked
+
+
+def link_file_entries(cursor, source_file, operators):
+    """Link the group entries of one imported file, given the operator spellings it contained."""
+    return sum(link_group_rows(cursor, operator, source_file) for operator in operators if operator)
+
+
+def link_entry_operators(conn, relink=False):
+    """
+    Link the group entries already in qc_entries (every entry with relink).
+
+    Group spellings resolved to a single operator by older builds lose
+    that operator_canonical here, in qc_entries and operator_day_minutes.
+    Returns (group spellings, bridge rows added).
+    """
+    if relink:
+        conn.execute("DELETE FROM qc_entry_operators")
+    has_operator_days = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'operator_day_minutes'").fetchone()
+    cursor = conn.cursor()
+    groups = 0
+    linked = 0
+    for (operator,) in conn.execute("SELECT DISTINCT operator FROM qc_entries WHERE operator IS NOT NULL").fetchall():
+        if not group_members(operator):
+            continue
+        groups += 1
+        linked += link_group_rows(cursor, operator)
+        cursor.execute("UPDATE qc_entries SET operator_canonical = NULL WHERE operator = ? "
+                       "AND operator_canonical IS NOT NULL", (operator,))
+        if has_operator_days:
+            cursor.execute("UPDATE operator_day_minutes SET operator_canonical = NULL WHERE operator = ? "
+                           "AND operator_canonical IS NOT NULL", (operator,))
+    conn.commit()
+    return groups, linked
+
+
+def ensure_entry_operators(conn):
+    """
+    Create qc_entry_operators and its triggers if missing, after adding
+    qc_entries.operator_canonical to databases that lack it.
+
+    A newly created table is filled from the existing qc_entries rows.
+    Returns True if the table was created.
+    """
+    from qc_operator_resolver import ensure_operator_canonical
+    ensure_operator_canonical(conn)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'qc_entry_operators'").fetchone()
+    conn.executescript(ENTRY_OPERATORS_SCHEMA_SQL)
+    if not exists:
+        link_entry_operators(conn)
+    return not exists
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Create or re-link the qc_entry_operators group bridge table in qc_sheets.db.")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--relink', action='store_true',
+                        help="Re-split every group entry (after a mapping change or operator edits)")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to maintain qc_entry_operators."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("QC Entry Operators")
+    print("=" * 60)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if ensure_entry_operators(conn):
+            print("Created qc_entry_operators and its triggers")
+        elif args.relink:
+            groups, linked = link_entry_operators(conn, relink=True)
+            print(f"Re-linked {groups} group spellings, {linked} bridge rows")
+        entries, rows, operators = conn.execute("""
+            SELECT COUNT(DISTINCT entry_id), COUNT(*), COUNT(DISTINCT operator_canonical)
+            FROM qc_entry_operators
+        """).fetchone()
+        print(f"✅ {entries} group entries linked to {operators} operators ({rows} bridge rows)")
+        for canonical, group_entries, shares in conn.execute("""
+            SELECT operator_canonical, COUNT(*), SUM(share)
+            FROM qc_entry_operators
+            GROUP BY operator_canonical
+            ORDER BY COUNT(*) DESC
+            LIMIT 10
+        """):
+            print(f"   {canonical}: {group_entries} group entries, {shares:.1f} entry shares")
+    except sqlite3.Error as e:
+        print(f"❌ Failed: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
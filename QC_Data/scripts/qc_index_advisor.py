@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+QC Database Index Advisor
+Replays the queries the analysis scripts run against qc_sheets.db, finds
+the ones SQLite answers with full scans or temp B-trees, and benchmarks
+candidate indexes for them.
+
+Work happens on a scratch copy of the database, so the live file is never
+modified. The workload is captured by running the analysis functions in
+WORKLOAD_FUNCTIONS against the copy with set_trace_callback on, so it is
+exactly the SQL the scripts execute today (operator_day_minutes, the
+qc_entry_operators bridge, ...). For every captured query the EXPLAIN
+QUERY PLAN is recorded and timed. Each flagged query gets candidate
+indexes, on the tables its flagged plan steps read, built from its
+predicates: a composite index (equality columns, then the range column,
+then ORDER BY columns), a covering variant that also holds every column
+the query reads, and partial variants restricted by the query's
+IS NOT NULL terms. Candidates are then chosen greedily: each round every
+remaining candidate is created in turn, the workload is re-planned, the
+queries whose plan changed are re-timed, and the candidate saving the most
+time is kept if it speeds some query up by at least MIN_SPEEDUP and
+MIN_SAVED_MS without slowing another down by more than
+REGRESSION_TOLERANCE.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from urllib.request import pathname2url
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+# Timed runs per query (the median is used), after one warm-up run
+REPEATS = 3
+
+# Speed-up a candidate must give its query to be recommended
+MIN_SPEEDUP = 1.25
+
+# ... and the time it must save it, so noise on small databases is ignored
+MIN_SAVED_MS = 5.0
+
+# Slow-down tolerated on the other workload queries
+REGRESSION_TOLERANCE = 0.10
+
+# An index lookup returning more than this share of the table is flagged
+LARGE_RESULT_FRACTION = 0.2
+
+# Candidates with more key + covered columns than this are not tried
+MAX_INDEX_COLUMNS = 8
+
+# Analysis script functions whose queries make up the workload, as
+# (module, function, arguments); '{operator}' in an argument stands for the
+# database's most frequent canonical operator. Each runs against the
+# scratch copy with its module's DB_PATH pointed there and its SQL captured
+# through set_trace_callback, so the workload follows the scripts as they
+# change. Add a function here when a script gains new queries.
+WORKLOAD_FUNCTIONS = [
+    ('compare_times_vs_qc', 'get_qc_times', ()),
+    ('compare_times_vs_qc_operational', 'get_qc_times', ()),
+    ('investigate_qc_entry_matching', 'get_all_raw_operator_names', ()),
+    ('investigate_qc_entry_matching', 'analyze_operator_qc_entries', ('{operator}', ['{operator}'])),
+    ('export_filiberto_qc_entries', 'export_filiberto_entries', ()),
+    ('analyze_qc_data', 'basic_stats', ()),
+    ('analyze_qc_data', 'top_operators', ()),
+    ('analyze_qc_data', 'top_customers', ()),
+    ('analyze_qc_data', 'department_stats', ()),
+    ('analyze_qc_data', 'yield_analysis', ()),
+    ('analyze_qc_data', 'time_analysis', ()),
+    ('analyze_qc_data', 'recent_activity', ()),
+]
+
+# Module-level output paths of the workload functions, redirected into the
+# scratch directory while they run
+OUTPUT_ATTRIBUTES = ('OUTPUT_FILE',)
+
+# Table references of a query: FROM/JOIN, the table and an optional alias
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'WHERE', 'JOIN', 'ON', 'USING', 'LEFT', 'INNER', 'CROSS', 'NATURAL', 'GROUP', 'ORDER',
+                'HAVING', 'LIMIT', 'UNION', 'EXCEPT', 'INTERSECT', 'WINDOW'}
+
+# String and number literals, replaced to group captured statements by shape
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fill_arguments(arguments, operator):
+    """A WORKLOAD_FUNCTIONS argument tuple with '{operator}' replaced."""
+    def fill(value):
+        if isinstance(value, list):
+            return [fill(item) for item in value]
+        return value.replace('{operator}', operator) if isinstance(value, str) else value
+    return tuple(fill(argument) for argument in arguments)
+
+
+def is_workload_query(sql):
+    """Whether a traced statement is a query of the data (not DDL, writes or catalogue lookups)."""
+    head = sql.lstrip().upper()
+    return head.startswith(('SELECT', 'WITH')) and 'SQLITE_MASTER' not in head
+
+
+def run_traced(module, function_name, arguments, db_path, scratch_dir):
+    """
+    Call a workload function against db_path and return the statements it ran.
+
+    Connections the function opens through sqlite3.connect trace their
+    statements, with parameters inlined (SQLite's expanded SQL). Its output
+    is discarded. Raises whatever the function raises, with the statements
+    run so far in the exception's 'statements' attribute.
+    """
+    statements = []
+    connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    overrides = {'DB_PATH': db_path}
+    overrides.update({attribute: os.path.join(scratch_dir, os.path.basename(getattr(module, attribute)))
+                      for attribute in OUTPUT_ATTRIBUTES if hasattr(module, attribute)})
+    previous = {attribute: getattr(module, attribute) for attribute in overrides}
+    for attribute, value in overrides.items():
+        setattr(module, attribute, value)
+    sqlite3.connect = traced_connect
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(module, function_name)(*arguments)
+    except Exception as e:
+        e.statements = statements
+        raise
+    finally:
+        sqlite3.connect = connect
+        for attribute, value in previous.items():
+            setattr(module, attribute, value)
+    return statements
+
+
+def capture_workload(db_path, scratch_dir, only=None):
+    """
+    Run the WORKLOAD_FUNCTIONS against db_path and collect their queries.
+
+    Statements of the same shape (differing only in literals, e.g. one
+    lookup per search match) are kept once. only restricts the run to
+    functions whose "module.function" name contains it. Returns (queries,
+    skipped): queries are dicts with the name and sql of each captured
+    query, skipped lists (name, reason) for functions that failed (e.g.
+    operator_mapping not installed); their queries up to the failure are
+    kept.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("""
+            SELECT operator_canonical FROM qc_entries WHERE operator_canonical IS NOT NULL
+            GROUP BY operator_canonical ORDER BY COUNT(*) DESC LIMIT 1
+        """).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    operator = row[0] if row else ''
+
+    queries, shapes, skipped = [], set(), []
+    for module_name, function_name, arguments in WORKLOAD_FUNCTIONS:
+        name = f"{module_name}.{function_name}"
+        if only and only not in name:
+            continue
+        try:
+            module = importlib.import_module(module_name)
+            statements = run_traced(module, function_name, fill_arguments(arguments, operator),
+                                    db_path, scratch_dir)
+        except Exception as e:
+            skipped.append((name, f"{type(e).__name__}: {e}"))
+            statements = getattr(e, 'statements', [])
+        captured = []
+        for sql in statements:
+            shape = (name, ' '.join(LITERALS.sub('?', sql).split()))
+            if is_workload_query(sql) and shape not in shapes:
+                shapes.add(shape)
+                captured.append(sql)
+        for number, sql in enumerate(captured, 1):
+            queries.append({'name': f"{name} #{number}" if len(captured) > 1 else name, 'sql': sql})
+    return queries, skipped
+
+
+def query_tables(sql, tables):
+    """Map each name a query uses for one of tables (the table's own name or its alias) to the table."""
+    names = {}
+    for table, alias in TABLE_REFERENCE.findall(sql):
+        if table in tables:
+            names[table] = table
+            if alias and alias.upper() not in SQL_KEYWORDS:
+                names[alias] = table
+    return names
+
+
+def table_sql(sql, names, table):
+    """
+    sql as seen from one of its tables, for query_columns: that table's
+    qualified columns lose their qualifier and other tables' qualified
+    columns are blanked out.
+    """
+    for name, name_table in names.items():
+        if name_table == table:
+            sql = re.sub(rf'\b{name}\.(?=\w)', '', sql)
+        else:
+            sql = re.sub(rf'\b{name}\.\w+', '?', sql)
+    return sql
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines for a query."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def step_table(step, names):
+    """The table a SCAN/SEARCH plan step reads, or None (subqueries, CTEs, other steps)."""
+    words = step.split()
+    if len(words) > 1 and words[0] in ('SCAN', 'SEARCH'):
+        return names.get(words[1])
+    return None
+
+
+def plan_flags(result, table_rows, names):
+    """
+    Return why a query's plan suggests a missing index.
+
+    Full table scans and temp B-trees are flagged, as are lookups through a
+    non-covering index that return more than LARGE_RESULT_FRACTION of the
+    table (e.g. the wide entry_date bounds the scripts use), which cost a
+    table lookup per row and are slower than a plain scan. names maps the
+    query's table names and aliases to tables (see query_tables).
+    """
+    flags = []
+    for step in result['plan']:
+        table = step_table(step, names)
+        if 'TEMP B-TREE' in step or (table and step.startswith('SCAN') and 'COVERING INDEX' not in step):
+            flags.append(step)
+        elif (table and ' USING INDEX ' in step and table_rows.get(table)
+              and result['rows'] > LARGE_RESULT_FRACTION * table_rows[table]):
+            flags.append(f"{step} reads {result['rows'] / table_rows[table]:.0%} of {table}")
+    return flags
+
+
+def time_query(conn, sql, repeats=REPEATS):
+    """Return (median wall time in milliseconds, rows) of fetching all rows, after a warm-up run."""
+    rows = len(conn.execute(sql).fetchall())
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+
+def table_columns(conn, table='qc_entries'):
+    """Return (column names, names of the NOT NULL columns) of table."""
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [row[1] for row in rows], {row[1] for row in rows if row[3]}
+
+
+def existing_index_keys(conn, table='qc_entries'):
+    """Key column tuples of the indexes already on table."""
+    keys = set()
+    for row in conn.execute(f"PRAGMA index_list({table})"):
+        keys.add(tuple(info[2] for info in conn.execute(f"PRAGMA index_info({row[1]})")))
+    return keys
+
+
+def strip_parentheses(text):
+    """Remove parenthesised groups, leaving the top-level terms of a clause."""
+    while True:
+        stripped = re.sub(r'\([^()]*\)', ' ', text)
+        if stripped == text:
+            return text
+        text = stripped
+
+
+def query_columns(sql, columns):
+    """
+    Classify the columns of one table a query uses (see table_sql for joins).
+
+    Returns a dict of equality columns (= or IN), range columns (<, >,
+    BETWEEN), LIKE columns, top-level IS NOT NULL columns (the only ones a
+    partial index may assume), ORDER BY / GROUP BY columns and every column
+    referenced, each in order of appearance. The rowid alias id is left
+    out; every index already ends with it.
+    """
+    names = '|'.join(sorted((column for column in columns if column != 'id'), key=len, reverse=True))
+    flat = ' '.join(sql.split())
+
+    def find(pattern, text=flat):
+        found = []
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            if match.group(1) not in found:
+                found.append(match.group(1))
+        return found
+
+    def clause(keyword, stop):
+        match = re.search(rf'\b{keyword}\s+(.+?)(?:\b(?:{stop})\b|$)', flat, re.IGNORECASE)
+        return match.group(1) if match else ''
+
+    def clause_columns(keyword, stop):
+        return find(rf'\b({names})\b', clause(keyword, stop))
+
+    equality = find(rf'\b({names})\s*(?:=|IN\s*\()')
+    return {
+        'equality': equality,
+        'range': [column for column in find(rf'\b({names})\s*(?:[<>]=?|BETWEEN\b)') if column not in equality],
+        'like': find(rf'\b({names})\s+(?:NOT\s+)?LIKE\b'),
+        'not_null': find(rf'\b({names})\s+IS\s+NOT\s+NULL\b',
+                         strip_parentheses(clause('WHERE', 'GROUP|ORDER|LIMIT'))),
+        'order': clause_columns('ORDER BY', 'LIMIT'),
+        'group': clause_columns('GROUP BY', 'HAVING|ORDER|LIMIT'),
+        'referenced': find(rf'\b({names})\b'),
+    }
+
+
+def candidate_indexes(used, existing_keys, not_null_columns=(), table='qc_entries'):
+    """
+    Candidate index definitions on table for a query from its query_columns().
+
+    Each is a dict with name, table, columns and an optional partial-index
+    predicate; candidates matching an existing index are left out, as are
+    IS NOT NULL predicates on columns declared NOT NULL.
+    """
+    key = []
+    for column in used['equality'] + used['range'][:1] + used['like'][:1] + used['group'] + used['order']:
+        if column not in key:
+            key.append(column)
+    if not key:
+        return []
+
+    variants = [('', key)]
+    covered = key + [column for column in used['referenced'] if column not in key]
+    if len(covered) > len(key) and len(covered) <= MAX_INDEX_COLUMNS:
+        variants.append(('_cov', covered))
+
+    predicate = ' AND '.join(f"{column} IS NOT NULL" for column in used['not_null']
+                             if column not in not_null_columns)
+    prefix = 'idx_qc' if table == 'qc_entries' else f'idx_{table}'
+    candidates = []
+    for suffix, columns in variants:
+        if tuple(columns) not in existing_keys:
+            candidates.append({'name': f"{prefix}_{'_'.join(key)}{suffix}", 'table': table, 'columns': columns,
+                               'where': None})
+        if predicate:
+            candidates.append({'name': f"{prefix}_{'_'.join(key)}{suffix}_partial", 'table': table,
+                               'columns': columns, 'where': predicate})
+    return candidates
+
+
+def index_definition(candidate):
+    """Table, columns and predicate of a candidate, without its name."""
+    definition = f"{candidate['table']}({', '.join(candidate['columns'])})"
+    return definition + (f" WHERE {candidate['where']}" if candidate['where'] else '')
+
+
+def index_sql(candidate):
+    """CREATE INDEX statement for a candidate."""
+    return f"CREATE INDEX IF NOT EXISTS {candidate['name']} ON {index_definition(candidate)}"
+
+
+def used_pages(conn):
+    """Pages in use (page_count minus the freelist)."""
+    return (conn.execute("PRAGMA page_count").fetchone()[0]
+            - conn.execute("PRAGMA freelist_count").fetchone()[0])
+
+
+def run_workload(conn, queries, repeats, baseline=None):
+    """
+    Plan and time every query; returns {name: {'plan', 'ms', 'rows'}}.
+
+    With a baseline, queries whose plan did not change keep the baseline
+    timing instead of being run again.
+    """
+    results = {}
+    for query in queries:
+        plan = explain(conn, query['sql'])
+        if baseline and baseline[query['name']]['plan'] == plan:
+            results[query['name']] = baseline[query['name']]
+        else:
+            ms, rows = time_query(conn, query['sql'], repeats)
+            results[query['name']] = {'plan': plan, 'ms': ms, 'rows': rows}
+    return results
+
+
+def evaluate_candidate(conn, candidate, queries, current, repeats):
+    """
+    Create a candidate on the scratch copy, re-run the workload against the
+    current timings and drop it again.
+    """
+    pages_before = used_pages(conn)
+    start = time.perf_counter()
+    conn.execute(index_sql(candidate))
+    build_ms = (time.perf_counter() - start) * 1000
+    pages = used_pages(conn) - pages_before
+    try:
+        results = run_workload(conn, queries, repeats, current)
+    finally:
+        conn.execute(f"DROP INDEX IF EXISTS {candidate['name']}")
+
+    speedups = {name: current[name]['ms'] / max(result['ms'], 1e-6) for name, result in results.items()}
+    saved = {name: current[name]['ms'] - result['ms'] for name, result in results.items()}
+    return {
+        'index': candidate,
+        'sql': index_sql(candidate),
+        'results': results,
+        'saved_ms': sum(saved.values()),
+        'helped': {name: round(speedup, 2) for name, speedup in speedups.items()
+                   if speedup >= MIN_SPEEDUP and saved[name] >= MIN_SAVED_MS},
+        'regressed': {name: round(speedup, 2) for name, speedup in speedups.items()
+                      if speedup < 1 / (1 + REGRESSION_TOLERANCE)},
+        'build_ms': round(build_ms, 1),
+        'pages': pages,
+    }
+
+
+def copy_to_scratch(db_path, scratch_dir):
+    """Copy db_path into scratch_dir with the online backup API; returns the copy's path."""
+    scratch_path = os.path.join(scratch_dir, os.path.basename(db_path))
+    source = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+    target = sqlite3.connect(scratch_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return scratch_path
+
+
+def prepare_scratch(scratch_path):
+    """Give the scratch copy the report tables build_qc_database sets up, if it lacks them."""
+    from qc_entry_operators import ensure_entry_operators
+    from qc_operator_days import refresh_operator_day_minutes
+    conn = sqlite3.connect(scratch_path)
+    try:
+        refresh_operator_day_minutes(conn)
+        ensure_entry_operators(conn)
+    finally:
+        conn.close()
+
+
+def collect_candidates(queries, results, schema, table_rows):
+    """
+    Candidate indexes for every flagged query, one per distinct definition and with unique names.
+
+    Candidates go on the tables of the flagged plan steps (every table of
+    the query when only a temp B-tree is flagged). schema maps each table
+    to its (columns, NOT NULL columns, existing index keys).
+    """
+    candidates, names = {}, set()
+    for query in queries:
+        flags = plan_flags(results[query['name']], table_rows, query['tables'])
+        if not flags:
+            continue
+        tables = {step_table(flag, query['tables']) for flag in flags} - {None}
+        for table in sorted(tables or set(query['tables'].values())):
+            columns, not_null_columns, existing_keys = schema[table]
+            used = query_columns(table_sql(query['sql'], query['tables'], table), columns)
+            for candidate in candidate_indexes(used, existing_keys, not_null_columns, table):
+                definition = index_definition(candidate)
+                if definition in candidates:
+                    continue
+                name, counter = candidate['name'], 1
+                while name in names:
+                    counter += 1
+                    name = f"{candidate['name']}_{counter}"
+                names.add(name)
+                candidates[definition] = dict(candidate, name=name)
+    return list(candidates.values())
+
+
+def advise_indexes(db_path=None, repeats=REPEATS, only=None):
+    """
+    Run the index advisor against a scratch copy of the analysis database.
+
+    The workload is captured from the analysis scripts on the scratch copy
+    (see capture_workload), after the report tables are set up on it. Candidates that helped nothing in a round are
+    not tried again. only restricts the workload to functions whose name
+    contains it. Returns a JSON-serialisable report of the plans, every
+    round of candidates and the recommended CREATE INDEX statements.
+    """
+    db_path = db_path or DB_PATH
+    scratch_dir = tempfile.mkdtemp(prefix='qc_index_advisor_')
+    try:
+        scratch_path = copy_to_scratch(db_path, scratch_dir)
+        prepare_scratch(scratch_path)
+        queries, skipped = capture_workload(scratch_path, scratch_dir, only)
+        conn = sqlite3.connect(scratch_path, isolation_level=None)
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        schema = {table: table_columns(conn, table) + (existing_index_keys(conn, table),) for table in tables}
+        table_rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+        for query in queries:
+            query['tables'] = query_tables(query['sql'], tables)
+
+        baseline = run_workload(conn, queries, repeats)
+        pool = collect_candidates(queries, baseline, schema, table_rows)
+
+        current = baseline
+        rounds = []
+        while pool:
+            tried = [evaluate_candidate(conn, candidate, queries, current, repeats) for candidate in pool]
+            useful = [result for result in tried if result['helped'] and not result['regressed']]
+            rounds.append(tried)
+            if not useful:
+                break
+            best = max(useful, key=lambda result: result['saved_ms'])
+            conn.execute(best['sql'])
+            current = best['results']
+            best['chosen'] = True
+            pool = [result['index'] for result in useful if result is not best]
+        conn.close()
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    chosen = [result for tried in rounds for result in tried if result.get('chosen')]
+    return {
+        'database': db_path,
+        'table_rows': table_rows,
+        'skipped': [{'function': name, 'reason': reason} for name, reason in skipped],
+        'queries': [
+            {'name': query['name'], 'sql': ' '.join(query['sql'].split()),
+             'rows': baseline[query['name']]['rows'], 'ms_before': round(baseline[query['name']]['ms'], 2),
+             'ms_after': round(current[query['name']]['ms'], 2), 'plan_before': baseline[query['name']]['plan'],
+             'plan_after': current[query['name']]['plan'],
+             'flags': plan_flags(baseline[query['name']], table_rows, query['tables'])}
+            for query in queries
+        ],
+        'rounds': [
+            [{'sql': result['sql'], 'saved_ms': round(result['saved_ms'], 2), 'helped': result['helped'],
+              'regressed': result['regressed'], 'pages': result['pages'], 'build_ms': result['build_ms'],
+              'chosen': bool(result.get('chosen'))}
+             for result in tried]
+            for tried in rounds
+        ],
+        'recommended': [result['sql'] for result in chosen],
+        'workload_ms_before': round(sum(result['ms'] for result in baseline.values()), 2),
+        'workload_ms_after': round(sum(result['ms'] for result in current.values()), 2),
+    }
+
+
+def print_report(report):
+    """Print an advisor report."""
+    print(f"\nDatabase: {report['database']} ({report['table_rows'].get('qc_entries', 0):,} entries)")
+    for skipped in report['skipped']:
+        print(f"⚠️  {skipped['function']} failed, queries after the failure are missing: {skipped['reason']}")
+    print("\n1. Workload Query Plans")
+    print("-" * 60)
+    if not report['queries']:
+        print("No queries captured.")
+    for query in report['queries']:
+        status = "⚠️ " if query['flags'] else "✅"
+        print(f"{status} {query['name']}  ({query['ms_before']:.1f} ms, {query['rows']:,} rows)")
+        for step in query['plan_before']:
+            print(f"      {'⚠️  ' if step in query['flags'] else ''}{step}")
+        for flag in query['flags']:
+            if flag not in query['plan_before']:
+                print(f"      ⚠️  {flag}")
+
+    print("\n2. Candidate Indexes")
+    print("-" * 60)
+    if not report['rounds']:
+        print("No flagged queries; nothing to try.")
+    for number, tried in enumerate(report['rounds'], 1):
+        print(f"Round {number}:")
+        for result in sorted(tried, key=lambda result: -result['saved_ms']):
+            marker = "✅" if result['chosen'] else "  "
+            print(f"{marker} {result['sql']}")
+            print(f"      saves {result['saved_ms']:,.1f} ms, {result['pages']:,} pages, "
+                  f"built in {result['build_ms']:.0f} ms")
+            for name, speedup in result['helped'].items():
+                print(f"      {speedup:.2f}x {name}")
+            for name, speedup in result['regressed'].items():
+                print(f"      ❌ {speedup:.2f}x {name}")
+
+    print("\n3. Recommendations")
+    print("-" * 60)
+    if not report['recommended']:
+        print("✅ No index improves the workload enough to recommend")
+        return
+    for sql in report['recommended']:
+        print(f"{sql};")
+    print()
+    for query in report['queries']:
+        if query['ms_after'] != query['ms_before']:
+            print(f"  {query['name']}: {query['ms_before']:,.1f} ms -> {query['ms_after']:,.1f} ms")
+    before, after = report['workload_ms_before'], report['workload_ms_after']
+    print(f"\nWorkload with the recommended indexes: {before:,.1f} ms -> {after:,.1f} ms "
+          f"({before / max(after, 1e-6):.2f}x)")
+    print("Add them where their table is created (e.g. build_qc_database.create_database_schema) "
+          "to apply them on the next build.")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Replay the analysis scripts' queries against qc_sheets.db and recommend benchmarked indexes.")
+    parser.add_argument('--db', default=DB_PATH, help="Database to analyse (default: %(default)s)")
+    parser.add_argument('--repeats', type=int, default=REPEATS,
+                        help=f"Timed runs per query (default: {REPEATS})")
+    parser.add_argument('--only', help="Only replay the workload functions whose name contains this text")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to run the index advisor."""
+    args = parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return
+
+    report = advise_indexes(args.db, repeats=max(1, args.repeats), only=args.only)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 60)
+    print("QC Database Index Advisor")
+    print("=" * 60)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+QC Operator Days
+Maintains operator_day_minutes in qc_sheets.db: minutes, entry count and
+parts per operator, entry date and department, so reports read a few
+thousand cells instead of rescanning qc_entries.
+
+The table is kept current by triggers on qc_entries. Every insert, delete
+or update of a counted column adds or subtracts that row's contribution,
+so the totals never need a rebuild and any writer (the builder, the
+sqlite3 shell) keeps them in step. The triggers are plain SQL, which is
+why cells are keyed by the raw operator spelling. operator_canonical is
+filled in for new cells by resolve_operator_canonical(), the only step
+that needs operator_mapping, which build_qc_database runs after each
+import. Reports only read the table; require_report_tables() makes them
+fail with a clear message on a database that was never set up.
+
+Rows without an operator or entry_date are not counted. department is ''
+for entries without one. minutes holds the sum of the entries' minutes
+(see qc_time_units.entry_minutes_sql) and timed_entries how many entries
+had any, so a cell with timed_entries = 0 has no recorded time.
+"""
+
+import argparse
+import sqlite3
+
+from qc_time_units import entry_minutes_sql
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+# Tables the reports read, besides qc_entries
+REPORT_TABLES = ('operator_day_minutes', 'qc_entry_operators')
+
+# qc_entries columns a cell total depends on; updates of other columns
+# (notes, material, ...) do not fire the update trigger
+COUNTED_COLUMNS = (
+    'operator', 'entry_date', 'department', 'total_time', 'process_time',
+    'total_time_minutes', 'process_time_minutes', 'total_parts'
+)
+
+OPERATOR_DAY_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS operator_day_minutes (
+        operator TEXT NOT NULL,
+        entry_date DATE NOT NULL,
+        department TEXT NOT NULL DEFAULT '',
+        operator_canonical TEXT,
+        minutes REAL NOT NULL DEFAULT 0,
+        timed_entries INTEGER NOT NULL DEFAULT 0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        parts INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (operator, entry_date, department)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_operator_day_canonical
+        ON operator_day_minutes(operator_canonical, entry_date);
+"""
+
+
+def cell_key_sql(row):
+    """WHERE clause matching the cell of a qc_entries row ('NEW.' or 'OLD.')."""
+    return (f"operator = {row}operator AND entry_date = {row}entry_date "
+            f"AND department = COALESCE({row}department, '')")
+
+
+def add_row_sql(row):
+    """Statement adding a qc_entries row's contribution to its cell."""
+    minutes = entry_minutes_sql(row)
+    return f"""
+        INSERT INTO operator_day_minutes (operator, entry_date, department,
+                                          minutes, timed_entries, entries, parts)
+        SELECT {row}operator, {row}entry_date, COALESCE({row}department, ''),
+               COALESCE({minutes}, 0), ({minutes}) IS NOT NULL, 1, COALESCE({row}total_parts, 0)
+        WHERE {row}operator IS NOT NULL AND {row}operator != '' AND {row}entry_date IS NOT NULL
+        ON CONFLICT(operator, entry_date, department) DO UPDATE SET
+            minutes = minutes + excluded.minutes,
+            timed_entries = timed_entries + excluded.timed_entries,
+            entries = entries + 1,
+            parts = parts + excluded.parts;
+    """
+
+
+def remove_row_sql(row):
+    """Statements subtracting a qc_entries row's contribution and dropping emptied cells."""
+    minutes = entry_minutes_sql(row)
+    return f"""
+        UPDATE operator_day_minutes SET
+            minutes = CASE WHEN timed_entries - (({minutes}) IS NOT NULL) = 0 THEN 0
+                           ELSE minutes - COALESCE({minutes}, 0) END,
+            timed_entries = timed_entries - (({minutes}) IS NOT NULL),
+            entries = entries - 1,
+            parts = parts - COALESCE({row}total_parts, 0)
+        WHERE {cell_key_sql(row)};
+        DELETE FROM operator_day_minutes WHERE {cell_key_sql(row)} AND entries <= 0;
+    """
+
+
+OPERATOR_DAY_TRIGGERS_SQL = f"""
+    CREATE TRIGGER IF NOT EXISTS operator_day_minutes_insert
+    AFTER INSERT ON qc_entries
+    BEGIN
+        {add_row_sql('NEW.')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS operator_day_minutes_delete
+    AFTER DELETE ON qc_entries
+    BEGIN
+        {remove_row_sql('OLD.')}
+    END;
+    CREATE TRIGGER IF NOT EXISTS operator_day_minutes_update
+    AFTER UPDATE OF {', '.join(COUNTED_COLUMNS)} ON qc_entries
+    BEGIN
+        {remove_row_sql('OLD.')}
+        {add_row_sql('NEW.')}
+    END;
+"""
+
+# Full recompute from qc_entries, used when the table is first created
+REBUILD_SQL = f"""
+    INSERT INTO operator_day_minutes (operator, entry_date, department,
+                                      minutes, timed_entries, entries, parts)
+    SELECT operator, entry_date, COALESCE(department, ''),
+           COALESCE(SUM({entry_minutes_sql()}), 0), COUNT({entry_minutes_sql()}),
+           COUNT(*), COALESCE(SUM(total_parts), 0)
+    FROM qc_entries
+    WHERE operator IS NOT NULL AND operator != '' AND entry_date IS NOT NULL
+    GROUP BY operator, entry_date, COALESCE(department, '')
+"""
+
+
+def rebuild_operator_day_minutes(conn):
+    """Recompute every cell from qc_entries; returns the number of cells."""
+    conn.execute("DELETE FROM operator_day_minutes")
+    cells = conn.execute(REBUILD_SQL).rowcount
+    conn.commit()
+    return cells
+
+
+def ensure_operator_day_minutes(conn):
+    """
+    Create operator_day_minutes and its triggers if missing.
+
+    A newly created table is filled from the existing qc_entries rows
+    (qc_entries must already have the minutes columns). Returns True if
+    the table was created.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'operator_day_minutes'").fetchone()
+    conn.executescript(OPERATOR_DAY_SCHEMA_SQL + OPERATOR_DAY_TRIGGERS_SQL)
+    if not exists:
+        rebuild_operator_day_minutes(conn)
+    return not exists
+
+
+def resolve_operator_canonical(conn, remap=False):
+    """
+    Fill operator_canonical for spellings that have none yet (every
+    spelling with remap, after operator_mapping changed). Returns the
+    number of cells updated.
+    """
+    from qc_sql_functions import register_functions
+    register_functions(conn)
+    where = "" if remap else "WHERE operator_canonical IS NULL"
+    updated = conn.execute(
+        f"UPDATE operator_day_minutes SET operator_canonical = operator_alias(operator) {where}").rowcount
+    conn.commit()
+    return updated
+
+
+def refresh_operator_day_minutes(conn):
+    """Bring a qc_sheets.db's minutes columns and operator_day_minutes up to date (writes to conn)."""
+    from qc_time_units import ensure_time_minutes
+    ensure_time_minutes(conn)
+    ensure_operator_day_minutes(conn)
+    resolve_operator_canonical(conn)
+
+
+def require_report_tables(conn, tables=REPORT_TABLES):
+    """
+    Raise RuntimeError unless conn's database has the given tables and the
+    qc_entries columns reports read (operator_canonical and the minutes
+    columns). Reports never create them; the builder does.
+    """
+    from qc_time_units import TIME_MINUTES_COLUMNS
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(qc_entries)")}
+    missing = [table for table in tables if table not in existing]
+    missing += [f"qc_entries.{column}" for column in ('operator_canonical', *TIME_MINUTES_COLUMNS)
+                if column not in columns]
+    if missing:
+        db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+        raise RuntimeError(f"{db_path} is missing {', '.join(missing)}; set it up with build_qc_database.py, "
+                           "or qc_operator_days.py and qc_entry_operators.py --db <path>")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Create, rebuild or re-resolve the operator_day_minutes fact table in qc_sheets.db.")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute every cell from qc_entries")
+    parser.add_argument('--remap', action='store_true',
+                        help="Re-resolve canonical operators for every spelling (after a mapping change)")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to maintain operator_day_minutes."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("QC Operator Days")
+    print("=" * 60)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        from qc_time_units import ensure_time_minutes
+        ensure_time_minutes(conn)
+        if ensure_operator_day_minutes(conn):
+            print("Created operator_day_minutes and its triggers")
+        elif args.rebuild:
+            print(f"Rebuilt {rebuild_operator_day_minutes(conn)} cells")
+        print(f"Resolved {resolve_operator_canonical(conn, remap=args.remap or args.rebuild)} cells")
+        cells, operators, unresolved = conn.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT operator_canonical), COUNT(DISTINCT
+                   CASE WHEN operator_canonical IS NULL THEN operator END)
+            FROM operator_day_minutes
+        """).fetchone()
+        print(f"✅ {cells} operator-day cells, {operators} canonical operators, "
+              f"{unresolved} unmapped spellings")
+    except (sqlite3.Error, ImportError) as e:
+        print(f"❌ Failed: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+QC Operator Resolver
+Resolves the operator spellings found on QC sheets ("Fh", "F.h", "F;h",
+"f,h", "FILIBERTO") to canonical operator names, and keeps the result in
+an indexed operator_canonical column of qc_sheets.db so per-operator
+queries are index seeks instead of LIKE scans.
+
+The alias map is built once per process from operator_mapping
+(NAME_VARIATIONS, INITIAL_MAPPINGS and the canonical names themselves)
+and the operators roster in qc_unified.db. Every alias is stored under
+two keys:
+
+- a loose key: case-folded with runs of whitespace collapsed
+- a compact key: case-folded with all punctuation and whitespace removed,
+  so "F.h", "F;h" and "f,h" all become "fh"
+
+A spelling is looked up by loose key first, then by compact key. Compact
+keys shared by aliases of different operators are ambiguous and never
+used. Spellings that miss both fall back to
+operator_mapping.get_operator_alias, which handles fuzzy matches. Without
+operator_mapping only the roster is used and unknown spellings resolve to
+None.
+
+Group entries ("Z,F", "F,H,RC", "Jc+Zb") are split on the separators in
+GROUP_SEPARATORS into their operators, which qc_entry_operators stores in
+a bridge table. A group has no single canonical operator, so it resolves
+to None here.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+from functools import lru_cache
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+UNIFIED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_unified.db"
+
+# Characters ignored by compact keys
+PUNCTUATION = re.compile(r'[\W_]+')
+
+# Separators between the operators of a group entry; kept by split() so
+# runs of parts can be rejoined as written
+GROUP_SEPARATORS = re.compile(r'(\s*[+,/&;-]\s*|\s+and\s+)', re.IGNORECASE)
+
+# Distinct spellings memoised by resolve_operator and group_members
+RESOLVE_CACHE_SIZE = 65536
+
+# Alias map of this process, built on first use
+_ALIAS_MAP = {}
+
+
+def loose_key(name):
+    """Case- and whitespace-insensitive lookup key."""
+    return ' '.join(name.split()).casefold()
+
+
+def compact_key(name):
+    """Case-, whitespace- and punctuation-insensitive lookup key."""
+    return PUNCTUATION.sub('', name.casefold())
+
+
+def load_roster(roster_db_path):
+    """Return the operator names in the operators roster ([] if unavailable)."""
+    if not roster_db_path or not os.path.exists(roster_db_path):
+        return []
+    conn = sqlite3.connect(roster_db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM operators WHERE name IS NOT NULL")]
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+def build_alias_map(aliases, roster=(), fallback=None):
+    """
+    Build an alias map from (alias, canonical) pairs and roster names.
+
+    Earlier pairs win over later ones for the same loose key. Roster names
+    come last and map to what the fallback makes of them, or to themselves.
+    Returns a dict with the 'loose' and 'compact' lookup tables, the
+    fallback resolver and the ambiguous compact keys.
+    """
+    loose = {}
+    compact_candidates = {}
+    roster_aliases = [(name, (fallback(name) if fallback else None) or name) for name in roster]
+    for alias, canonical in list(aliases) + roster_aliases:
+        if not alias or not canonical:
+            continue
+        loose.setdefault(loose_key(alias), canonical)
+        key = compact_key(alias)
+        if key:
+            compact_candidates.setdefault(key, set()).add(loose[loose_key(alias)])
+    compact = {key: canonicals.pop() for key, canonicals in compact_candidates.items() if len(canonicals) == 1}
+    return {'loose': loose, 'compact': compact, 'fallback': fallback,
+            'ambiguous': sorted(key for key, canonicals in compact_candidates.items() if len(canonicals) > 1)}
+
+
+def mapping_aliases():
+    """(alias, canonical) pairs from operator_mapping and its get_operator_alias, or ([], None)."""
+    try:
+        from operator_mapping import get_operator_alias, INITIAL_MAPPINGS, NAME_VARIATIONS
+    except ImportError:
+        return [], None
+    canonicals = set(NAME_VARIATIONS.values()) | set(INITIAL_MAPPINGS.values())
+    aliases = list(NAME_VARIATIONS.items()) + list(INITIAL_MAPPINGS.items())
+    aliases += [(canonical, canonical) for canonical in sorted(canonicals)]
+    return aliases, get_operator_alias
+
+
+def get_alias_map(roster_db_path=None):
+    """The process-wide alias map, built on first use."""
+    if not _ALIAS_MAP:
+        aliases, fallback = mapping_aliases()
+        _ALIAS_MAP.update(build_alias_map(aliases, load_roster(roster_db_path or UNIFIED_DB_PATH), fallback))
+    return _ALIAS_MAP
+
+
+def lookup_alias(alias_map, name):
+    """Canonical operator for a spelling in alias_map itself (no fallback), else None."""
+    return alias_map['loose'].get(loose_key(name)) or alias_map['compact'].get(compact_key(name))
+
+
+def lookup_operator(alias_map, name):
+    """Resolve one spelling against alias_map; None if it cannot be resolved."""
+    if name is None or not str(name).strip():
+        return None
+    name = str(name)
+    canonical = lookup_alias(alias_map, name)
+    if canonical is None and alias_map['fallback']:
+        canonical = alias_map['fallback'](name)
+    return canonical
+
+
+def split_group(alias_map, name):
+    """
+    Operators of a group spelling, or () if name is not a group.
+
+    Returns a tuple of canonical names, with None for each member that
+    cannot be resolved. The longest run of parts that is itself an alias
+    is taken first, so "F,H,RC" is ("Filiberto", "Rc") when "F,H" is an
+    alias of Filiberto. A group needs two different resolved operators;
+    anything else (a spelling in the map, "F+F", "N/A" with an unknown
+    part) is treated as one operator.
+    """
+    if name is None:
+        return ()
+    text = ' '.join(str(name).split())
+    if not text or lookup_alias(alias_map, text):
+        return ()
+    pieces = GROUP_SEPARATORS.split(text)
+    parts = len(pieces) // 2 + 1
+    members = []
+    start = 0
+    while start < parts:
+        end = next((end for end in range(parts, start + 1, -1)
+                    if lookup_alias(alias_map, ''.join(pieces[2 * start:2 * end - 1]))), start + 1)
+        run = ''.join(pieces[2 * start:2 * end - 1])
+        if run.strip():
+            canonical = lookup_operator(alias_map, run)
+            if canonical is None or canonical not in members:
+                members.append(canonical)
+        start = end
+    if len({member for member in members if member}) < 2:
+        return ()
+    return tuple(members)
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def group_members(name):
+    """Operators of a group spelling, using the process-wide alias map (see split_group)."""
+    return split_group(get_alias_map(), name)
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_operator(name):
+    """Canonical operator for a raw spelling, using the process-wide alias map (None for groups)."""
+    if group_members(name):
+        return None
+    return lookup_operator(get_alias_map(), name)
+
+
+def ensure_operator_canonical(conn):
+    """
+    Add qc_entries.operator_canonical and its index if missing; a new
+    column is backfilled from the existing rows. Returns
+    backfill_operator_canonical's counts ((0, 0) if nothing was added).
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(qc_entries)")
+    entry_columns = {row[1] for row in cursor.fetchall()}
+    if not entry_columns:
+        return 0, 0
+    added = 'operator_canonical' not in entry_columns
+    if added:
+        cursor.execute("ALTER TABLE qc_entries ADD COLUMN operator_canonical TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_operator_canonical ON qc_entries(operator_canonical, entry_date)")
+    conn.commit()
+    return backfill_operator_canonical(conn) if added else (0, 0)
+
+
+def backfill_operator_canonical(conn, remap=False):
+    """
+    Resolve each distinct spelling once and write operator_canonical.
+
+    Only rows without a canonical operator are touched unless remap is set
+    (after operator_mapping or the roster changed). Returns
+    (spellings resolved, rows updated).
+    """
+    where = "" if remap else "AND operator_canonical IS NULL"
+    spellings = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT operator FROM qc_entries WHERE operator IS NOT NULL {where}")]
+    updates = [(resolve_operator(operator), operator) for operator in spellings]
+    if not remap:
+        # Unresolved spellings (groups, unknown names) are already NULL
+        updates = [update for update in updates if update[0] is not None]
+    cursor = conn.executemany(
+        f"UPDATE qc_entries SET operator_canonical = ? WHERE operator = ? {where}", updates)
+    conn.commit()
+    return len(spellings), cursor.rowcount
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Resolve QC sheet operator spellings and fill qc_entries.operator_canonical.")
+    parser.add_argument('names', nargs='*', help="Spellings to resolve and print instead of updating the database")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--roster-db', default=UNIFIED_DB_PATH,
+                        help="Database with the operators roster (default: %(default)s)")
+    parser.add_argument('--remap', action='store_true',
+                        help="Re-resolve every row, not only those without a canonical operator")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to resolve operator spellings."""
+    args = parse_args()
+    alias_map = get_alias_map(args.roster_db)
+
+    print("=" * 60)
+    print("QC Operator Resolver")
+    print("=" * 60)
+    print(f"Alias map: {len(alias_map['loose'])} aliases, {len(alias_map['compact'])} compact keys, "
+          f"{len(alias_map['ambiguous'])} ambiguous")
+    if alias_map['fallback'] is None:
+        print("⚠️  operator_mapping not found; resolving against the roster only")
+
+    if args.names:
+        for name in args.names:
+            members = group_members(name)
+            if members:
+                print(f"  {name!r} → group of {', '.join(repr(member) for member in members)}")
+            else:
+                print(f"  {name!r} → {resolve_operator(name)!r}")
+        return
+
+    conn = sqlite3.connect(args.db)
+    try:
+        ensure_operator_canonical(conn)
+        spellings, rows = backfill_operator_canonical(conn, remap=args.remap)
+        print(f"Resolved {spellings} spellings, {rows} rows updated")
+        total, resolved = conn.execute(
+            "SELECT COUNT(operator), COUNT(operator_canonical) FROM qc_entries").fetchone()
+        print(f"✅ {resolved} of {total} entries with an operator have a canonical operator")
+    except sqlite3.Error as e:
+        print(f"❌ Failed: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
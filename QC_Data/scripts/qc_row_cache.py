@@ -0,0 +1,144 @@
+"""
+QC Row Cache
+SQLite side-store of the rows extracted from each QC sheet workbook.
+
+Rows are keyed by the workbook's content hash and build_qc_database's
+PARSER_VERSION, so a rebuild can replay them through normalisation and
+insert without opening the workbook again. Only the fields read from the
+sheet are stored; the filename-derived ones are filled in on replay, which
+lets a renamed copy reuse the entry.
+"""
+
+import os
+import pickle
+import sqlite3
+import zlib
+from collections import Counter
+
+from build_qc_database import (PARSER_VERSION, SHEET_ENTRY_COLUMNS, compute_file_hash,
+                               parse_filename, iter_extracted_files)
+
+
+def open_row_cache(path):
+    """Open (creating if needed) the row cache database."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS row_cache (
+            content_hash TEXT NOT NULL,
+            parser_version INTEGER NOT NULL,
+            entry_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, parser_version)
+        )
+    """)
+    conn.commit()
+    return conn
+
+
+def load_cached_result(cache_conn, info):
+    """
+    Return an extract_excel_file-style result rebuilt from the cache, or None on a miss.
+
+    info is the file's manifest entry (see scan_qc_forms_dir) and must
+    carry its content_hash.
+    """
+    row = cache_conn.execute(
+        "SELECT payload FROM row_cache WHERE content_hash = ? AND parser_version = ?",
+        (info['content_hash'], PARSER_VERSION)
+    ).fetchone()
+    if row is None:
+        return None
+
+    rows, warnings, template, date_stats = pickle.loads(zlib.decompress(row[0]))
+    filename = os.path.basename(info['file_path'])
+    file_info = parse_filename(filename)
+    filename_fields = {
+        'source_file': filename,
+        'work_order': file_info['work_order'],
+        'customer_name': file_info['customer_name'],
+    }
+    entries = []
+    for values in rows:
+        entry = dict(filename_fields)
+        entry.update(zip(SHEET_ENTRY_COLUMNS, values))
+        entries.append(entry)
+
+    return {
+        'filename': filename,
+        'file_path': info['file_path'],
+        'file_size': info['file_size'],
+        'last_modified': info['last_modified'],
+        'entries': entries,
+        'warnings': warnings,
+        'date_stats': Counter(date_stats),
+        'template': template,
+        'reader': 'cache',
+        'error': None,
+        'content_hash': info['content_hash'],
+    }
+
+
+def store_cached_result(cache_conn, content_hash, result, entries):
+    """Cache the rows of a successfully parsed workbook under its content hash."""
+    rows = [tuple(entry[column] for column in SHEET_ENTRY_COLUMNS) for entry in entries]
+    payload = zlib.compress(pickle.dumps(
+        (rows, result['warnings'], result['template'], dict(result['date_stats'])),
+        protocol=pickle.HIGHEST_PROTOCOL
+    ))
+    cache_conn.execute("""
+        INSERT OR REPLACE INTO row_cache (content_hash, parser_version, entry_count, payload)
+        VALUES (?, ?, ?, ?)
+    """, (content_hash, PARSER_VERSION, len(rows), payload))
+    cache_conn.commit()
+
+
+def iter_collected(entries, sink):
+    """Pass entries through while appending each one to sink."""
+    for entry in entries:
+        sink.append(entry)
+        yield entry
+
+
+def iter_cached_or_extracted(cache_conn, file_paths, manifest, workers=1, reader='openpyxl'):
+    """
+    Yield results for file_paths in order, from the cache where possible.
+
+    Cache misses are parsed with build_qc_database.iter_extracted_files; their
+    entries are collected as the writer consumes them and result['cache_rows']
+    holds that list, to be passed to store_cached_result once the write
+    succeeded. Content hashes missing from the manifest are computed here.
+    """
+    cached = {}
+    misses = []
+    for file_path in file_paths:
+        info = manifest[os.path.basename(file_path)]
+        if not info.get('content_hash'):
+            info['content_hash'] = compute_file_hash(file_path)
+        result = load_cached_result(cache_conn, info)
+        if result is None:
+            misses.append(file_path)
+        else:
+            cached[file_path] = result
+
+    extracted = iter_extracted_files(misses, workers, reader)
+    for file_path in file_paths:
+        result = cached.pop(file_path, None)
+        if result is None:
+            result = next(extracted)
+            result['content_hash'] = manifest[result['filename']]['content_hash']
+            result['cache_rows'] = []
+            result['entries'] = iter_collected(result['entries'], result['cache_rows'])
+        yield result
+
+
+def prune_row_cache(cache_conn, live_hashes):
+    """Drop entries from older parser versions and for workbooks no longer on disk."""
+    cursor = cache_conn.cursor()
+    cursor.execute("DELETE FROM row_cache WHERE parser_version != ?", (PARSER_VERSION,))
+    removed = cursor.rowcount
+    cursor.execute("SELECT content_hash FROM row_cache")
+    stale = [(content_hash,) for (content_hash,) in cursor.fetchall() if content_hash not in live_hashes]
+    cursor.executemany("DELETE FROM row_cache WHERE content_hash = ?", stale)
+    cache_conn.commit()
+    return removed + len(stale)
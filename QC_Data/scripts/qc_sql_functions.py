@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+QC SQL Functions
+Connection factory for the QC databases that registers the QC domain
+helpers as deterministic SQLite functions, so reports can filter and
+GROUP BY on them inside the engine instead of looping over rows in Python.
+
+Functions registered on every connection:
+
+    operator_alias(operator)     canonical operator name (qc_operator_resolver)
+    time_minutes(value)          raw sheet time in minutes (qc_time_units)
+    time_unit(value)             how that value was read: minutes, hours, ambiguous_hours, invalid
+    yield_status(text)           SCRAP, DEFECT or the upper-cased text (build_qc_database.parse_yield_status)
+    yield_scrap(text)            scrap count parsed from a YIELD cell
+    yield_defects(text)          defect count parsed from a YIELD cell
+
+Results are memoised per distinct input, since a column holds a few
+thousand distinct values at most. Example:
+
+    conn = connect(DB_PATH)
+    conn.execute('''
+        SELECT operator_alias(operator) AS canonical_operator, entry_date, SUM(total_time_minutes)
+        FROM qc_entries GROUP BY canonical_operator, entry_date
+    ''')
+"""
+
+import sqlite3
+from functools import lru_cache
+
+# Distinct inputs memoised per function
+FUNCTION_CACHE_SIZE = 65536
+
+
+def register_functions(conn):
+    """Register the QC domain functions on an open connection; returns conn."""
+    from qc_operator_resolver import resolve_operator
+    from build_qc_database import parse_yield_status
+    from qc_time_units import time_unit
+
+    cached_yield = lru_cache(maxsize=FUNCTION_CACHE_SIZE)(parse_yield_status)
+    functions = {
+        'operator_alias': resolve_operator,
+        'time_minutes': lambda value: time_unit(value)[0],
+        'time_unit': lambda value: time_unit(value)[1],
+        'yield_status': lambda text: cached_yield(text)[0],
+        'yield_scrap': lambda text: cached_yield(text)[1],
+        'yield_defects': lambda text: cached_yield(text)[2],
+    }
+    for name, function in functions.items():
+        conn.create_function(name, 1, function, deterministic=True)
+    return conn
+
+
+def connect(db_path, **kwargs):
+    """Open db_path (extra arguments go to sqlite3.connect) with the QC functions registered."""
+    return register_functions(sqlite3.connect(db_path, **kwargs))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+QC Sheet Time Units
+Infers the unit of the PROCESS TIME / TOTAL TIME values in qc_sheets.db and
+stores them as minutes next to the raw value.
+
+The sheets mix units: some operators write 450 (minutes), others 7.5
+(hours). The rule, applied once at ingest and recorded per value in a
+*_unit provenance column:
+
+- 'minutes': values above 24, kept as they are
+- 'hours': values up to 8, multiplied by 60
+- 'ambiguous_hours': values above 8 and up to 24, which could be either;
+  they are read as hours (no shift is longer than 24 hours, and no round
+  minute count is that small)
+- 'invalid': zero, negative or non-numeric values (text left in the
+  column), which get no minutes
+
+A NULL raw value leaves both columns NULL. The rule lives here twice, as
+time_unit() for rows inserted from Python and as SQL CASE expressions for
+the set-based backfill of existing rows; keep the two in step
+(rule_mismatches() compares them). Reports sum
+ENTRY_MINUTES_SQL instead of re-deriving units.
+"""
+
+import argparse
+import math
+import sqlite3
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+# Raw time columns and the minutes/provenance columns derived from each
+RAW_TIME_COLUMNS = ('process_time', 'total_time')
+TIME_MINUTES_COLUMNS = {
+    'process_time_minutes': 'REAL',
+    'process_time_unit': 'TEXT',
+    'total_time_minutes': 'REAL',
+    'total_time_unit': 'TEXT',
+}
+
+# Upper bounds of the hours and ambiguous ranges
+HOURS_MAX = 8
+AMBIGUOUS_MAX = 24
+
+# Raw values both forms of the rule must agree on, text cells included
+RULE_CHECK_VALUES = (None, -1, 0, 0.5, 8, 8.5, 24, 24.5, 450, '1.5', '450', 'abc', '')
+
+
+def entry_minutes_sql(row=''):
+    """
+    Minutes worked for a qc_entries row, the way the reports have always
+    counted them: TOTAL TIME when it is filled in (non-zero), else PROCESS
+    TIME. row prefixes the columns, e.g. 'NEW.' inside a trigger.
+    """
+    return (f"CASE WHEN {row}total_time THEN {row}total_time_minutes "
+            f"ELSE {row}process_time_minutes END")
+
+
+ENTRY_MINUTES_SQL = entry_minutes_sql()
+
+
+def time_unit(value):
+    """Return (minutes, unit) for one raw time value; (None, None) for a missing one."""
+    if value is None:
+        return None, None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None, 'invalid'
+    if not math.isfinite(value) or value <= 0:
+        return None, 'invalid'
+    if value > AMBIGUOUS_MAX:
+        return value, 'minutes'
+    if value <= HOURS_MAX:
+        return value * 60.0, 'hours'
+    return value * 60.0, 'ambiguous_hours'
+
+
+def normalize_time_to_minutes(time_value):
+    """Normalize a raw time value to minutes (None if missing or not positive)."""
+    return time_unit(time_value)[0]
+
+
+def time_minutes_values(process_time, total_time):
+    """Values for TIME_MINUTES_COLUMNS, in order, from a row's raw times."""
+    return time_unit(process_time) + time_unit(total_time)
+
+
+def numeric_sql(column):
+    """A raw time column as a number; non-numeric text becomes 0, as float() failing makes it invalid."""
+    return f"({column} + 0)"
+
+
+def minutes_sql(column):
+    """SQL form of time_unit()'s minutes for a raw time column."""
+    value = numeric_sql(column)
+    return (f"CASE WHEN {value} <= 0 THEN NULL "
+            f"WHEN {value} > {AMBIGUOUS_MAX} THEN {value} "
+            f"ELSE {value} * 60.0 END")
+
+
+def unit_sql(column):
+    """SQL form of time_unit()'s unit for a raw time column."""
+    value = numeric_sql(column)
+    return (f"CASE WHEN {column} IS NULL THEN NULL "
+            f"WHEN {value} <= 0 THEN 'invalid' "
+            f"WHEN {value} > {AMBIGUOUS_MAX} THEN 'minutes' "
+            f"WHEN {value} <= {HOURS_MAX} THEN 'hours' "
+            f"ELSE 'ambiguous_hours' END")
+
+
+def rule_mismatches(values=RULE_CHECK_VALUES):
+    """Raw values for which time_unit() and minutes_sql/unit_sql disagree, as (value, python, sql)."""
+    conn = sqlite3.connect(':memory:')
+    try:
+        mismatches = []
+        for value in values:
+            sql = conn.execute(f"SELECT {minutes_sql(':value')}, {unit_sql(':value')}",
+                               {'value': value}).fetchone()
+            python = time_unit(value)
+            if sql != python:
+                mismatches.append((value, python, sql))
+        return mismatches
+    finally:
+        conn.close()
+
+
+def ensure_time_minutes_columns(conn):
+    """Add the minutes/provenance columns to qc_entries if missing; returns the ones added."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(qc_entries)")
+    entry_columns = {row[1] for row in cursor.fetchall()}
+    if not entry_columns:
+        return []
+    added = [column for column in TIME_MINUTES_COLUMNS if column not in entry_columns]
+    for column in added:
+        cursor.execute(f"ALTER TABLE qc_entries ADD COLUMN {column} {TIME_MINUTES_COLUMNS[column]}")
+    return added
+
+
+def backfill_time_minutes(conn, recompute=False):
+    """
+    Fill the minutes/provenance columns of existing rows with one UPDATE.
+
+    Only rows with a raw time but no provenance are touched, unless
+    recompute is set (after a rule change). Returns the rows updated.
+    """
+    assignments = []
+    for column in RAW_TIME_COLUMNS:
+        assignments.append(f"{column}_minutes = {minutes_sql(column)}")
+        assignments.append(f"{column}_unit = {unit_sql(column)}")
+    where = "" if recompute else "WHERE " + " OR ".join(
+        f"({column} IS NOT NULL AND {column}_unit IS NULL)" for column in RAW_TIME_COLUMNS)
+    updated = conn.execute(f"UPDATE qc_entries SET {', '.join(assignments)} {where}").rowcount
+    conn.commit()
+    return updated
+
+
+def ensure_time_minutes(conn):
+    """Upgrade a qc_sheets.db built before the minutes columns existed (no-op otherwise)."""
+    if ensure_time_minutes_columns(conn):
+        backfill_time_minutes(conn)
+
+
+def unit_counts(conn):
+    """Return {(raw column, unit): rows} for the provenance columns."""
+    counts = {}
+    for column in RAW_TIME_COLUMNS:
+        for unit, rows in conn.execute(f"""
+            SELECT {column}_unit, COUNT(*) FROM qc_entries
+            WHERE {column} IS NOT NULL GROUP BY {column}_unit ORDER BY {column}_unit
+        """):
+            counts[(column, unit)] = rows
+    return counts
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Backfill the normalised minutes columns of qc_sheets.db and report unit provenance.")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--recompute', action='store_true',
+                        help="Recompute every row, not only those without a unit")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to backfill the minutes columns."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("QC Sheet Time Units")
+    print("=" * 60)
+
+    mismatches = rule_mismatches()
+    if mismatches:
+        for value, python, sql in mismatches:
+            print(f"❌ time_unit({value!r}) is {python} but the SQL rule gives {sql}")
+        return
+
+    conn = sqlite3.connect(args.db)
+    try:
+        added = ensure_time_minutes_columns(conn)
+        if added:
+            print(f"Added columns: {', '.join(added)}")
+        updated = backfill_time_minutes(conn, recompute=args.recompute)
+        print(f"✅ Backfilled {updated} rows")
+        for (column, unit), rows in unit_counts(conn).items():
+            print(f"   {column}: {unit or 'not backfilled'} {rows}")
+    except sqlite3.Error as e:
+        print(f"❌ Backfill failed: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
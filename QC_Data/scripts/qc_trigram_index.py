@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+QC Trigram Index
+Fuzzy, ranked search over the distinct operator, part_name and
+customer_name values of qc_sheets.db, for investigations such as "which
+raw operator spellings could be Filiberto?". Only entries with a valid
+entry_date are indexed, the rows the reports consider; operator values
+carry their operator_canonical.
+
+Each distinct value is broken into trigrams the way PostgreSQL's pg_trgm
+does: case-folded, split into words on anything that is not a letter or
+digit, each word padded with two spaces in front and one behind ("fh" ->
+"  f", " fh", "fh "). An inverted index maps every trigram to the values
+containing it, so a search only touches values sharing a trigram with the
+term.
+
+Matches are ranked by score, the shared trigrams over the smaller of the
+two trigram sets, so a value contained in the term or the term contained
+in a value scores 1.0 ("Filiberto" for "Filiberto Perez"). Ties are broken
+by similarity, shared over all trigrams of both (pg_trgm's similarity()),
+then by entry count.
+
+The index is built in memory from one GROUP BY per field, once per process
+and database, and is not stored in the database.
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from itertools import chain
+
+# Configuration
+DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_sheets.db"
+
+# qc_entries columns that can be searched
+SEARCH_FIELDS = ('operator', 'part_name', 'customer_name')
+
+# Entries whose values are indexed (the reports' entry_date bounds)
+ENTRY_FILTER = """
+    entry_date IS NOT NULL
+    AND entry_date > '2000-01-01'
+    AND entry_date < '2100-01-01'
+"""
+
+# Column carried with each value of a field
+CANONICAL_COLUMNS = {'operator': 'operator_canonical'}
+
+# Minimum score of a match, and matches returned per search
+SCORE_THRESHOLD = 0.7
+SEARCH_LIMIT = 10
+
+# Characters separating words
+WORD_SEPARATORS = re.compile(r'[\W_]+')
+
+# Field indexes of this process, keyed by (database path, field)
+_INDEXES = {}
+
+
+def trigrams(text):
+    """The set of padded word trigrams of text."""
+    grams = set()
+    for word in WORD_SEPARATORS.split(str(text).casefold()):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def index_values(values):
+    """
+    Build a field index from (value, entries) or (value, entries, canonical) tuples.
+
+    Returns a dict with the 'values', their 'entries' counts, 'canonical'
+    values (None if not given) and 'grams', and 'postings', mapping each
+    trigram to the positions of the values containing it.
+    """
+    index = {'values': [], 'entries': [], 'canonical': [], 'grams': [], 'postings': defaultdict(list)}
+    for value, entries, *canonical in values:
+        grams = trigrams(value)
+        if not grams:
+            continue
+        position = len(index['values'])
+        index['values'].append(value)
+        index['entries'].append(entries)
+        index['canonical'].append(canonical[0] if canonical else None)
+        index['grams'].append(grams)
+        for gram in grams:
+            index['postings'][gram].append(position)
+    return index
+
+
+def build_field_index(conn, field):
+    """Index the distinct values of one qc_entries column within ENTRY_FILTER, with their entry counts."""
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Cannot search {field}; choose from {', '.join(SEARCH_FIELDS)}")
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(qc_entries)")}
+    canonical = CANONICAL_COLUMNS.get(field)
+    canonical_sql = f"MIN({canonical})" if canonical in columns else "NULL"
+    return index_values(conn.execute(f"""
+        SELECT {field}, COUNT(*), {canonical_sql}
+        FROM qc_entries
+        WHERE {field} IS NOT NULL AND {field} != ''
+        AND {ENTRY_FILTER}
+        GROUP BY {field}
+    """))
+
+
+def get_search_index(conn, fields=SEARCH_FIELDS, rebuild=False):
+    """{field: field index} for conn's database, building fields not indexed yet by this process."""
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    search_index = {}
+    for field in fields:
+        key = (db_path, field)
+        if rebuild or key not in _INDEXES:
+            _INDEXES[key] = build_field_index(conn, field)
+        search_index[field] = _INDEXES[key]
+    return search_index
+
+
+def search_field(index, term, threshold=SCORE_THRESHOLD):
+    """Matches of term in one field index as (score, similarity, value, entries, canonical), unsorted."""
+    term_grams = trigrams(term)
+    shared = Counter(chain.from_iterable(index['postings'].get(gram, ()) for gram in term_grams))
+    matches = []
+    for position, count in shared.items():
+        value_grams = len(index['grams'][position])
+        score = count / min(len(term_grams), value_grams)
+        if score >= threshold:
+            similarity = count / (len(term_grams) + value_grams - count)
+            matches.append((score, similarity, index['values'][position], index['entries'][position],
+                            index['canonical'][position]))
+    return matches
+
+
+def search(search_index, term, limit=SEARCH_LIMIT, threshold=SCORE_THRESHOLD):
+    """
+    Rank the values similar to term across the fields of search_index.
+
+    Returns up to limit dicts with 'field', 'value', 'entries',
+    'canonical', 'score' and 'similarity', best first (every match if
+    limit is None).
+    """
+    results = []
+    for field, index in search_index.items():
+        for score, similarity, value, entries, canonical in search_field(index, term, threshold):
+            results.append({'field': field, 'value': value, 'entries': entries, 'canonical': canonical,
+                            'score': round(score, 3), 'similarity': round(similarity, 3)})
+    results.sort(key=lambda match: (-match['score'], -match['similarity'], -match['entries'], match['value']))
+    return results if limit is None else results[:limit]
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Fuzzy search of the operator, part and customer names in qc_sheets.db.")
+    parser.add_argument('terms', nargs='+', help="Names to search for")
+    parser.add_argument('--db', default=DB_PATH, help="QC sheets database (default: %(default)s)")
+    parser.add_argument('--field', action='append', choices=SEARCH_FIELDS, dest='fields',
+                        help="Column to search, may be repeated (default: all)")
+    parser.add_argument('--limit', type=int, default=SEARCH_LIMIT,
+                        help=f"Matches shown per term (default: {SEARCH_LIMIT})")
+    parser.add_argument('--threshold', type=float, default=SCORE_THRESHOLD,
+                        help=f"Minimum score, 0 to 1 (default: {SCORE_THRESHOLD})")
+    parser.add_argument('--json', action='store_true', help="Print the matches as JSON")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main function to search QC values."""
+    args = parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        start = time.perf_counter()
+        search_index = get_search_index(conn, args.fields or SEARCH_FIELDS)
+        build_ms = (time.perf_counter() - start) * 1000
+    except sqlite3.Error as e:
+        print(f"❌ Failed to build the index: {e}")
+        return
+    finally:
+        conn.close()
+
+    results = {}
+    timings = {}
+    for term in args.terms:
+        start = time.perf_counter()
+        results[term] = search(search_index, term, args.limit, args.threshold)
+        timings[term] = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("QC Trigram Index")
+    print("=" * 60)
+    values = sum(len(index['values']) for index in search_index.values())
+    print(f"Indexed {values:,} distinct values of {', '.join(search_index)} in {build_ms:.1f} ms")
+    for term, matches in results.items():
+        print(f"\n'{term}' ({len(matches)} matches, {timings[term]:.3f} ms)")
+        for match in matches:
+            canonical = f" -> {match['canonical']}" if match['canonical'] else ""
+            print(f"  {match['score']:.2f}  {match['similarity']:.2f}  {match['field']:<14} "
+                  f"{match['value']!r} ({match['entries']} entries){canonical}")
+        if not matches:
+            print("  No matches")
+
+
+if __name__ == "__main__":
+    main()
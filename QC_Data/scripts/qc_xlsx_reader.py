@@ -0,0 +1,406 @@
+"""
+QC XLSX Reader
+Standard-library reader for the active sheet of an .xlsx workbook.
+
+Reads cell values straight from the sheet XML and the shared strings with
+zipfile and incremental ElementTree parsing, skipping the cell, style and
+workbook objects openpyxl builds. Rows come back exactly as openpyxl's
+read-only iter_rows(values_only=True) returns them with data_only=True:
+same row padding, and dates, times, numbers and strings decoded to the same
+Python types, so either reader can feed build_qc_database.
+"""
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime, time, timedelta
+from xml.etree.ElementTree import iterparse, fromstring
+
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CONTENT_TYPES_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+CELL_TAG = f'{{{SHEET_MAIN_NS}}}c'
+VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+TEXT_TAG = f'{{{SHEET_MAIN_NS}}}t'
+RUN_TAG = f'{{{SHEET_MAIN_NS}}}r'
+STRING_ITEM_TAG = f'{{{SHEET_MAIN_NS}}}si'
+DIMENSION_TAG = f'{{{SHEET_MAIN_NS}}}dimension'
+SHEET_DATA_TAG = f'{{{SHEET_MAIN_NS}}}sheetData'
+
+# Content types of the main workbook part, in the order openpyxl looks for them
+WORKBOOK_CONTENT_TYPES = (
+    'application/vnd.ms-excel.template.macroEnabled.main+xml',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.template.main+xml',
+    'application/vnd.ms-excel.sheet.macroEnabled.main+xml',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml',
+)
+SHARED_STRINGS_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml'
+STYLES_PART = 'xl/styles.xml'
+
+WINDOWS_EPOCH = datetime(1899, 12, 30)
+MAC_EPOCH = datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# Built-in number formats that can mark a cell as a date, time or duration
+BUILTIN_DATE_FORMATS = {
+    14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy',
+    18: 'h:mm AM/PM', 19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss',
+    22: 'm/d/yy h:mm', 45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0',
+}
+
+# Same rules openpyxl uses to decide whether a number format is a date
+# (quoted literals and [locale] blocks ignored) or a duration
+FORMAT_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+DATE_FORMAT_RE = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+TIMEDELTA_FORMAT_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+RANGE_RE = re.compile(r'^[$]?([A-Za-z]{1,3})?[$]?(\d+)?(:[$]?([A-Za-z]{1,3})?[$]?(\d+)?)?$')
+ISO_DATETIME_RE = re.compile(r'''
+(?P<date>(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2}))?T?
+(?P<time>(?P<hour>\d{2}):(?P<minute>\d{2})(:(?P<second>\d{2})(?P<microsecond>\.\d{1,3})?)?)?Z?''',
+    re.VERBOSE)
+
+# Column letters already converted to indexes
+_COLUMN_INDEX = {}
+
+
+class UnsupportedWorkbook(Exception):
+    """Raised when a workbook needs the openpyxl reader."""
+
+
+def column_index(letters):
+    """Convert column letters ('A', 'AB') to a 1-based index."""
+    index = _COLUMN_INDEX.get(letters)
+    if index is None:
+        index = 0
+        for char in letters.upper():
+            index = index * 26 + ord(char) - 64
+        _COLUMN_INDEX[letters] = index
+    return index
+
+
+def split_coordinate(coordinate):
+    """Split a cell reference like 'B12' into (row, column)."""
+    for idx, char in enumerate(coordinate):
+        if char.isdigit():
+            break
+    return int(coordinate[idx:]), column_index(coordinate[:idx])
+
+
+def is_date_format(fmt):
+    """Return True if a number format displays dates or times."""
+    if fmt is None:
+        return False
+    fmt = FORMAT_STRIP_RE.sub('', fmt.split(';')[0])
+    return DATE_FORMAT_RE.search(fmt) is not None
+
+
+def is_timedelta_format(fmt):
+    """Return True if a number format displays an elapsed duration."""
+    if fmt is None:
+        return False
+    return TIMEDELTA_FORMAT_RE.search(fmt.split(';')[0]) is not None
+
+
+def serial_to_datetime(value, epoch, as_timedelta=False):
+    """Convert an Excel serial number to a datetime, time or timedelta like openpyxl's from_excel."""
+    if as_timedelta:
+        td = timedelta(days=value)
+        if td.microseconds:
+            # round to millisecond precision
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        minutes, seconds = divmod(diff.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return time(hours, minutes, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        # Excel's phantom 1900-02-29
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+
+def parse_iso_datetime(value):
+    """Decode a t="d" cell (ISO 8601 date, time or datetime)."""
+    if not value:
+        return None
+    match = ISO_DATETIME_RE.match(value)
+    if not match or not any(match.groups()):
+        raise ValueError(f"Invalid datetime value {value}")
+    parts = match.groupdict(0)
+    for key in ('year', 'month', 'day', 'hour', 'minute', 'second'):
+        if parts[key]:
+            parts[key] = int(parts[key])
+    microsecond = int(float(parts['microsecond']) * 1_000_000) if parts['microsecond'] else 0
+    if not parts['date']:
+        return time(parts['hour'], parts['minute'], parts['second'], microsecond)
+    if not parts['time']:
+        return datetime(parts['year'], parts['month'], parts['day']).date()
+    return datetime(parts['year'], parts['month'], parts['day'],
+                    parts['hour'], parts['minute'], parts['second'], microsecond)
+
+
+def text_content(element):
+    """Concatenate the plain and rich-text runs of a string item, ignoring phonetic hints."""
+    snippets = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            snippets.append(child.text or '')
+        elif child.tag == RUN_TAG:
+            run_text = child.find(TEXT_TAG)
+            if run_text is not None:
+                snippets.append(run_text.text or '')
+    return ''.join(snippets)
+
+
+def read_content_types(archive):
+    """Return ({part name: content type}, {content type} of defaults)."""
+    root = fromstring(archive.read('[Content_Types].xml'))
+    overrides = {}
+    defaults = set()
+    for element in root:
+        if element.tag == f'{{{CONTENT_TYPES_NS}}}Override':
+            overrides[element.get('PartName')] = element.get('ContentType')
+        elif element.tag == f'{{{CONTENT_TYPES_NS}}}Default':
+            defaults.add(element.get('ContentType'))
+    return overrides, defaults
+
+
+def find_part(overrides, content_type):
+    """Return the archive path of the first part with a content type, or None."""
+    for part_name, part_type in overrides.items():
+        if part_type == content_type:
+            return part_name.lstrip('/')
+    return None
+
+
+def read_relationships(archive, part_name):
+    """Return {rId: (type, archive path)} for a part's internal relationships."""
+    folder, filename = posixpath.split(part_name)
+    rels_path = posixpath.join(folder, '_rels', f'{filename}.rels')
+    if rels_path not in archive.NameToInfo:
+        return {}
+    relationships = {}
+    for element in fromstring(archive.read(rels_path)):
+        if element.tag != f'{{{PACKAGE_REL_NS}}}Relationship' or element.get('TargetMode') == 'External':
+            continue
+        target = element.get('Target')
+        if target.startswith('/'):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        relationships[element.get('Id')] = (element.get('Type'), target)
+    return relationships
+
+
+def read_shared_strings(archive, overrides):
+    """Return the shared string table as a list."""
+    part = find_part(overrides, SHARED_STRINGS_CONTENT_TYPE)
+    if part is None:
+        return []
+    strings = []
+    with archive.open(part) as src:
+        for _, element in iterparse(src):
+            if element.tag == STRING_ITEM_TAG:
+                strings.append(text_content(element).replace('x005F_', ''))
+                element.clear()
+    return strings
+
+
+def read_date_styles(archive):
+    """Return (date style indexes, duration style indexes) from the cell formats in styles.xml."""
+    if STYLES_PART not in archive.NameToInfo:
+        return set(), set()
+    root = fromstring(archive.read(STYLES_PART))
+    custom = {}
+    num_fmts = root.find(f'{{{SHEET_MAIN_NS}}}numFmts')
+    if num_fmts is not None:
+        for num_fmt in num_fmts:
+            custom[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode')
+
+    date_styles = set()
+    timedelta_styles = set()
+    cell_xfs = root.find(f'{{{SHEET_MAIN_NS}}}cellXfs')
+    for idx, xf in enumerate(cell_xfs if cell_xfs is not None else ()):
+        num_fmt_id = int(xf.get('numFmtId', 0))
+        fmt = custom[num_fmt_id] if num_fmt_id in custom else BUILTIN_DATE_FORMATS.get(num_fmt_id)
+        if is_date_format(fmt):
+            date_styles.add(idx)
+        if is_timedelta_format(fmt):
+            timedelta_styles.add(idx)
+    return date_styles, timedelta_styles
+
+
+def find_active_sheet(archive, overrides, defaults):
+    """Return (archive path of the active worksheet, date epoch)."""
+    workbook_part = None
+    for content_type in WORKBOOK_CONTENT_TYPES:
+        workbook_part = find_part(overrides, content_type)
+        if workbook_part:
+            break
+    else:
+        if defaults & set(WORKBOOK_CONTENT_TYPES):
+            workbook_part = 'xl/workbook.xml'
+    if not workbook_part:
+        raise UnsupportedWorkbook("File contains no valid workbook part")
+
+    root = fromstring(archive.read(workbook_part))
+    properties = root.find(f'{{{SHEET_MAIN_NS}}}workbookPr')
+    date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+
+    active_tab = 0
+    book_views = root.find(f'{{{SHEET_MAIN_NS}}}bookViews')
+    for view in (book_views if book_views is not None else ()):
+        if view.get('activeTab') is not None:
+            active_tab = int(view.get('activeTab'))
+            break
+
+    relationships = read_relationships(archive, workbook_part)
+    sheets = []
+    for sheet in root.iter(f'{{{SHEET_MAIN_NS}}}sheet'):
+        rel = relationships.get(sheet.get(f'{{{REL_NS}}}id'))
+        if rel is None or rel[1] not in archive.NameToInfo:
+            continue
+        sheets.append(rel)
+
+    if not 0 <= active_tab < len(sheets) or 'chartsheet' in sheets[active_tab][0]:
+        raise UnsupportedWorkbook("Active sheet is not a worksheet")
+    return sheets[active_tab][1], MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+
+def read_dimension(archive, sheet_path):
+    """Return (max_column, max_row) from the sheet's <dimension>, or (None, None)."""
+    with archive.open(sheet_path) as src:
+        for event, element in iterparse(src, events=('start',)):
+            if element.tag == DIMENSION_TAG:
+                match = RANGE_RE.match(element.get('ref', ''))
+                if not match:
+                    raise UnsupportedWorkbook(f"Invalid sheet dimension {element.get('ref')}")
+                min_col, min_row, _, max_col, max_row = match.groups()
+                max_col = max_col or min_col
+                max_row = max_row or min_row
+                return (column_index(max_col) if max_col else None,
+                        int(max_row) if max_row else None)
+            if element.tag == SHEET_DATA_TAG:
+                break
+    return None, None
+
+
+def iter_sheet_xml_rows(archive, sheet_path, shared_strings, date_styles, timedelta_styles, epoch):
+    """Yield (row number, [(column, value), ...]) for each <row> in a sheet."""
+    row_counter = 0
+    with archive.open(sheet_path) as src:
+        for _, element in iterparse(src):
+            if element.tag != ROW_TAG:
+                continue
+
+            row_number = element.get('r')
+            row_counter = int(float(row_number)) if row_number else row_counter + 1
+            col_counter = 0
+            cells = []
+            for cell in element:
+                if cell.tag != CELL_TAG:
+                    continue
+                data_type = cell.get('t', 'n')
+                coordinate = cell.get('r')
+                if coordinate:
+                    _, col_counter = split_coordinate(coordinate)
+                else:
+                    col_counter += 1
+
+                if data_type == 'inlineStr':
+                    child = cell.find(INLINE_STRING_TAG)
+                    value = text_content(child) if child is not None else None
+                else:
+                    value = cell.findtext(VALUE_TAG) or None
+                    if value is not None:
+                        if data_type == 'n':
+                            value = float(value) if ('.' in value or 'E' in value or 'e' in value) else int(value)
+                            style_id = int(cell.get('s', 0))
+                            if style_id in date_styles:
+                                try:
+                                    value = serial_to_datetime(value, epoch, style_id in timedelta_styles)
+                                except (OverflowError, ValueError):
+                                    value = '#VALUE!'
+                        elif data_type == 's':
+                            value = shared_strings[int(value)]
+                        elif data_type == 'b':
+                            value = bool(int(value))
+                        elif data_type == 'd':
+                            value = parse_iso_datetime(value)
+                cells.append((col_counter, value))
+
+            element.clear()
+            yield row_counter, cells
+
+
+def iter_padded_rows(xml_rows, max_col, max_row):
+    """
+    Turn parsed <row> elements into value tuples starting at A1.
+
+    Missing rows and cells are filled with None and every row is max_col
+    wide (or as wide as its last cell when the sheet has no dimension),
+    mirroring openpyxl's read-only worksheet.
+    """
+    empty_row = (None,) * max_col if max_col is not None else []
+    counter = 1
+    idx = 1
+    for idx, cells in xml_rows:
+        if max_row is not None and idx > max_row:
+            break
+
+        for _ in range(counter, idx):
+            counter += 1
+            yield empty_row
+
+        if counter <= idx:
+            counter += 1
+            if not cells and not max_col:
+                yield ()
+                continue
+            width = max_col or cells[-1][0]
+            row = [None] * width
+            for column, value in cells:
+                if 1 <= column <= width:
+                    row[column - 1] = value
+            yield tuple(row)
+
+    if max_row is not None and max_row < idx:
+        for _ in range(counter, max_row + 1):
+            yield empty_row
+
+
+def open_sheet_rows(file_path):
+    """
+    Open the active sheet of an .xlsx workbook.
+
+    Returns (archive, rows) where rows yields value tuples like openpyxl's
+    ws.iter_rows(values_only=True) on a read-only, data_only workbook. The
+    caller owns archive and must close it. Raises UnsupportedWorkbook (or
+    the underlying zip/XML error) when the workbook should be read with
+    openpyxl instead.
+    """
+    if not file_path.lower().endswith(('.xlsx', '.xlsm', '.xltx', '.xltm')):
+        raise UnsupportedWorkbook("Not an Office Open XML workbook")
+
+    archive = zipfile.ZipFile(file_path, 'r')
+    try:
+        overrides, defaults = read_content_types(archive)
+        sheet_path, epoch = find_active_sheet(archive, overrides, defaults)
+        shared_strings = read_shared_strings(archive, overrides)
+        date_styles, timedelta_styles = read_date_styles(archive)
+        max_col, max_row = read_dimension(archive, sheet_path)
+    except Exception:
+        archive.close()
+        raise
+
+    xml_rows = iter_sheet_xml_rows(archive, sheet_path, shared_strings,
+                                   date_styles, timedelta_styles, epoch)
+    return archive, iter_padded_rows(xml_rows, max_col, max_row)
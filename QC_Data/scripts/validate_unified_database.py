@@ -2,8 +2,14 @@
 """
 Unified Database Validation Script
 Validates data integrity and provides statistics for the unified QC database.
+
+qc_entries is read in a single pass (see collect_statistics), so the cost
+stays at one table scan as the database grows. --json prints the same
+statistics and check results as a JSON document.
 """
 
+import argparse
+import json
 import sqlite3
 import os
 import sys
@@ -13,56 +19,226 @@ from datetime import datetime
 UNIFIED_DB_PATH = "/mnt/nvme2/SDP/2-Dev/SDP-ProdMgmt2.0/qc_unified.db"
 
 
-def validate_unified_database():
-    """Validate unified database and print comprehensive statistics."""
-    print("=" * 60)
-    print("Unified QC Database Validation")
-    print("=" * 60)
-    
-    if not os.path.exists(UNIFIED_DB_PATH):
-        print(f"❌ Unified database not found: {UNIFIED_DB_PATH}")
+# Entries listed in the top operator and work order tables
+TOP_N = 10
+
+# (key, aggregate) of the statistics taken per data source in the single
+# pass over qc_entries; conditional aggregates stand in for the WHERE
+# clauses of separate queries
+ENTRY_AGGREGATES = [
+    ('entries', "COUNT(*)"),
+    ('dated_entries', "COUNT(entry_date)"),
+    ('min_date', "MIN(entry_date)"),
+    ('max_date', "MAX(entry_date)"),
+    ('missing_work_order', "SUM(work_order IS NULL)"),
+    ('missing_department', "SUM(department IS NULL)"),
+    ('total_parts', "SUM(CASE WHEN parts_produced > 0 THEN parts_produced END)"),
+    ('entries_with_parts', "COUNT(CASE WHEN parts_produced > 0 THEN 1 END)"),
+    ('total_defects', "SUM(defects_count)"),
+    ('total_scrap', "SUM(scrap_count)"),
+    ('total_minutes', "SUM(CASE WHEN total_time_minutes > 0 THEN total_time_minutes END)"),
+    ('entries_with_time', "COUNT(CASE WHEN total_time_minutes > 0 THEN 1 END)"),
+    ('missing_operator', "SUM(operator IS NULL AND operator_id IS NULL)"),
+    ('missing_source_file', "SUM(source_file IS NULL)"),
+    ('missing_asana_task_gid', "SUM(asana_task_gid IS NULL)"),
+]
+
+ENTRY_STATISTICS_SQL = f"""
+    SELECT data_source, {', '.join(aggregate for _, aggregate in ENTRY_AGGREGATES)}
+    FROM qc_entries
+    GROUP BY data_source
+    ORDER BY data_source
+"""
+
+# Data quality checks: (statistic, message printed when it is non-zero, message when it is zero)
+QUALITY_CHECKS = [
+    ('missing_entry_date', "entries with missing entry_date", "All entries have entry_date"),
+    ('missing_operator', "entries with missing operator info", "All entries have operator info"),
+    ('excel_missing_source_file', "Excel entries with missing source_file", "All Excel entries have source_file"),
+    ('direct_input_missing_asana_task_gid', "direct input entries with missing asana_task_gid",
+     "All direct input entries have asana_task_gid"),
+]
+
+
+def sum_values(values):
+    """SUM() over per-source partial sums: None when every part is NULL."""
+    values = [value for value in values if value is not None]
+    return sum(values) if values else None
+
+
+def value_counts(cursor, column):
+    """Entry counts per non-NULL value of an indexed column, most frequent first."""
+    # Served from the column's index (idx_qc_<column>) without touching the table
+    cursor.execute(f"""
+        SELECT {column}, COUNT(*) AS entry_count
+        FROM qc_entries
+        WHERE {column} IS NOT NULL
+        GROUP BY {column}
+        ORDER BY entry_count DESC
+    """)
+    return [[value, count] for value, count in cursor.fetchall()]
+
+
+def distinct_count(cursor, column):
+    """Number of distinct non-NULL values of an indexed column."""
+    # Grouping on the indexed column walks idx_qc_<column> in order, without
+    # the temp B-tree COUNT(DISTINCT ...) builds or a scan of the table
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT {column} FROM qc_entries
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+        )
+    """)
+    return cursor.fetchone()[0]
+
+
+def collect_statistics(conn):
+    """
+    Gather the qc_entries statistics and quality checks with one scan of the table.
+
+    The counts, sums and date ranges come from ENTRY_STATISTICS_SQL, a
+    single pass grouped by data source whose rows are added up here. Per
+    value counts (operators, work orders, departments) and the distinct
+    entry dates and operator IDs are read from the column indexes
+    (idx_qc_<column>), which are covering for them, so the table itself is
+    scanned once. Returns a JSON-serialisable dict.
+    """
+    cursor = conn.cursor()
+    cursor.execute(ENTRY_STATISTICS_SQL)
+    keys = [key for key, _ in ENTRY_AGGREGATES]
+    sources = {source: dict(zip(keys, values)) for source, *values in cursor.fetchall()}
+    parts = list(sources.values())
+    
+    total = {key: sum_values(part[key] for part in parts) for key in keys if not key.endswith('_date')}
+    dated = [part for part in parts if part['dated_entries']]
+    total_entries = total['entries'] or 0
+    operators = value_counts(cursor, 'operator')
+    work_orders = value_counts(cursor, 'work_order')
+    unique_dates = distinct_count(cursor, 'entry_date')
+    unique_operator_ids = distinct_count(cursor, 'operator_id')
+    
+    return {
+        'total_entries': total_entries,
+        'by_source': [
+            {'data_source': source, 'entries': part['entries'], 'dated_entries': part['dated_entries'],
+             'min_date': part['min_date'], 'max_date': part['max_date']}
+            for source, part in sources.items()
+        ],
+        'date_range': {
+            'min': min((part['min_date'] for part in dated), default=None),
+            'max': max((part['max_date'] for part in dated), default=None),
+            'unique_dates': unique_dates,
+        },
+        'operators': {'unique_names': len(operators), 'unique_ids': unique_operator_ids, 'top': operators[:TOP_N]},
+        'work_orders': {'unique': len(work_orders), 'missing': total['missing_work_order'] or 0,
+                        'top': work_orders[:TOP_N]},
+        'departments': {'counts': value_counts(cursor, 'department'), 'missing': total['missing_department'] or 0},
+        'parts': {
+            'total': total['total_parts'],
+            'average': total['total_parts'] / total['entries_with_parts'] if total['entries_with_parts'] else None,
+            'entries': total['entries_with_parts'] or 0,
+            'defects': total['total_defects'],
+            'scrap': total['total_scrap'],
+        },
+        'time': {
+            'total_minutes': total['total_minutes'],
+            'average_minutes': total['total_minutes'] / total['entries_with_time'] if total['entries_with_time'] else None,
+            'entries': total['entries_with_time'] or 0,
+        },
+        'checks': {
+            'missing_entry_date': total_entries - (total['dated_entries'] or 0),
+            'missing_operator': total['missing_operator'] or 0,
+            'excel_missing_source_file': sum(part['missing_source_file'] for source, part in sources.items()
+                                             if source.startswith('excel_')),
+            'direct_input_missing_asana_task_gid': sources.get('direct_input', {}).get('missing_asana_task_gid', 0),
+        },
+    }
+
+
+def collect_import_metadata(cursor):
+    """Import batches per data source from qc_source_metadata."""
+    cursor.execute("""
+        SELECT data_source, COUNT(DISTINCT source_file) as file_count, 
+               SUM(total_entries) as total_imported, MIN(imported_at), MAX(imported_at)
+        FROM qc_source_metadata
+        GROUP BY data_source
+        ORDER BY data_source
+    """)
+    return [
+        {'data_source': source, 'files': file_count or 0, 'entries': total_imported or 0,
+         'first_import': min_import, 'last_import': max_import}
+        for source, file_count, total_imported, min_import, max_import in cursor.fetchall()
+    ]
+
+
+def validate_unified_database(db_path=None, as_json=False):
+    """
+    Validate unified database and print comprehensive statistics.
+
+    With as_json the statistics, check results and import metadata are
+    printed as one JSON document instead of the report. Returns True when
+    no quality check failed.
+    """
+    db_path = db_path or UNIFIED_DB_PATH
+    if not os.path.exists(db_path):
+        if as_json:
+            print(json.dumps({'database': db_path, 'error': 'not found', 'valid': False}, indent=2))
+        else:
+            print(f"❌ Unified database not found: {db_path}")
         return False
     
-    conn = sqlite3.connect(UNIFIED_DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    stats = collect_statistics(conn)
+    import_metadata = collect_import_metadata(cursor)
+    conn.close()
+    issues = {key: stats['checks'][key] for key, _, _ in QUALITY_CHECKS if stats['checks'][key] > 0}
+    
+    if as_json:
+        print(json.dumps({
+            'database': db_path,
+            'size_bytes': os.path.getsize(db_path),
+            'validated_at': datetime.now().isoformat(timespec='seconds'),
+            'statistics': stats,
+            'import_metadata': import_metadata,
+            'issues': issues,
+            'valid': not issues,
+        }, indent=2))
+        return not issues
+    
+    print("=" * 60)
+    print("Unified QC Database Validation")
+    print("=" * 60)
     
     # Basic counts
     print("\n1. Basic Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT COUNT(*) FROM qc_entries")
-    total_entries = cursor.fetchone()[0]
+    total_entries = stats['total_entries']
     print(f"Total QC entries: {total_entries:,}")
     
     # Count by source
-    cursor.execute("SELECT data_source, COUNT(*) FROM qc_entries GROUP BY data_source ORDER BY data_source")
-    source_counts = cursor.fetchall()
     print("\nEntries by data source:")
-    for source, count in source_counts:
-        percentage = (count / total_entries * 100) if total_entries > 0 else 0
-        print(f"  {source:20} {count:8,} ({percentage:5.1f}%)")
+    for source in stats['by_source']:
+        percentage = (source['entries'] / total_entries * 100) if total_entries > 0 else 0
+        print(f"  {source['data_source']:20} {source['entries']:8,} ({percentage:5.1f}%)")
     
     # Date range
     print("\n2. Date Range Analysis")
     print("-" * 60)
     
-    cursor.execute("SELECT MIN(entry_date), MAX(entry_date), COUNT(DISTINCT entry_date) FROM qc_entries WHERE entry_date IS NOT NULL")
-    min_date, max_date, unique_dates = cursor.fetchone()
-    if min_date and max_date:
-        print(f"Date range: {min_date} to {max_date}")
-        print(f"Unique dates: {unique_dates:,}")
+    date_range = stats['date_range']
+    if date_range['min'] and date_range['max']:
+        print(f"Date range: {date_range['min']} to {date_range['max']}")
+        print(f"Unique dates: {date_range['unique_dates']:,}")
         
         # Date range by source
-        cursor.execute("""
-            SELECT data_source, MIN(entry_date), MAX(entry_date), COUNT(*)
-            FROM qc_entries
-            WHERE entry_date IS NOT NULL
-            GROUP BY data_source
-            ORDER BY data_source
-        """)
         print("\nDate range by source:")
-        for source, min_d, max_d, count in cursor.fetchall():
-            print(f"  {source:20} {min_d} to {max_d} ({count:,} entries)")
+        for source in stats['by_source']:
+            if source['dated_entries']:
+                print(f"  {source['data_source']:20} {source['min_date']} to {source['max_date']} "
+                      f"({source['dated_entries']:,} entries)")
     else:
         print("⚠️  No valid dates found")
     
@@ -70,85 +246,56 @@ def validate_unified_database():
     print("\n3. Operator Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT COUNT(DISTINCT operator) FROM qc_entries WHERE operator IS NOT NULL")
-    operator_name_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(DISTINCT operator_id) FROM qc_entries WHERE operator_id IS NOT NULL")
-    operator_id_count = cursor.fetchone()[0]
-    
-    print(f"Unique operators (by name): {operator_name_count:,}")
-    print(f"Unique operators (by ID): {operator_id_count:,}")
+    print(f"Unique operators (by name): {stats['operators']['unique_names']:,}")
+    print(f"Unique operators (by ID): {stats['operators']['unique_ids']:,}")
     
     # Top operators by entry count
-    cursor.execute("""
-        SELECT operator, COUNT(*) as entry_count
-        FROM qc_entries
-        WHERE operator IS NOT NULL
-        GROUP BY operator
-        ORDER BY entry_count DESC
-        LIMIT 10
-    """)
-    print("\nTop 10 operators by entry count:")
-    for operator, count in cursor.fetchall():
+    print(f"\nTop {TOP_N} operators by entry count:")
+    for operator, count in stats['operators']['top']:
         print(f"  {operator:30} {count:8,}")
     
     # Work order statistics
     print("\n4. Work Order Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT COUNT(DISTINCT work_order) FROM qc_entries WHERE work_order IS NOT NULL")
-    wo_count = cursor.fetchone()[0]
-    print(f"Unique work orders: {wo_count:,}")
-    
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE work_order IS NULL")
-    wo_null_count = cursor.fetchone()[0]
-    if wo_null_count > 0:
-        percentage = (wo_null_count / total_entries * 100) if total_entries > 0 else 0
-        print(f"Entries without work order: {wo_null_count:,} ({percentage:.1f}%)")
+    work_orders = stats['work_orders']
+    print(f"Unique work orders: {work_orders['unique']:,}")
+    if work_orders['missing'] > 0:
+        percentage = (work_orders['missing'] / total_entries * 100) if total_entries > 0 else 0
+        print(f"Entries without work order: {work_orders['missing']:,} ({percentage:.1f}%)")
     
     # Top work orders by entry count
-    cursor.execute("""
-        SELECT work_order, COUNT(*) as entry_count
-        FROM qc_entries
-        WHERE work_order IS NOT NULL
-        GROUP BY work_order
-        ORDER BY entry_count DESC
-        LIMIT 10
-    """)
-    print("\nTop 10 work orders by entry count:")
-    for wo, count in cursor.fetchall():
+    print(f"\nTop {TOP_N} work orders by entry count:")
+    for wo, count in work_orders['top']:
         print(f"  {wo:30} {count:8,}")
     
     # Department statistics
     print("\n5. Department Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT department, COUNT(*) FROM qc_entries WHERE department IS NOT NULL GROUP BY department ORDER BY COUNT(*) DESC")
-    dept_counts = cursor.fetchall()
-    if dept_counts:
+    departments = stats['departments']
+    if departments['counts']:
         print("Entries by department:")
-        for dept, count in dept_counts:
+        for dept, count in departments['counts']:
             percentage = (count / total_entries * 100) if total_entries > 0 else 0
             print(f"  {dept:20} {count:8,} ({percentage:5.1f}%)")
     
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE department IS NULL")
-    dept_null_count = cursor.fetchone()[0]
-    if dept_null_count > 0:
-        percentage = (dept_null_count / total_entries * 100) if total_entries > 0 else 0
-        print(f"  {'(Unknown)':20} {dept_null_count:8,} ({percentage:5.1f}%)")
+    if departments['missing'] > 0:
+        percentage = (departments['missing'] / total_entries * 100) if total_entries > 0 else 0
+        print(f"  {'(Unknown)':20} {departments['missing']:8,} ({percentage:5.1f}%)")
     
     # Parts and quality statistics
     print("\n6. Parts and Quality Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT SUM(parts_produced), AVG(parts_produced), COUNT(*) FROM qc_entries WHERE parts_produced > 0")
-    total_parts, avg_parts, entries_with_parts = cursor.fetchone()
+    parts = stats['parts']
+    total_parts = parts['total']
     if total_parts:
         print(f"Total parts produced: {total_parts:,.0f}")
-        print(f"Average parts per entry: {avg_parts:.1f}")
-        print(f"Entries with parts: {entries_with_parts:,}")
+        print(f"Average parts per entry: {parts['average']:.1f}")
+        print(f"Entries with parts: {parts['entries']:,}")
     
-    cursor.execute("SELECT SUM(defects_count), SUM(scrap_count) FROM qc_entries")
-    total_defects, total_scrap = cursor.fetchone()
+    total_defects, total_scrap = parts['defects'], parts['scrap']
     if total_defects or total_scrap:
         print(f"\nTotal defects: {total_defects or 0:,}")
         print(f"Total scrap: {total_scrap or 0:,}")
@@ -162,96 +309,67 @@ def validate_unified_database():
     print("\n7. Time Statistics")
     print("-" * 60)
     
-    cursor.execute("SELECT SUM(total_time_minutes), AVG(total_time_minutes), COUNT(*) FROM qc_entries WHERE total_time_minutes > 0")
-    total_minutes, avg_minutes, entries_with_time = cursor.fetchone()
+    total_minutes, avg_minutes = stats['time']['total_minutes'], stats['time']['average_minutes']
     if total_minutes:
         total_hours = total_minutes / 60.0
         avg_hours = avg_minutes / 60.0
         print(f"Total time: {total_hours:,.1f} hours ({total_minutes:,.0f} minutes)")
         print(f"Average time per entry: {avg_hours:.2f} hours ({avg_minutes:.1f} minutes)")
-        print(f"Entries with time data: {entries_with_time:,}")
+        print(f"Entries with time data: {stats['time']['entries']:,}")
     
     # Data quality validation
     print("\n8. Data Quality Validation")
     print("-" * 60)
     
-    validation_issues = []
-    
-    # Check for missing required fields
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE entry_date IS NULL")
-    missing_dates = cursor.fetchone()[0]
-    if missing_dates > 0:
-        validation_issues.append(f"  ⚠️  {missing_dates:,} entries with missing entry_date")
-    else:
-        print("  ✅ All entries have entry_date")
-    
-    # Check for entries with no operator info
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE operator IS NULL AND operator_id IS NULL")
-    missing_operator = cursor.fetchone()[0]
-    if missing_operator > 0:
-        validation_issues.append(f"  ⚠️  {missing_operator:,} entries with missing operator info")
-    else:
-        print("  ✅ All entries have operator info")
-    
-    # Check for entries with no source file for Excel entries
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE data_source LIKE 'excel_%' AND source_file IS NULL")
-    missing_source_file = cursor.fetchone()[0]
-    if missing_source_file > 0:
-        validation_issues.append(f"  ⚠️  {missing_source_file:,} Excel entries with missing source_file")
-    else:
-        print("  ✅ All Excel entries have source_file")
+    for key, problem, ok in QUALITY_CHECKS:
+        if key not in issues:
+            print(f"  ✅ {ok}")
     
-    # Check for entries with no asana_task_gid for direct input
-    cursor.execute("SELECT COUNT(*) FROM qc_entries WHERE data_source = 'direct_input' AND asana_task_gid IS NULL")
-    missing_task_gid = cursor.fetchone()[0]
-    if missing_task_gid > 0:
-        validation_issues.append(f"  ⚠️  {missing_task_gid:,} direct input entries with missing asana_task_gid")
-    else:
-        print("  ✅ All direct input entries have asana_task_gid")
-    
-    if validation_issues:
+    if issues:
         print("\nValidation Issues:")
-        for issue in validation_issues:
-            print(issue)
+        for key, problem, _ in QUALITY_CHECKS:
+            if key in issues:
+                print(f"  ⚠️  {issues[key]:,} {problem}")
     
     # Source metadata
     print("\n9. Import Metadata")
     print("-" * 60)
     
-    cursor.execute("""
-        SELECT data_source, COUNT(DISTINCT source_file) as file_count, 
-               SUM(total_entries) as total_imported, MIN(imported_at), MAX(imported_at)
-        FROM qc_source_metadata
-        GROUP BY data_source
-        ORDER BY data_source
-    """)
-    metadata = cursor.fetchall()
-    if metadata:
+    if import_metadata:
         print("Import metadata by source:")
-        for source, file_count, total_imported, min_import, max_import in metadata:
-            print(f"  {source:20} {file_count or 0:4} files, {total_imported or 0:8,} entries")
-            if min_import:
-                print(f"    First import: {min_import}")
-            if max_import:
-                print(f"    Last import: {max_import}")
+        for source in import_metadata:
+            print(f"  {source['data_source']:20} {source['files']:4} files, {source['entries']:8,} entries")
+            if source['first_import']:
+                print(f"    First import: {source['first_import']}")
+            if source['last_import']:
+                print(f"    Last import: {source['last_import']}")
     
     # Summary
     print("\n" + "=" * 60)
     print("Validation Summary")
     print("=" * 60)
     
-    if validation_issues:
-        print(f"⚠️  Found {len(validation_issues)} validation issue(s) - see details above")
+    if issues:
+        print(f"⚠️  Found {len(issues)} validation issue(s) - see details above")
     else:
         print("✅ No validation issues found - database looks good!")
     
-    print(f"\nDatabase location: {UNIFIED_DB_PATH}")
-    print(f"Database size: {os.path.getsize(UNIFIED_DB_PATH) / (1024 * 1024):.2f} MB")
+    print(f"\nDatabase location: {db_path}")
+    print(f"Database size: {os.path.getsize(db_path) / (1024 * 1024):.2f} MB")
     
-    conn.close()
-    return len(validation_issues) == 0
+    return not issues
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Validate the unified QC database and print statistics.")
+    parser.add_argument('--db', default=UNIFIED_DB_PATH, help="Database to validate (default: %(default)s)")
+    parser.add_argument('--json', action='store_true',
+                        help="Print the statistics and check results as JSON instead of the report")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    success = validate_unified_database()
+    args = parse_args()
+    success = validate_unified_database(args.db, as_json=args.json)
     sys.exit(0 if success else 1)
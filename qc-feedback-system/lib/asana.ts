@@ -1,5 +1,5 @@
 import asana from 'asana';
-import db from './db';
+import { writeTransaction } from './db';
 
 // Initialize Asana client
 let client: asana.Client | null = null;
@@ -303,13 +303,12 @@ export async function cacheTasks(projectGid: string) {
     return;
   }
   
-  const stmt = db.prepare(`
-    INSERT OR REPLACE INTO asana_tasks_cache 
-    (task_gid, task_name, project_gid, section_name, start_date, due_date, prod_dept, machine_name, custom_fields_json, last_synced)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-  `);
-
-  const insertMany = db.transaction((tasks: any[]) => {
+  const insertMany = (tasks: any[]) => writeTransaction((conn) => {
+    const stmt = conn.prepare(`
+      INSERT OR REPLACE INTO asana_tasks_cache 
+      (task_gid, task_name, project_gid, section_name, start_date, due_date, prod_dept, machine_name, custom_fields_json, last_synced)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+    `);
     for (const task of tasks) {
       try {
         stmt.run(
@@ -29,10 +29,69 @@ if (!fs.existsSync(dbPath)) {
   }
 }
 
-const db = new Database(dbPath);
+function openDatabase(): Database.Database {
+  const conn = new Database(dbPath);
+  // Enable foreign keys
+  conn.pragma('foreign_keys = ON');
+  return conn;
+}
+
+let connection = openDatabase();
+let connectionInode = fs.statSync(dbPath).ino;
 
-// Enable foreign keys
-db.pragma('foreign_keys = ON');
+// The Python builder's --recreate swaps a rebuilt file over qc_unified.db
+// (os.replace), so an open connection would keep reading and writing the
+// replaced file. Reopen whenever the path points at a new inode.
+export function getDb(): Database.Database {
+  let inode: number;
+  try {
+    inode = fs.statSync(dbPath).ino;
+  } catch {
+    return connection;
+  }
+  if (inode !== connectionInode && !connection.inTransaction) {
+    connection.close();
+    connection = openDatabase();
+    connectionInode = inode;
+    initDatabase();
+  }
+  return connection;
+}
+
+// Run fn in a write transaction on the current file. BEGIN IMMEDIATE waits
+// out a swap in progress; the inode is checked again once the lock is held,
+// because a writer that was waiting would otherwise resume on the file the
+// swap just replaced and its write would be lost. All app writes go here.
+export function writeTransaction<T>(fn: (conn: Database.Database) => T): T {
+  for (;;) {
+    const conn = getDb();
+    conn.exec('BEGIN IMMEDIATE');
+    if (fs.statSync(dbPath).ino !== connectionInode) {
+      conn.exec('ROLLBACK');
+      continue;
+    }
+    try {
+      const result = fn(conn);
+      conn.exec('COMMIT');
+      return result;
+    } catch (error) {
+      if (conn.inTransaction) {
+        conn.exec('ROLLBACK');
+      }
+      throw error;
+    }
+  }
+}
+
+// Default export forwarding to the current connection, so callers can keep
+// using db.prepare/db.transaction across a swap (prepare per call, as they do)
+const db = new Proxy({} as Database.Database, {
+  get(_target, property) {
+    const conn = getDb();
+    const value = Reflect.get(conn, property, conn);
+    return typeof value === 'function' ? value.bind(conn) : value;
+  },
+});
 
 // Initialize application-specific tables (QC entries table already exists in unified schema)
 export function initDatabase() {
@@ -162,56 +221,58 @@ export interface UnifiedQCEntryInput {
 }
 
 export function insertQCEntry(entry: UnifiedQCEntryInput): number {
-  const stmt = db.prepare(`
-    INSERT INTO qc_entries (
-      data_source, source_entry_id, work_order, customer_name, entry_date,
-      operator, operator_id, part_name, start_timestamp, mid_timestamp, stop_timestamp,
-      start_time, finish_time, process_time_minutes, total_time_minutes,
-      setup_minutes, downtime_minutes, parts_produced, total_parts,
-      defects_count, scrap_count, yield_status, material, material_size,
-      downtime_category, notes, department, qc_status, reviewed_by, reviewed_at,
-      asana_task_gid, utilization_pct, actual_ppm
-    ) VALUES (
-      'direct_input', NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-      ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-    )
-  `);
+  return writeTransaction((conn) => {
+    const stmt = conn.prepare(`
+      INSERT INTO qc_entries (
+        data_source, source_entry_id, work_order, customer_name, entry_date,
+        operator, operator_id, part_name, start_timestamp, mid_timestamp, stop_timestamp,
+        start_time, finish_time, process_time_minutes, total_time_minutes,
+        setup_minutes, downtime_minutes, parts_produced, total_parts,
+        defects_count, scrap_count, yield_status, material, material_size,
+        downtime_category, notes, department, qc_status, reviewed_by, reviewed_at,
+        asana_task_gid, utilization_pct, actual_ppm
+      ) VALUES (
+        'direct_input', NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+      )
+    `);
   
-  const result = stmt.run(
-    entry.work_order || null,
-    entry.customer_name || null,
-    entry.entry_date,
-    entry.operator || null,
-    entry.operator_id || null,
-    entry.part_name || null,
-    entry.start_timestamp || null,
-    entry.mid_timestamp || null,
-    entry.stop_timestamp || null,
-    entry.start_time || null,
-    entry.finish_time || null,
-    entry.process_time_minutes || null,
-    entry.total_time_minutes || null,
-    entry.setup_minutes || null,
-    entry.downtime_minutes || null,
-    entry.parts_produced || null,
-    entry.total_parts || null,
-    entry.defects_count || null,
-    entry.scrap_count || null,
-    entry.yield_status || null,
-    entry.material || null,
-    entry.material_size || null,
-    entry.downtime_category || null,
-    entry.notes || null,
-    entry.department,
-    entry.qc_status || 'draft',
-    entry.reviewed_by || null,
-    entry.reviewed_at || null,
-    entry.asana_task_gid || null,
-    entry.utilization_pct || null,
-    entry.actual_ppm || null,
-  );
+    const result = stmt.run(
+      entry.work_order || null,
+      entry.customer_name || null,
+      entry.entry_date,
+      entry.operator || null,
+      entry.operator_id || null,
+      entry.part_name || null,
+      entry.start_timestamp || null,
+      entry.mid_timestamp || null,
+      entry.stop_timestamp || null,
+      entry.start_time || null,
+      entry.finish_time || null,
+      entry.process_time_minutes || null,
+      entry.total_time_minutes || null,
+      entry.setup_minutes || null,
+      entry.downtime_minutes || null,
+      entry.parts_produced || null,
+      entry.total_parts || null,
+      entry.defects_count || null,
+      entry.scrap_count || null,
+      entry.yield_status || null,
+      entry.material || null,
+      entry.material_size || null,
+      entry.downtime_category || null,
+      entry.notes || null,
+      entry.department,
+      entry.qc_status || 'draft',
+      entry.reviewed_by || null,
+      entry.reviewed_at || null,
+      entry.asana_task_gid || null,
+      entry.utilization_pct || null,
+      entry.actual_ppm || null,
+    );
   
-  return result.lastInsertRowid as number;
+    return result.lastInsertRowid as number;
+  });
 }
 
 export default db;
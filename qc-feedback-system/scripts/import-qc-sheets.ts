@@ -12,7 +12,7 @@
 import ExcelJS from 'exceljs';
 import fs from 'fs';
 import path from 'path';
-import db from '../lib/db';
+import { writeTransaction } from '../lib/db';
 
 const QC_FORMS_PATH = '/Users/zax/Library/CloudStorage/OneDrive-SpecialDesignProducts,Inc/QC FORMS';
 
@@ -160,15 +160,14 @@ async function importQCSheet(filePath: string): Promise<number> {
   }
 
   // Insert into database
-  const stmt = db.prepare(`
-    INSERT INTO qc_entries (
-      date, department, operator, part_name, start_time, process_time_minutes,
-      finish_time, total_time_minutes, material, total_parts, yield, material_size,
-      qc_rejected_parts, actual_ppm, ideal_ppm, productive_time_percent
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-  `);
-
-  const insertMany = db.transaction((entries: QCEntry[]) => {
+  const insertMany = (entries: QCEntry[]) => writeTransaction((conn) => {
+    const stmt = conn.prepare(`
+      INSERT INTO qc_entries (
+        date, department, operator, part_name, start_time, process_time_minutes,
+        finish_time, total_time_minutes, material, total_parts, yield, material_size,
+        qc_rejected_parts, actual_ppm, ideal_ppm, productive_time_percent
+      ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    `);
     for (const entry of entries) {
       stmt.run(
         entry.date,
@@ -212,18 +211,20 @@ async function importOperatorsFromTemplate() {
     return;
   }
 
-  const stmt = db.prepare('INSERT OR IGNORE INTO operators (name, department) VALUES (?, ?)');
+  writeTransaction((conn) => {
+    const stmt = conn.prepare('INSERT OR IGNORE INTO operators (name, department) VALUES (?, ?)');
 
-  // Read operators from Variables sheet (starting from row 1, column 3)
-  for (let rowNum = 1; rowNum <= varsSheet.rowCount; rowNum++) {
-    const row = varsSheet.getRow(rowNum);
-    const operator = row.getCell(3)?.value?.toString().trim();
-    const department = row.getCell(2)?.value?.toString().trim();
+    // Read operators from Variables sheet (starting from row 1, column 3)
+    for (let rowNum = 1; rowNum <= varsSheet.rowCount; rowNum++) {
+      const row = varsSheet.getRow(rowNum);
+      const operator = row.getCell(3)?.value?.toString().trim();
+      const department = row.getCell(2)?.value?.toString().trim();
 
-    if (operator && operator !== 'Operators') {
-      stmt.run(operator, department || null);
+      if (operator && operator !== 'Operators') {
+        stmt.run(operator, department || null);
+      }
     }
-  }
+  });
 }
 
 async function main() {